@@ -0,0 +1,264 @@
+"""
+Blue Mood - Audio Feature Similarity
+Vektor fitur audio per lagu (MFCC, tempo, spectral centroid, chroma) dan
+pencarian tetangga terdekat dengan cosine similarity.
+
+Analisis dijalankan thread latar dengan librosa (sama seperti visualizer).
+Vektor disimpan sebagai matriks float32 di audio_features.npy, dengan peta
+baris -> song_id dan cap ukuran/mtime file di audio_features.json. Saat
+startup hanya lagu yang filenya berubah (atau belum pernah dianalisis)
+yang diproses ulang.
+
+Query: matriks distandardisasi per kolom lalu dinormalisasi L2 sekali
+(di-cache sampai ada perubahan), sehingga satu lookup cukup satu perkalian
+matriks-vektor + argpartition.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+try:
+    import numpy as np
+    import librosa
+    AUDIO_FEATURES_AVAILABLE = True
+except ImportError:
+    AUDIO_FEATURES_AVAILABLE = False
+
+FEATURES_MATRIX_FILE = "audio_features.npy"
+FEATURES_MAP_FILE = "audio_features.json"
+
+ANALYSIS_SAMPLE_RATE = 22050
+ANALYSIS_OFFSET_SECONDS = 30.0  # Lewati intro
+ANALYSIS_SECONDS = 60.0  # Cukup satu potongan lagu untuk fitur ringkas
+N_MFCC = 13
+N_CHROMA = 12
+FEATURE_DIM = N_MFCC + 1 + 1 + N_CHROMA  # MFCC, tempo, centroid, chroma
+
+# Jeda minimum antar penyimpanan matriks ke disk selama analisis berjalan
+SAVE_INTERVAL_SECONDS = 30.0
+
+
+def extract_features(file_path):
+    """Vektor fitur float32 (FEATURE_DIM,) dari potongan tengah file audio."""
+    y, sr = librosa.load(file_path, sr=ANALYSIS_SAMPLE_RATE, mono=True,
+                         offset=ANALYSIS_OFFSET_SECONDS, duration=ANALYSIS_SECONDS)
+    if len(y) < sr:
+        # Lagu lebih pendek dari offset: analisis dari awal
+        y, sr = librosa.load(file_path, sr=ANALYSIS_SAMPLE_RATE, mono=True, duration=ANALYSIS_SECONDS)
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=N_MFCC).mean(axis=1)
+    tempo = np.atleast_1d(librosa.beat.beat_track(y=y, sr=sr)[0])[:1]
+    centroid = librosa.feature.spectral_centroid(y=y, sr=sr).mean(axis=1)
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr).mean(axis=1)
+    return np.concatenate([mfcc, tempo, centroid, chroma]).astype(np.float32)
+
+
+def file_stamp(file_path):
+    """[ukuran, mtime_ns] file, atau None jika file tidak ada."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class AudioFeatureIndex:
+    """
+    Matriks fitur (baris = lagu) + peta song_id <-> baris.
+    Mengikuti protokol index library: lagu baru dijadwalkan untuk dianalisis,
+    lagu yang dihapus dilepas dari matriks (baris terakhir dipindah ke slotnya).
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, records_fn, matrix_file=FEATURES_MATRIX_FILE, map_file=FEATURES_MAP_FILE):
+        self.records_fn = records_fn
+        self.matrix_file = matrix_file
+        self.map_file = map_file
+        self.matrix = np.zeros((self.INITIAL_CAPACITY, FEATURE_DIM), dtype=np.float32)
+        self.ids = []  # baris -> song_id
+        self.rows = {}  # song_id -> baris
+        self.stamps = {}  # song_id -> [file_path, ukuran, mtime_ns]
+        self._unit = None  # Cache matriks terstandardisasi + ter-normalisasi L2
+        self._deleted = set()  # Lagu yang dihapus selagi masih menunggu analisis
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # save() dari thread analisis vs stop()
+        self._todo = queue.Queue()
+        self._dirty = 0
+        self._last_save = time.monotonic()
+        self._thread = None
+        self._stopping = False
+
+    # --- PERSISTENSI ---
+    def load(self):
+        if not (os.path.exists(self.matrix_file) and os.path.exists(self.map_file)):
+            return
+        try:
+            with open(self.map_file, 'r') as f:
+                data = json.load(f)
+            matrix = np.load(self.matrix_file)
+        except (OSError, ValueError) as e:
+            print(f"Fitur audio: cache tidak bisa dibaca ({e}), analisis diulang.")
+            return
+        ids = data.get('ids', [])
+        if matrix.shape != (len(ids), FEATURE_DIM):
+            print("Fitur audio: ukuran cache tidak cocok, analisis diulang.")
+            return
+        with self._lock:
+            self.matrix = np.zeros((max(len(ids), self.INITIAL_CAPACITY), FEATURE_DIM), dtype=np.float32)
+            self.matrix[:len(ids)] = matrix
+            self.ids = list(ids)
+            self.rows = {song_id: row for row, song_id in enumerate(self.ids)}
+            self.stamps = data.get('stamps', {})
+            self._unit = None
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                n = len(self.ids)
+                matrix = self.matrix[:n].copy()
+                data = {'ids': list(self.ids), 'stamps': dict(self.stamps)}
+                self._dirty = 0
+                self._last_save = time.monotonic()
+            tmp_matrix = self.matrix_file + ".tmp.npy"
+            tmp_map = self.map_file + ".tmp"
+            np.save(tmp_matrix, matrix)
+            with open(tmp_map, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_matrix, self.matrix_file)
+            os.replace(tmp_map, self.map_file)
+
+    # --- ANALISIS LATAR ---
+    def start(self):
+        """Menjalankan thread latar: memuat cache, memindai library, lalu menganalisis lagu yang belum/berubah."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _scan(self):
+        """Menjadwalkan seluruh lagu library dan melepas baris cache milik lagu yang sudah tidak ada."""
+        self.load()
+        alive = set()
+        for song in self.records_fn():
+            if self._stopping:
+                return
+            alive.add(song.song_id)
+            self._todo.put((song.song_id, song.file_path))
+        with self._lock:
+            for song_id in [s_id for s_id in self.ids if s_id not in alive]:
+                self._remove(song_id)
+
+    def stop(self):
+        self._stopping = True
+        self._todo.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self._dirty:
+            self.save()
+
+    def _run(self):
+        self._scan()
+        while not self._stopping:
+            item = self._todo.get()
+            if item is None:
+                return
+            song_id, file_path = item
+            stamp = file_stamp(file_path) if file_path else None
+            if stamp is None:
+                continue
+            with self._lock:
+                cached = self.stamps.get(song_id)
+                if song_id in self.rows and cached == [file_path] + stamp:
+                    continue
+            try:
+                vector = extract_features(file_path)
+            except Exception as e:
+                print(f"Fitur audio: gagal menganalisis {file_path}: {e}")
+                continue
+            if not np.all(np.isfinite(vector)):
+                continue
+            with self._lock:
+                if song_id in self._deleted:
+                    self._deleted.discard(song_id)
+                    continue
+                self._set(song_id, vector)
+                self.stamps[song_id] = [file_path] + stamp
+                self._dirty += 1
+            if self._todo.empty() or time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS:
+                self.save()
+
+    # --- MUTASI MATRIKS (dipanggil dengan _lock) ---
+    def _set(self, song_id, vector):
+        row = self.rows.get(song_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.matrix):
+                grown = np.zeros((len(self.matrix) * 2, FEATURE_DIM), dtype=np.float32)
+                grown[:row] = self.matrix[:row]
+                self.matrix = grown
+            self.ids.append(song_id)
+            self.rows[song_id] = row
+        self.matrix[row] = vector
+        self._unit = None
+
+    def _remove(self, song_id):
+        row = self.rows.pop(song_id, None)
+        self.stamps.pop(song_id, None)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+        self._unit = None
+        self._dirty += 1
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        with self._lock:
+            self._deleted.discard(song.song_id)
+        self._todo.put((song.song_id, song.file_path))
+
+    def song_updated(self, song):
+        pass  # Update admin tidak mengubah file audio
+
+    def song_removed(self, song):
+        with self._lock:
+            self._remove(song.song_id)
+            self._deleted.add(song.song_id)
+
+    # --- QUERY ---
+    def _unit_matrix(self):
+        if self._unit is None:
+            m = self.matrix[:len(self.ids)]
+            std = m.std(axis=0)
+            std[std == 0] = 1.0
+            z = (m - m.mean(axis=0)) / std
+            norms = np.linalg.norm(z, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._unit = (z / norms).astype(np.float32)
+        return self._unit
+
+    def has(self, song_id):
+        return song_id in self.rows
+
+    def nearest(self, song_id, k=10, exclude=()):
+        """k song_id dengan cosine similarity tertinggi terhadap song_id, terdekat lebih dulu."""
+        with self._lock:
+            row = self.rows.get(song_id)
+            if row is None or len(self.ids) < 2:
+                return []
+            unit = self._unit_matrix()
+            scores = unit @ unit[row]
+            scores[row] = -np.inf
+            for s_id in exclude:
+                r = self.rows.get(s_id)
+                if r is not None:
+                    scores[r] = -np.inf
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [self.ids[r] for r in top if np.isfinite(scores[r])]
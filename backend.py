@@ -1,6 +1,7 @@
 # Simpan file ini sebagai backend.py
 
 import time
+import math
 import random
 from collections import deque
 import pygame
@@ -8,25 +9,98 @@ import json
 import os
 import threading
 import syncedlyrics
+import order_tree
+from storage import PersistenceWriter, create_store
+from binary_catalog import LazySongLibrary
+from indexes import (BitmapIndex, ColumnarSongTable, FuzzyIndex, PrefixTrie, SimilarityBuckets, SortedViews,
+                     TrigramIndex, NUMPY_AVAILABLE, artist_keys)
+from search import parse_query, top_k_page
+from shuffle import ShuffleOrder, WeightedShuffle
+from play_queue import PlayQueue
+from history import RecentlyPlayed, HISTORY_DEPTH
+from listening import ListeningLog, ListeningStats, STATS_SNAPSHOT_EVERY
+from audio_features import AudioFeatureIndex, AUDIO_FEATURES_AVAILABLE
+from radio import RadioStation
+from crossfade import CrossfadeEngine, CROSSFADE_AVAILABLE, CROSSFADE_MAX_SECONDS
 
 DATA_FILE = "music_data.json"
+# "json" = snapshot + journal (cocok untuk library kecil), "sqlite" = database ber-index,
+# "binary" = katalog biner mmap dengan objek Song yang dibuat lazy (startup cepat)
+STORAGE_BACKEND = "json"
+# Seed permutasi shuffle (None = acak setiap sesi, angka = urutan bisa diulang)
+SHUFFLE_SEED = None
+# Weighted shuffle: favorit lebih sering, lagu yang sering/baru saja diputar lebih jarang
+FAVOURITE_WEIGHT = 3.0
+RECENCY_WINDOW_SECONDS = 6 * 60 * 60  # Setelah jeda ini lagu kembali ke bobot penuh
+RECENCY_FLOOR = 0.05  # Bobot minimum lagu yang baru saja diputar
+# Sesi dihitung 'complete' jika minimal sebagian ini dari durasi lagu didengarkan
+COMPLETE_RATIO = 0.9
+# Pengaruh jumlah putar terhadap skor pencarian berperingkat
+SEARCH_POPULARITY_WEIGHT = 0.1
+# Lagu mirip berdasarkan fitur audio: dipilih acak dari k tetangga terdekat,
+# tanpa lagu yang baru saja diputar agar Next tidak bolak-balik di dua lagu
+SIMILAR_NEIGHBOURS = 10
+SIMILAR_AVOID_RECENT = 10
+# Jumlah lagu teratas dari model co-listening yang diundi untuk autoplay
+RELATED_NEIGHBOURS = 5
+# Radio: jumlah kandidat per sumber (co-listening, fitur audio) dan undian dari bucket artis/genre
+RADIO_CANDIDATES = 30
+RADIO_BUCKET_SAMPLES = 10
+# Gapless: lagu berikutnya disiapkan (file dibaca, decoder dibuka, diantrekan ke mixer)
+# sekian detik sebelum lagu habis; pergantian dianggap alami jika terjadi dalam toleransi ini
+GAPLESS_PLAYBACK = True
+GAPLESS_PREPARE_SECONDS = 15.0
+GAPLESS_END_TOLERANCE = 0.5
+GAPLESS_WARM_CHUNK = 1 << 20
+# Crossfade antar lagu (0 = mati, maksimal CROSSFADE_MAX_SECONDS); menggantikan antrean gapless
+CROSSFADE_SECONDS = 0.0
+
+
+# Tabel simbol bersama: artis/album/genre yang sama dipakai ribuan lagu
+# cukup disimpan sebagai satu objek string.
+_symbol_table = {}
+
+
+def intern_symbol(value):
+    if not isinstance(value, str):
+        return value
+    return _symbol_table.setdefault(value, value)
 
 
 # ==============================================================================
 # KELAS 1: SONG (Tipe Data Record)
 # ==============================================================================
 class Song:
+    # __slots__ menghilangkan __dict__ per objek (hemat memori untuk library besar)
+    __slots__ = ('song_id', 'title', 'artist', 'album', 'genre', 'duration_seconds',
+                 'file_path', 'image_path', '_playlist_nodes')
+
     def __init__(self, song_id, title, artist, album, genre, duration_seconds, file_path,
                  image_path):
         self.song_id = song_id
         self.title = title
-        self.artist = artist
-        self.album = album
-        self.genre = genre
+        self.artist = intern_symbol(artist)
+        self.album = intern_symbol(album)
+        self.genre = intern_symbol(genre)
         self.duration_seconds = duration_seconds
         self.file_path = file_path
         self.image_path = image_path
-        self.playlist_nodes = []
+        self._playlist_nodes = None  # List baru dibuat saat lagu masuk playlist
+
+    @property
+    def playlist_nodes(self):
+        return self._playlist_nodes if self._playlist_nodes is not None else ()
+
+    def add_playlist_node(self, node):
+        if self._playlist_nodes is None:
+            self._playlist_nodes = []
+        self._playlist_nodes.append(node)
+
+    def remove_playlist_node(self, node):
+        if self._playlist_nodes and node in self._playlist_nodes:
+            self._playlist_nodes.remove(node)
+            if not self._playlist_nodes:
+                self._playlist_nodes = None
 
     def __str__(self):
         mins = self.duration_seconds // 60
@@ -34,22 +108,31 @@ class Song:
         return f"[{self.song_id}] {self.title} - {self.artist} ({self.album} / {self.genre}) - {mins:02}:{secs:02}"
 
     def update_details(self, title, artist, album, genre, image_path):
+        self.set_details(title, artist, album, genre, image_path)
+        print(f"Info lagu '{self.song_id}' telah diupdate.")
+
+    def set_details(self, title, artist, album, genre, image_path):
+        """Mengubah metadata tanpa pesan (dipakai saat journal diputar ulang)."""
         self.title = title
-        self.artist = artist
-        self.album = album
-        self.genre = genre
+        self.artist = intern_symbol(artist)
+        self.album = intern_symbol(album)
+        self.genre = intern_symbol(genre)
         self.image_path = image_path
-        print(f"Info lagu '{self.song_id}' telah diupdate.")
 
 
 # ==============================================================================
 # KELAS 2 & 3: DATA STRUCTURE (Doubly Linked List)
 # ==============================================================================
 class Node:
-    def __init__(self, song_object):
+    # left/right/parent/priority/size dipakai oleh order_tree (index posisi)
+    __slots__ = ('song', 'next', 'prev', 'owner', 'left', 'right', 'parent', 'priority', 'size')
+
+    def __init__(self, song_object, owner=None):
         self.song = song_object
         self.next = None
         self.prev = None
+        self.owner = owner  # DoublyLinkedList pemilik node ini
+        order_tree.init_tree_node(self)
 
 
 class DoublyLinkedList:
@@ -58,43 +141,157 @@ class DoublyLinkedList:
         self.head = None
         self.tail = None
         self.current_song_node = None
+        # Index hash song_id -> node, agar cek keanggotaan O(1)
+        self.nodes_by_song_id = {}
+        self.length = 0
+        self.total_duration = 0
+        # Root treap order-statistic: akses posisi ke-i dalam O(log n)
+        self.root = None
+
+    def contains(self, song_object):
+        """True jika lagu ada di playlist ini (O(1))."""
+        return song_object.song_id in self.nodes_by_song_id
+
+    def _link_before(self, new_node, next_node):
+        """Menyambung node ke DLL tepat sebelum next_node (None = di ekor)."""
+        prev_node = next_node.prev if next_node else self.tail
+        new_node.prev = prev_node
+        new_node.next = next_node
+        if prev_node: prev_node.next = new_node
+        else: self.head = new_node
+        if next_node: next_node.prev = new_node
+        else: self.tail = new_node
+
+    def _unlink(self, node):
+        if node == self.head: self.head = node.next
+        if node == self.tail: self.tail = node.prev
+        if node.prev: node.prev.next = node.next
+        if node.next: node.next.prev = node.prev
+        node.prev = None
+        node.next = None
+
+    def _register(self, node):
+        song_object = node.song
+        song_object.add_playlist_node(node)
+        self.nodes_by_song_id.setdefault(song_object.song_id, []).append(node)
+        self.length += 1
+        self.total_duration += song_object.duration_seconds or 0
 
     def add_song(self, song_object):
-        new_node = Node(song_object)
-        if self.head is None:
-            self.head = new_node
-            self.tail = new_node
-        else:
-            self.tail.next = new_node
-            new_node.prev = self.tail
-            self.tail = new_node
-        song_object.playlist_nodes.append(new_node)
+        self.append(song_object)
         print(f"'{song_object.title}' ditambahkan ke playlist '{self.name}'.")
 
+    def append(self, song_object):
+        """Menambahkan lagu di ekor tanpa pesan (dipakai saat journal diputar ulang)."""
+        new_node = Node(song_object, owner=self)
+        self._link_before(new_node, None)
+        self.root = order_tree.merge(self.root, new_node)
+        self._register(new_node)
+        return new_node
+
+    def insert_at(self, index, song_object):
+        """Menyisipkan lagu di posisi index (0 = paling depan) dalam O(log n)."""
+        index = max(0, min(index, self.length))
+        new_node = Node(song_object, owner=self)
+        next_node = order_tree.node_at(self.root, index) if index < self.length else None
+        self._link_before(new_node, next_node)
+        left, right = order_tree.split(self.root, index)
+        self.root = order_tree.merge(order_tree.merge(left, new_node), right)
+        self._register(new_node)
+        return new_node
+
+    def extend(self, songs):
+        """Menambahkan banyak lagu di ekor sekaligus (treap dibangun linear lalu digabung sekali)."""
+        new_nodes = []
+        for song_object in songs:
+            new_node = Node(song_object, owner=self)
+            self._link_before(new_node, None)
+            self._register(new_node)
+            new_nodes.append(new_node)
+        self.root = order_tree.merge(self.root, order_tree.build(new_nodes))
+        if new_nodes:
+            print(f"{len(new_nodes)} lagu ditambahkan ke playlist '{self.name}'.")
+
+    def move(self, from_index, to_index):
+        """Memindahkan lagu dari posisi from_index ke to_index. current_song_node tetap valid."""
+        node = order_tree.node_at(self.root, from_index)
+        to_index = max(0, min(to_index, self.length - 1))
+        self._unlink(node)
+        self.root = order_tree.remove(self.root, node)
+        next_node = order_tree.node_at(self.root, to_index) if to_index < self.length - 1 else None
+        self._link_before(node, next_node)
+        left, right = order_tree.split(self.root, to_index)
+        self.root = order_tree.merge(order_tree.merge(left, node), right)
+        return node
+
+    def node_at(self, index):
+        return order_tree.node_at(self.root, index)
+
+    def get_at(self, index):
+        """Lagu di posisi index (0-based) dalam O(log n)."""
+        return order_tree.node_at(self.root, index).song
+
+    def index_of_node(self, node):
+        return order_tree.rank(node)
+
+    def slice(self, start, stop):
+        """Lagu di posisi [start, stop): O(log n) untuk mencari awal, lalu jalan lewat next."""
+        start = max(0, start)
+        stop = min(stop, self.length)
+        songs = []
+        if start >= stop:
+            return songs
+        current = order_tree.node_at(self.root, start)
+        while current and len(songs) < stop - start:
+            songs.append(current.song)
+            current = current.next
+        return songs
+
     def _remove_node(self, node_to_delete):
         if node_to_delete is None: return
         if self.current_song_node == node_to_delete: self.current_song_node = None
-        if node_to_delete == self.head: self.head = node_to_delete.next
-        if node_to_delete == self.tail: self.tail = node_to_delete.prev
-        if node_to_delete.prev: node_to_delete.prev.next = node_to_delete.next
-        if node_to_delete.next: node_to_delete.next.prev = node_to_delete.prev
-        if node_to_delete in node_to_delete.song.playlist_nodes:
-            node_to_delete.song.playlist_nodes.remove(node_to_delete)
-
-    def remove_song_by_user(self, song_object):
+        self._unlink(node_to_delete)
+        self.root = order_tree.remove(self.root, node_to_delete)
+        node_to_delete.song.remove_playlist_node(node_to_delete)
+
+        nodes = self.nodes_by_song_id.get(node_to_delete.song.song_id)
+        if nodes and node_to_delete in nodes:
+            nodes.remove(node_to_delete)
+            if not nodes:
+                del self.nodes_by_song_id[node_to_delete.song.song_id]
+            self.length -= 1
+            self.total_duration -= node_to_delete.song.duration_seconds or 0
+        node_to_delete.owner = None
+
+    def clear(self):
+        """Mengosongkan playlist dan melepas referensi node dari setiap lagu."""
         current = self.head
-        node_to_remove = None
         while current:
-            if current.song == song_object:
-                node_to_remove = current
-                break
+            current.song.remove_playlist_node(current)
+            current.owner = None
             current = current.next
-        if node_to_remove:
-            self._remove_node(node_to_remove)
+        self.head = None
+        self.tail = None
+        self.current_song_node = None
+        self.nodes_by_song_id = {}
+        self.length = 0
+        self.total_duration = 0
+        self.root = None
+
+    def remove_song_by_user(self, song_object):
+        if self.remove_song(song_object):
             print(f"'{song_object.title}' telah dihapus dari playlist '{self.name}'.")
         else:
             print(f"'{song_object.title}' tidak ditemukan di playlist ini.")
 
+    def remove_song(self, song_object):
+        """Menghapus kemunculan pertama lagu tanpa pesan. False jika lagu tidak ada."""
+        node_to_remove = self.find_node_by_song(song_object)
+        if node_to_remove is None:
+            return False
+        self._remove_node(node_to_remove)
+        return True
+
     def view_songs(self):
         songs = []
         current = self.head
@@ -104,12 +301,13 @@ class DoublyLinkedList:
         return songs
 
     def find_node_by_song(self, song_object):
-        current = self.head
-        while current:
-            if current.song == song_object:
-                return current
-            current = current.next
-        return None
+        """Node pertama (paling dekat head) untuk lagu ini."""
+        nodes = self.nodes_by_song_id.get(song_object.song_id)
+        if not nodes:
+            return None
+        if len(nodes) == 1:
+            return nodes[0]
+        return min(nodes, key=order_tree.rank)
 
     def play_from_playlist(self):
         if self.head:
@@ -144,63 +342,143 @@ class DoublyLinkedList:
 # KELAS 4: MUSIC PLAYER (Controller Utama)
 # ==============================================================================
 class MusicPlayer:
-    def __init__(self):
+    def __init__(self, storage_backend=STORAGE_BACKEND):
         pygame.mixer.init()
         self.song_library = {}
         self.user_playlists = {}
         self.favourite_playlist = DoublyLinkedList("My Favourites")
         self.is_shuffle = False
         self.repeat_mode = "none"
+        # Permutasi shuffle untuk konteks yang sedang diputar (dibuat saat dibutuhkan)
+        self.shuffle_order = None
+        self.shuffle_context = None
+        # "order" = permutasi tanpa pengulangan, "weighted" = acak berbobot (khusus library)
+        self.shuffle_mode = "order"
+        self.weighted_back_stack = deque(maxlen=100)  # Riwayat untuk Prev di weighted shuffle
         self.current_song = None
         self.is_playing = False
         self.current_context = None
-        self.recently_played_history = deque(maxlen=10)
+        self.play_queue = PlayQueue()  # Antrean "Up Next", diputar sebelum lagu dari konteks
+        self.radio = None  # RadioStation aktif ("radio dari lagu ini"), None jika mode radio mati
+        # Dipegang saat library/index/statistik berubah dan saat thread radio membacanya
+        self.library_lock = threading.RLock()
+        # Gapless: lagu yang sudah diantrekan ke pygame.mixer.music.queue untuk menyambung lagu saat ini
+        self.gapless = GAPLESS_PLAYBACK
+        self._gapless_lock = threading.Lock()  # Urutan load/play vs queue dari thread persiapan
+        self._gapless_generation = 0  # Naik setiap kali musik di-load/seek; antrean lama jadi basi
+        self._gapless_prepared = None  # generation yang sudah disiapkan
+        self._gapless_next = None  # Song yang akan diputar berikutnya (mungkin masih disiapkan)
+        self._gapless_planned = False  # True jika _gapless_next hasil undian (lagu mirip/weighted)
+        self._gapless_in_mixer = None  # Song yang benar-benar ada di antrean mixer (bisa berbeda dari _gapless_next)
+        self._gapless_last_pos = 0  # get_pos() terbesar lagu saat ini sejak diantrekan (ms)
+        self._gapless_ended_at = None  # time.time() saat mixer terukur pindah ke lagu antrean
+        # Crossfade: ekor lagu lama + kepala lagu baru di dua Channel, disiapkan bersama persiapan gapless
+        self.crossfade = CrossfadeEngine() if CROSSFADE_AVAILABLE else None
+        self.crossfade_seconds = 0.0
+        self.set_crossfade(CROSSFADE_SECONDS)
+        # Riwayat unik (LRU) song_id -> waktu terakhir diputar, ikut disimpan
+        self.recently_played = RecentlyPlayed(HISTORY_DEPTH)
         self.current_seek_time = 0.0
         self.start_time = 0.0  # Waktu saat tombol Play ditekan
         self.pause_start_time = 0.0  # Waktu saat tombol Pause ditekan
         self.username = "Mokhammad Bahauddin"
         self.beat_times = []  # Dihapus dari versi ini
+        self.store = create_store(storage_backend, DATA_FILE)
+        self.writer = PersistenceWriter(self.store)
+        # Log event mendengarkan + agregat (jumlah putar, total per artis/genre/hari, top-k)
+        self.listening_log = ListeningLog()
+        self.listening_writer = PersistenceWriter(self.listening_log)
+        self.listening_stats = ListeningStats()
+        self.listening_song = None  # Lagu yang sesi mendengarkannya sedang berjalan
+        self._events_since_stats = 0
+        # Index tambahan yang diberi tahu setiap kali library berubah (CRUD admin)
+        self.library_indexes = []
+        # Index trigram untuk pencarian substring (dibangun saat pencarian pertama)
+        self.search_index = TrigramIndex(self._iter_song_records)
+        self.library_indexes.append(self.search_index)
+        # Trie token untuk saran saat mengetik (dibaca dari thread worker pencarian)
+        self.prefix_trie = PrefixTrie(self._iter_song_records)
+        self.library_indexes.append(self.prefix_trie)
+        # Kosakata token + BK-tree untuk pencarian toleran salah ketik
+        self.fuzzy_index = FuzzyIndex(self._iter_song_records)
+        self.library_indexes.append(self.fuzzy_index)
+        # Bitset per genre/artis/album + index durasi untuk query terstruktur dan facet
+        self.bitmap_index = BitmapIndex(self._iter_song_records)
+        self.library_indexes.append(self.bitmap_index)
+        # Treap terurut per kolom (judul/artis/album/durasi/tanggal) untuk tampilan library
+        self.sorted_views = SortedViews(self._iter_song_records)
+        self.library_indexes.append(self.sorted_views)
+        # Bucket artis/genre ternormalisasi untuk memilih lagu mirip tanpa memindai library
+        self.similar_buckets = SimilarityBuckets(self._iter_song_records)
+        self.library_indexes.append(self.similar_buckets)
+        # Vektor fitur audio (librosa) untuk lagu mirip berdasarkan suara, dianalisis di thread latar
+        self.audio_features = None
+        if AUDIO_FEATURES_AVAILABLE:
+            self.audio_features = AudioFeatureIndex(self._iter_song_records)
+            self.library_indexes.append(self.audio_features)
+        self.song_table = None
+        if NUMPY_AVAILABLE:
+            # Tabel kolom NumPy, dibangun saat filter pertama kali dipakai
+            self.song_table = ColumnarSongTable(self._iter_song_records)
+            self.library_indexes.append(self.song_table)
+        # Tabel alias untuk weighted shuffle, dibangun saat pertama kali dipakai
+        self.weighted_shuffle = WeightedShuffle(lambda: self.song_library.keys(), self._shuffle_weight,
+                                                self._recency_factor, seed=SHUFFLE_SEED)
+        self.library_indexes.append(self.weighted_shuffle)
         self.load_data()
+        self.load_listening_stats()
+        if self.audio_features is not None:
+            self.audio_features.start()
 
     # --- FUNGSI SAVE/LOAD ---
     def load_data(self):
-        if not os.path.exists(DATA_FILE):
+        if not self.store.has_data():
             print("File data tidak ditemukan. Memulai dengan data kosong.")
             return
         try:
-            with open(DATA_FILE, 'r') as f:
-                data = json.load(f)
-                self.username = data.get('username', 'Mokhammad Bahauddin')
-                songs_data = data.get('songs', {})
-                for song_id, details in songs_data.items():
-                    song = Song(
-                        song_id=song_id,
-                        title=details.get('title'),
-                        artist=details.get('artist'),
-                        album=details.get('album'),
-                        genre=details.get('genre'),
-                        duration_seconds=details.get('duration_seconds'),
-                        file_path=details.get('file_path'),
-                        image_path=details.get('image_path')
-                    )
-                    self.song_library[song_id] = song
-
-                playlists_data = data.get('playlists', {})
-                fav_ids = playlists_data.get("My Favourites", [])
-                for song_id in fav_ids:
-                    song = self.song_library.get(song_id)
-                    if song:
-                        self.favourite_playlist.add_song(song)
-
-                for name, song_ids in playlists_data.items():
-                    if name == "My Favourites":
-                        continue
-                    dll = DoublyLinkedList(name)
-                    self.user_playlists[name] = dll
-                    for song_id in song_ids:
-                        song = self.song_library.get(song_id)
-                        if song:
-                            dll.add_song(song)
+            data, records = self.store.load()
+            self.username = data.get('username', 'Mokhammad Bahauddin')
+            songs_data = data.get('songs', {})
+            if data.get('catalog') is not None:
+                # Katalog biner: objek Song baru dibuat saat pertama kali diakses
+                self.song_library = LazySongLibrary(data['catalog'], Song)
+                self.store.library = self.song_library
+            for song_id, details in songs_data.items():
+                song = Song(
+                    song_id=song_id,
+                    title=details.get('title'),
+                    artist=details.get('artist'),
+                    album=details.get('album'),
+                    genre=details.get('genre'),
+                    duration_seconds=details.get('duration_seconds'),
+                    file_path=details.get('file_path'),
+                    image_path=details.get('image_path')
+                )
+                self.song_library[song_id] = song
+
+            playlists_data = data.get('playlists', {})
+            fav_ids = playlists_data.get("My Favourites", [])
+            self.favourite_playlist.extend(
+                [self.song_library[s_id] for s_id in fav_ids if s_id in self.song_library])
+
+            for name, song_ids in playlists_data.items():
+                if name == "My Favourites":
+                    continue
+                dll = DoublyLinkedList(name)
+                self.user_playlists[name] = dll
+                dll.extend([self.song_library[s_id] for s_id in song_ids if s_id in self.song_library])
+
+            self.play_queue.load(data.get('queue', {}))
+            self.recently_played.load(data.get('history', []))
+            shuffle = data.get('shuffle')
+            if shuffle:
+                self._apply_shuffle(shuffle.get('enabled', False), shuffle.get('mode', "order"))
+
+            # Putar ulang mutasi yang terjadi setelah snapshot terakhir
+            for record in records:
+                self._apply_record(record)
+            if records:
+                print(f"Journal: {len(records)} perubahan diputar ulang.")
 
             print("Data berhasil dimuat.")
         except Exception as e:
@@ -208,15 +486,24 @@ class MusicPlayer:
             self.song_library = {}
             self.user_playlists = {}
             self.favourite_playlist = DoublyLinkedList("My Favourites")
+            self.play_queue = PlayQueue()
+            self.recently_played = RecentlyPlayed(HISTORY_DEPTH)
             self.username = "Mokhammad Bahauddin"
 
-    def save_data(self):
-        try:
-            data_to_save = {
-                'username': self.username,
-                'songs': {},
-                'playlists': {}
-            }
+    def _snapshot_dict(self):
+        data_to_save = {
+            'username': self.username,
+            'songs': {},
+            'playlists': {}
+        }
+        if hasattr(self.song_library, 'export_details'):
+            # Jangan membuat Song untuk lagu katalog yang belum pernah diakses
+            for song_id, details in self.song_library.export_details():
+                details.pop('song_id', None)
+                data_to_save['songs'][song_id] = details
+            # Katalog hasil compaction dipasang ulang ke library setelah ditulis
+            data_to_save['catalog_mark'] = self.song_library.export_mark
+        else:
             for song_id, song_obj in self.song_library.items():
                 data_to_save['songs'][song_id] = {
                     'title': song_obj.title,
@@ -227,21 +514,180 @@ class MusicPlayer:
                     'file_path': song_obj.file_path,
                     'image_path': song_obj.image_path
                 }
-            data_to_save['playlists']["My Favourites"] = [song.song_id for song in self.favourite_playlist.view_songs()]
-            for name, dll_obj in self.user_playlists.items():
-                data_to_save['playlists'][name] = [song.song_id for song in dll_obj.view_songs()]
+        data_to_save['playlists']["My Favourites"] = [song.song_id for song in self.favourite_playlist.view_songs()]
+        for name, dll_obj in self.user_playlists.items():
+            data_to_save['playlists'][name] = [song.song_id for song in dll_obj.view_songs()]
+        data_to_save['queue'] = self.play_queue.to_dict()
+        data_to_save['history'] = self.recently_played.to_list()
+        data_to_save['shuffle'] = {'enabled': self.is_shuffle, 'mode': self.shuffle_mode}
+        return data_to_save
 
-            with open(DATA_FILE, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
-            print("Data berhasil disimpan.")
-        except Exception as e:
-            print(f"Error menyimpan data: {e}")
+    def save_data(self):
+        """Menjadwalkan snapshot penuh (compaction); ditulis oleh thread writer."""
+        self.writer.submit_snapshot(self._snapshot_dict())
+
+    def _record(self, op, **fields):
+        """Mencatat satu mutasi ke journal, bukan menulis ulang seluruh file."""
+        fields['op'] = op
+        self.writer.submit(fields)
+        if self.writer.needs_compaction():
+            self.save_data()
+
+    def flush(self):
+        """Memastikan semua perubahan sudah tertulis ke disk."""
+        self.writer.flush()
+
+    def close(self):
+        """Menghentikan thread writer setelah menulis sisa perubahan."""
+        try:
+            self._end_listening_session()
+            self.stop_radio()
+            if self.crossfade is not None:
+                self.crossfade.cancel()
+            if self.audio_features is not None:
+                self.audio_features.stop()
+        finally:
+            # Writer dan store selalu ditutup, walaupun langkah di atas gagal
+            try:
+                self.listening_writer.submit({'op': 'stats', 'stats': self.listening_stats.to_dict()})
+                self.listening_writer.close()
+            finally:
+                try:
+                    self.writer.close()
+                finally:
+                    self.store.close()
+
+    # --- LOG MENDENGARKAN ---
+    def load_listening_stats(self):
+        try:
+            stats, events = self.listening_log.load()
+        except OSError as e:
+            print(f"Error memuat statistik: {e}. Memulai dengan statistik kosong.")
+            return
+        self.listening_stats.load(stats)
+        for event in events:
+            self.listening_stats.apply(event)
+        self._events_since_stats = len(events)
+
+    def _log_listening(self, kind, song, listened=0.0):
+        event = {'type': kind, 'song_id': song.song_id, 'artist': song.artist, 'genre': song.genre,
+                 'ts': time.time(), 'listened': round(listened, 1)}
+        with self.library_lock:
+            self.listening_stats.apply(event)
+        self.listening_writer.submit(event)
+        self._events_since_stats += 1
+        if self._events_since_stats >= STATS_SNAPSHOT_EVERY:
+            # Salinan agregat; ditulis oleh thread writer bersama offset log saat itu
+            self.listening_writer.submit({'op': 'stats', 'stats': self.listening_stats.to_dict()})
+            self._events_since_stats = 0
+
+    def _end_listening_session(self, listened=None):
+        """Menutup sesi lagu yang sedang didengarkan sebagai 'complete' atau 'skip'."""
+        song = self.listening_song
+        if song is None:
+            return
+        self.listening_song = None
+        if listened is None:
+            listened = self.get_current_playback_time()
+        duration = song.duration_seconds or 0
+        kind = 'complete' if duration and listened >= duration * COMPLETE_RATIO else 'skip'
+        self._log_listening(kind, song, min(listened, duration) if duration else listened)
+
+    def get_related_song_ids(self, song_id, k=10):
+        """Lagu yang paling sering diputar bersebelahan dengan song_id (model co-listening)."""
+        return [s_id for s_id in self.listening_stats.related.top_related(song_id, k)
+                if s_id in self.song_library]
+
+    def get_top_songs(self, n=10):
+        """Lagu paling sering diputar dari heap top-k (tanpa membaca log)."""
+        return [self.song_library[song_id] for song_id in self.listening_stats.top_songs(n)
+                if song_id in self.song_library]
+
+    def _apply_record(self, record):
+        """Menerapkan satu record journal ke struktur data di memori (tanpa mencatat ulang)."""
+        op = record.get('op')
+        if op == 'set_username':
+            self.username = record['name']
+        elif op == 'set_shuffle':
+            self._apply_shuffle(record['enabled'], record['mode'])
+        elif op == 'add_song':
+            details = record['song']
+            if details['song_id'] not in self.song_library:
+                self.song_library[details['song_id']] = Song(**details)
+        elif op == 'update_song':
+            song = self.song_library.get(record['song_id'])
+            if song:
+                song.set_details(record['title'], record['artist'], record['album'],
+                                 record['genre'], record['image_path'])
+        elif op == 'delete_song':
+            song = self.song_library.get(record['song_id'])
+            if song:
+                self._remove_song_from_library(song)
+        elif op == 'delete_songs':
+            for song_id in record['song_ids']:
+                song = self.song_library.get(song_id)
+                if song:
+                    self._remove_song_from_library(song)
+        elif op == 'fav_add':
+            song = self.song_library.get(record['song_id'])
+            if song:
+                self.favourite_playlist.append(song)
+        elif op == 'fav_remove':
+            song = self.song_library.get(record['song_id'])
+            if song:
+                self.favourite_playlist.remove_song(song)
+        elif op == 'playlist_create':
+            if record['name'] not in self.user_playlists:
+                self.user_playlists[record['name']] = DoublyLinkedList(record['name'])
+        elif op == 'playlist_delete':
+            playlist = self.user_playlists.pop(record['name'], None)
+            if playlist:
+                playlist.clear()
+        elif op == 'playlist_add':
+            playlist = self.user_playlists.get(record['name'])
+            song = self.song_library.get(record['song_id'])
+            if playlist and song:
+                playlist.append(song)
+        elif op == 'playlist_move':
+            playlist = self._get_playlist(record['name'])
+            if playlist and 0 <= record['from_index'] < playlist.length:
+                playlist.move(record['from_index'], record['to_index'])
+        elif op == 'playlist_remove':
+            playlist = self.user_playlists.get(record['name'])
+            song = self.song_library.get(record['song_id'])
+            if playlist and song:
+                playlist.remove_song(song)
+        elif op == 'queue_add':
+            if record['song_id'] in self.song_library:
+                if record.get('front'):
+                    self.play_queue.enqueue_next(record['song_id'], handle=record['handle'])
+                else:
+                    self.play_queue.enqueue(record['song_id'], handle=record['handle'])
+        elif op == 'queue_remove':
+            self.play_queue.remove(record['handle'])
+        elif op == 'queue_clear':
+            self.play_queue.clear()
+        elif op == 'history_touch':
+            if record['song_id'] in self.song_library:
+                self.recently_played.touch(record['song_id'], record['played_at'])
+        else:
+            print(f"Journal: operasi tidak dikenal '{op}' dilewati.")
+
+    # --- SINKRONISASI INDEX LIBRARY ---
+    def _iter_song_records(self):
+        if hasattr(self.song_library, 'iter_records'):
+            return self.song_library.iter_records()
+        return iter(list(self.song_library.values()))
+
+    def _notify_library(self, event, song):
+        for index in self.library_indexes:
+            getattr(index, event)(song)
 
     # --- FUNGSI YANG DIPERBARUI ---
     def set_username(self, new_name):
         if new_name:
             self.username = new_name
-            self.save_data()
+            self._record('set_username', name=new_name)
             return True
         return False
 
@@ -264,8 +710,14 @@ class MusicPlayer:
             return False
 
         new_song = Song(s_id, title, artist, album, genre, duration, file_path, image_path)
-        self.song_library[s_id] = new_song
-        self.save_data()
+        with self.library_lock:
+            self.song_library[s_id] = new_song
+            self._notify_library('song_added', new_song)
+        self._patch_shuffle('library', new_song, added=True)
+        self._record('add_song', song={
+            'song_id': s_id, 'title': title, 'artist': artist, 'album': album, 'genre': genre,
+            'duration_seconds': duration, 'file_path': file_path, 'image_path': image_path
+        })
         print(f"Sukses! Lagu '{title}' ditambahkan dengan ID: {s_id}")
         return True
     def get_song_by_id(self, song_id):
@@ -274,8 +726,11 @@ class MusicPlayer:
     def admin_update_song(self, song_id, title, artist, album, genre, image_path):
         song_to_update = self.get_song_by_id(song_id)
         if song_to_update:
-            song_to_update.update_details(title, artist, album, genre, image_path)
-            self.save_data()
+            with self.library_lock:
+                song_to_update.update_details(title, artist, album, genre, image_path)
+                self._notify_library('song_updated', song_to_update)
+            self._record('update_song', song_id=song_id, title=title, artist=artist, album=album,
+                         genre=genre, image_path=image_path)
             print(f"Lagu '{song_id}' berhasil diupdate.")
             return True
         print(f"Error: Lagu '{song_id}' tidak ditemukan untuk diupdate.")
@@ -287,26 +742,45 @@ class MusicPlayer:
             print(f"Error: Lagu '{song_id}' tidak ditemukan.")
             return False
 
-        nodes_to_remove = list(song_to_delete.playlist_nodes)
-
-        fav_nodes = [node for node in nodes_to_remove if node in self.favourite_playlist.view_songs()]
-        for node in fav_nodes:
-            self.favourite_playlist._remove_node(node)
+        self._remove_song_from_library(song_to_delete)
+        self._record('delete_song', song_id=song_id)
+        print(f"Sukses! Lagu '{song_to_delete.title}' telah dihapus sepenuhnya.")
+        return True
 
-        for playlist in self.user_playlists.values():
-            pl_nodes = [node for node in nodes_to_remove if node in playlist.view_songs()]
-            for node in pl_nodes:
-                playlist._remove_node(node)
+    def admin_delete_songs(self, song_ids):
+        """Menghapus banyak lagu sekaligus dengan satu record journal. Mengembalikan jumlah yang terhapus."""
+        deleted_ids = []
+        for song_id in song_ids:
+            song_to_delete = self.get_song_by_id(song_id)
+            if not song_to_delete:
+                print(f"Error: Lagu '{song_id}' tidak ditemukan.")
+                continue
+            self._remove_song_from_library(song_to_delete)
+            deleted_ids.append(song_id)
+        if deleted_ids:
+            self._record('delete_songs', song_ids=deleted_ids)
+            print(f"Sukses! {len(deleted_ids)} lagu telah dihapus sepenuhnya.")
+        return len(deleted_ids)
+
+    def _remove_song_from_library(self, song_to_delete):
+        """Cascade delete: hanya menyentuh node milik lagu ini lewat back-reference ke playlist."""
+        for node in list(song_to_delete.playlist_nodes):
+            if node.owner is not None:
+                node.owner._remove_node(node)
 
         if self.current_song == song_to_delete:
+            self._end_listening_session()
             self.stop_song()
             self.current_song = None
             self.current_context = None
 
-        self.song_library.pop(song_id, None)
-        self.save_data()
-        print(f"Sukses! Lagu '{song_to_delete.title}' telah dihapus sepenuhnya.")
-        return True
+        if self.shuffle_order is not None:
+            self.shuffle_order.remove(song_to_delete.song_id)
+        self.play_queue.remove_song(song_to_delete.song_id)
+        self.recently_played.remove(song_to_delete.song_id)
+        with self.library_lock:
+            self._notify_library('song_removed', song_to_delete)
+            self.song_library.pop(song_to_delete.song_id, None)
 
     def user_create_playlist(self, playlist_name):
         if not playlist_name:
@@ -315,44 +789,167 @@ class MusicPlayer:
             return False, f"Playlist '{playlist_name}' sudah ada."
         else:
             self.user_playlists[playlist_name] = DoublyLinkedList(playlist_name)
-            self.save_data()
+            self._record('playlist_create', name=playlist_name)
             return True, f"Playlist '{playlist_name}' dibuat."
 
     def add_song_to_playlist(self, song, playlist_name):
         playlist = self.user_playlists.get(playlist_name)
         if playlist:
             playlist.add_song(song)
-            self.save_data()
+            self._patch_shuffle(playlist, song, added=True)
+            self._record('playlist_add', name=playlist_name, song_id=song.song_id)
             return True
         return False
 
+    def _get_playlist(self, playlist_name):
+        if playlist_name == self.favourite_playlist.name:
+            return self.favourite_playlist
+        return self.user_playlists.get(playlist_name)
+
+    def move_song_in_playlist(self, playlist_name, from_index, to_index):
+        """Mengubah urutan lagu di playlist (termasuk My Favourites)."""
+        playlist = self._get_playlist(playlist_name)
+        if playlist is None or not 0 <= from_index < playlist.length:
+            return False
+        to_index = max(0, min(to_index, playlist.length - 1))
+        playlist.move(from_index, to_index)
+        self._record('playlist_move', name=playlist_name, from_index=from_index, to_index=to_index)
+        return True
+
     def remove_song_from_playlist(self, song, playlist_name):
         playlist = self.user_playlists.get(playlist_name)
         if playlist:
             playlist.remove_song_by_user(song)
-            self.save_data()
+            self._patch_shuffle(playlist, song, added=False)
+            self._record('playlist_remove', name=playlist_name, song_id=song.song_id)
             return True
         return False
 
     def toggle_favourite(self, song):
-        is_favourite = False
-        current = self.favourite_playlist.head
-        while current:
-            if current.song == song:
-                is_favourite = True
-                break
-            current = current.next
-        if is_favourite:
+        if self.favourite_playlist.contains(song):
             self.favourite_playlist.remove_song_by_user(song)
+            self._patch_shuffle(self.favourite_playlist, song, added=False)
+            self.weighted_shuffle.update(song.song_id)
+            self._record('fav_remove', song_id=song.song_id)
         else:
             self.favourite_playlist.add_song(song)
-        self.save_data()
+            self._patch_shuffle(self.favourite_playlist, song, added=True)
+            self.weighted_shuffle.update(song.song_id)
+            self._record('fav_add', song_id=song.song_id)
+
+    # --- ANTREAN "UP NEXT" ---
+    def enqueue_song(self, song):
+        """Menambahkan lagu di akhir antrean. Mengembalikan handle untuk remove_from_queue."""
+        handle = self.play_queue.enqueue(song.song_id)
+        self._record('queue_add', song_id=song.song_id, handle=handle, front=False)
+        self.invalidate_gapless()
+        return handle
+
+    def enqueue_song_next(self, song):
+        """'Putar berikutnya': lagu disisipkan di depan antrean."""
+        handle = self.play_queue.enqueue_next(song.song_id)
+        self._record('queue_add', song_id=song.song_id, handle=handle, front=True)
+        self.invalidate_gapless()
+        return handle
+
+    def remove_from_queue(self, handle):
+        if self.play_queue.remove(handle):
+            self._record('queue_remove', handle=handle)
+            self.invalidate_gapless()
+            return True
+        return False
+
+    def clear_queue(self):
+        self.play_queue.clear()
+        self._record('queue_clear')
+        self.invalidate_gapless()
+
+    def peek_queue(self, n=10):
+        """Hingga n lagu berikutnya di antrean sebagai list (handle, Song)."""
+        return [(handle, self.song_library[song_id]) for handle, song_id in self.play_queue.peek(n)
+                if song_id in self.song_library]
+
+    def _play_from_queue(self):
+        """Memutar entri terdepan antrean. False jika antrean kosong."""
+        while True:
+            entry = self.play_queue.pop()
+            if entry is None:
+                return False
+            handle, song_id = entry
+            self._record('queue_remove', handle=handle)
+            song = self.song_library.get(song_id)
+            if song:
+                # Konteks (playlist/library) tetap, agar Next berikutnya melanjutkan dari sana
+                context = self.current_context if isinstance(self.current_context, DoublyLinkedList) else None
+                self.play_song(song, context_playlist=context)
+                return True
+
+    # --- RADIO ---
+    def start_radio(self, song):
+        """Mengaktifkan "radio dari lagu ini": Next/Prev di library mengikuti stasiun yang diisi di latar."""
+        self.stop_radio()
+        # Bucket dibangun di thread GUI; thread radio hanya membacanya (di bawah library_lock)
+        self.similar_buckets.ensure_built()
+        self.radio = RadioStation(song.song_id, self._radio_candidates, self._radio_artist,
+                                  lambda song_id: song_id in self.song_library, seed=SHUFFLE_SEED)
+        self.invalidate_gapless()
+
+    def stop_radio(self):
+        if self.radio is not None:
+            self.radio.stop()
+            self.radio = None
+            self.invalidate_gapless()
+
+    def peek_radio(self, n=10):
+        if self.radio is None:
+            return []
+        return [self.song_library[s_id] for s_id in self.radio.peek(n) if s_id in self.song_library]
+
+    def _radio_artist(self, song_id):
+        with self.library_lock:
+            song = self.song_library.get(song_id)
+            keys = artist_keys(song.artist) if song else ()
+        return keys[0] if keys else ""
+
+    def _radio_candidates(self, song_id):
+        """
+        Skor kemiripan {song_id: skor} dari co-listening, fitur audio, lalu artis/genre yang sama.
+        Dipanggil dari thread radio, jadi seluruh pembacaan dijaga library_lock.
+        """
+        with self.library_lock:
+            return self._radio_scores(song_id)
+
+    def _radio_scores(self, song_id):
+        song = self.song_library.get(song_id)
+        if song is None:
+            return {}
+        scores = {}
+        for rank, s_id in enumerate(self.get_related_song_ids(song_id, RADIO_CANDIDATES)):
+            scores[s_id] = scores.get(s_id, 0.0) + 1.0 / (rank + 1)
+        if self.audio_features is not None:
+            for rank, s_id in enumerate(self.audio_features.nearest(song_id, RADIO_CANDIDATES)):
+                scores[s_id] = scores.get(s_id, 0.0) + 0.8 / (rank + 1)
+        for _ in range(RADIO_BUCKET_SAMPLES):
+            s_id = self.similar_buckets.pick_same_artist(song, random)
+            if s_id is not None:
+                scores[s_id] = scores.get(s_id, 0.0) + 0.3
+            s_id = self.similar_buckets.pick_same_genre(song, random)
+            if s_id is not None:
+                scores[s_id] = scores.get(s_id, 0.0) + 0.2
+        return scores
+
+    def _play_radio(self, forward=True):
+        """Mengambil lagu berikutnya/sebelumnya dari stasiun. False jika stasiun kehabisan kandidat."""
+        song_id = self.radio.next() if forward else self.radio.prev()
+        if song_id is None or song_id not in self.song_library:
+            return False
+        self.play_song(self.song_library[song_id], context_playlist=None)
+        return True
 
         # --- DIPERBARUI: Fungsi Pencarian ---
 
     def user_search_song(self, query):
         results = []
-        query_lower = query.lower()  # Untuk pencarian case-insensitive
         query_original = query  # Untuk pencocokan ID case-sensitive
 
         if not query:
@@ -364,35 +961,409 @@ class MusicPlayer:
             results.append(song_by_id)
             return results  # Jika ID cocok, kembalikan HANYA lagu itu
 
-        # 2. Pencarian Luas (case-insensitive)
-        for song in self.song_library.values():
-            if (query_lower in song.title.lower() or
-                    query_lower in song.artist.lower() or
-                    query_lower in song.album.lower() or
-                    query_lower in song.genre.lower()):  # <-- BARU: Ditambahkan pencarian genre
-                results.append(song)
-        return results
+        # 2. Pencarian Luas (case-insensitive) lewat index trigram: judul, artis, album, genre
+        return [self.song_library[s_id] for s_id in self.search_index.search(query)]
+
+    def suggest_song_ids(self, query, limit=10):
+        """song_id untuk type-ahead: setiap kata query adalah awalan kata di judul/artis/album."""
+        return self.prefix_trie.suggest(query, limit)
+
+    def search_ranked(self, query, limit=20, cursor=None):
+        """
+        Pencarian berperingkat: kecocokan substring ditambah kecocokan toleran salah ketik
+        ("beatls" -> "beatles"), diberi skor bobot field x kualitas x popularitas.
+        Mengembalikan (list Song, cursor halaman berikutnya atau None).
+        """
+        scores = {}
+        for song_id in self.search_index.search(query):
+            scores[song_id] = self.search_index.substring_score(song_id, query)
+        for song_id, score in self.fuzzy_index.score(query).items():
+            if score > scores.get(song_id, 0.0):
+                scores[song_id] = score
+        for song_id in scores:
+            scores[song_id] *= 1 + SEARCH_POPULARITY_WEIGHT * math.log1p(self.listening_stats.play_count(song_id))
+        song_ids, next_cursor = top_k_page(scores, self.search_index.order, limit, cursor)
+        return [self.song_library[s_id] for s_id in song_ids], next_cursor
+
+    def query_songs(self, text):
+        """
+        Query terstruktur, mis. 'genre:rock artist:"the beatles" dur:<240 fav:yes'.
+        Term berbeda field digabung AND, term genre/artis/album yang sama digabung OR,
+        kata tanpa field dicari sebagai substring. Mengembalikan (list Song, facet)
+        dengan facet = {'genre'|'artist'|'album': {nilai: jumlah}} untuk hasil tersebut.
+        Melempar ValueError jika query tidak valid.
+        """
+        index = self.bitmap_index
+        index.ensure_built()
+        result = index.alive
+        any_of = {}  # field -> OR dari term positif field itu
+        for negate, field, value in parse_query(text):
+            if field is None:
+                bits = index.ids_bits(self.search_index.search(value))
+            elif field == 'dur':
+                bits = index.duration_bits(*value)
+            elif field == 'fav':
+                bits = index.ids_bits(self.favourite_playlist.nodes_by_song_id)
+            else:
+                bits = index.value_bits(field, value)
+            if negate:
+                result &= ~bits
+            elif field in ('genre', 'artist', 'album'):
+                any_of[field] = any_of.get(field, 0) | bits
+            else:
+                result &= bits
+        for bits in any_of.values():
+            result &= bits
+        song_ids, facets = index.collect(result)
+        return [self.song_library[s_id] for s_id in song_ids], facets
+
+    def get_library_facets(self):
+        """Jumlah lagu per genre/artis/album di seluruh library (untuk tombol genre dashboard)."""
+        self.bitmap_index.ensure_built()
+        return self.bitmap_index.facets()
+
+    def view_library(self, sort_key='title', offset=0, limit=50, reverse=False):
+        """Satu halaman library terurut; sort_key salah satu dari SORT_KEYS."""
+        song_ids = self.sorted_views.view(sort_key, offset, limit, reverse)
+        return [self.song_library[s_id] for s_id in song_ids]
+
+    def admin_find_song(self, query):
+        """Lagu pertama untuk panel edit admin: ID persis, ID tanpa beda huruf, lalu pencarian luas."""
+        song = self.get_song_by_id(query)
+        if song:
+            return song
+        song_id = self.search_index.find_id(query)
+        if song_id:
+            return self.song_library[song_id]
+        matches = self.search_index.search(query)
+        return self.song_library[matches[0]] if matches else None
 
     def get_songs_by_genre(self, genre):
-        if genre.lower() == "all":
+        """Lagu dengan genre (tanpa beda huruf besar/kecil); genre None = seluruh library."""
+        if genre is None:
             return list(self.song_library.values())
+        if self.song_table is not None:
+            # Filter vektor NumPy di atas kolom genre terkode
+            return [self.song_library[s_id] for s_id in self.song_table.filter(genre=genre)]
+        if hasattr(self.store, 'ids_by_genre'):
+            self.writer.flush()
+            return [self.song_library[s_id] for s_id in self.store.ids_by_genre(genre)
+                    if s_id in self.song_library]
         results = []
         for song in self.song_library.values():
-            if song.genre.lower() == genre.lower():
+            if song.genre and song.genre.lower() == genre.lower():
                 results.append(song)
         return results
 
-    def get_recently_played(self):
-        unique_songs = []
-        for song in reversed(self.recently_played_history):
-            if song not in unique_songs:
-                unique_songs.append(song)
-        return unique_songs
+    def get_recently_played(self, offset=0, limit=None):
+        """Lagu unik yang terakhir diputar (terbaru dulu), hanya untuk baris yang diminta."""
+        return [self.song_library[song_id] for song_id in self.recently_played.page(offset, limit)
+                if song_id in self.song_library]
 
     def toggle_shuffle(self):
-        self.is_shuffle = not self.is_shuffle
+        self._apply_shuffle(not self.is_shuffle, self.shuffle_mode)
+        self._record('set_shuffle', enabled=self.is_shuffle, mode=self.shuffle_mode)
         return self.is_shuffle
 
+    def cycle_shuffle_mode(self):
+        """Tombol shuffle: mati -> acak tanpa pengulangan -> acak berbobot -> mati."""
+        if not self.is_shuffle:
+            self._apply_shuffle(True, "order")
+        elif self.shuffle_mode == "order":
+            self._apply_shuffle(True, "weighted")
+        else:
+            self._apply_shuffle(False, "order")
+        self._record('set_shuffle', enabled=self.is_shuffle, mode=self.shuffle_mode)
+        return self.shuffle_state()
+
+    def shuffle_state(self):
+        """'off', 'order' atau 'weighted'."""
+        return self.shuffle_mode if self.is_shuffle else "off"
+
+    def _apply_shuffle(self, enabled, mode):
+        """Mengubah state shuffle tanpa mencatat ke journal (dipakai juga saat data dimuat)."""
+        self.is_shuffle = enabled
+        self.shuffle_mode = mode if mode in ("order", "weighted") else "order"
+        # Permutasi baru dibuat (mulai dari lagu saat ini) saat Next/Prev berikutnya
+        self.shuffle_order = None
+        self.shuffle_context = None
+        if not (self.is_shuffle and self.shuffle_mode == "weighted"):
+            self.weighted_shuffle.release()  # Tabel alias tidak dirawat selama mode berbobot mati
+        self.invalidate_gapless()
+
+    # --- SHUFFLE TANPA PENGULANGAN ---
+    def _get_shuffle_order(self):
+        """Permutasi untuk konteks saat ini; dibangun ulang hanya jika konteks berganti."""
+        context = self.current_context if isinstance(self.current_context, DoublyLinkedList) else 'library'
+        if self.shuffle_order is None or self.shuffle_context != context:
+            if context == 'library':
+                song_ids = self.song_library.keys()
+            else:
+                song_ids = [song.song_id for song in context.view_songs()]
+            first_id = self.current_song.song_id if self.current_song else None
+            self.shuffle_order = ShuffleOrder(song_ids, seed=SHUFFLE_SEED, first_id=first_id)
+            self.shuffle_context = context
+        return self.shuffle_order
+
+    def _patch_shuffle(self, context, song, added):
+        """Menambal permutasi aktif saat isi konteksnya berubah (tanpa mengacak ulang)."""
+        if self.shuffle_order is None or self.shuffle_context != context:
+            return
+        if added:
+            self.shuffle_order.add(song.song_id)
+        elif context == 'library' or not context.contains(song):
+            self.shuffle_order.remove(song.song_id)
+
+    def set_shuffle_mode(self, mode):
+        if mode not in ("order", "weighted"):
+            return False
+        self._apply_shuffle(self.is_shuffle, mode)
+        self._record('set_shuffle', enabled=self.is_shuffle, mode=self.shuffle_mode)
+        return True
+
+    def _shuffle_weight(self, song_id):
+        """Bobot dasar weighted shuffle: favorit dikali FAVOURITE_WEIGHT, turun seiring jumlah putar."""
+        weight = FAVOURITE_WEIGHT if song_id in self.favourite_playlist.nodes_by_song_id else 1.0
+        return weight / math.sqrt(1 + self.listening_stats.play_count(song_id))
+
+    def _recency_factor(self, song_id, now):
+        last = self.recently_played.last_played(song_id)
+        if last is None:
+            return 1.0
+        return max(RECENCY_FLOOR, min(1.0, (now - last) / RECENCY_WINDOW_SECONDS))
+
+    def _play_weighted(self, forward=True):
+        if not forward:
+            # Tidak ada permutasi; mundur lewat tumpukan lagu yang sudah dilewati
+            while self.weighted_back_stack:
+                song = self.song_library.get(self.weighted_back_stack.pop())
+                if song:
+                    self.play_song(song, context_playlist=None)
+                    return
+            self.play_song(self.current_song, context_playlist=None)
+            return
+        planned = self._take_gapless_plan()
+        song_id = planned.song_id if planned else self.weighted_shuffle.pick(time.time(),
+                                                                            exclude=self.current_song.song_id)
+        if song_id is None:
+            self.is_playing = False
+            return
+        self.weighted_back_stack.append(self.current_song.song_id)
+        self.play_song(self.song_library[song_id], context_playlist=None)
+
+    def _play_shuffled(self, forward=True):
+        order = self._get_shuffle_order()
+        context = self.shuffle_context if isinstance(self.shuffle_context, DoublyLinkedList) else None
+        song_id = order.next() if forward else order.prev()
+        if song_id is None and forward:
+            # Permutasi habis: acak ulang hanya jika repeat 'all'
+            if self.repeat_mode != "all" or not len(order):
+                self.is_playing = False
+                return
+            order.reshuffle(avoid_id=self.current_song.song_id)
+            song_id = order.next()
+        if song_id is None:
+            # Sudah di awal riwayat shuffle: ulang lagu saat ini
+            self.play_song(self.current_song, context_playlist=context)
+            return
+        self.play_song(self.song_library[song_id], context_playlist=context)
+
+    # --- GAPLESS ---
+    def set_gapless(self, enabled):
+        self.gapless = enabled
+        if not enabled and (self._gapless_next is not None or self._gapless_in_mixer is not None):
+            with self._gapless_lock:
+                self._reset_gapless()
+                if self.current_song and self.is_playing:
+                    # Antrean mixer tidak bisa dibatalkan sendiri: muat ulang lagu di posisi yang sama
+                    position = self.get_current_playback_time()
+                    pygame.mixer.music.load(self.current_song.file_path)
+                    pygame.mixer.music.play(start=position)
+                    self.current_seek_time, self.start_time = position, time.time()
+
+    # --- CROSSFADE ---
+    def set_crossfade(self, seconds):
+        """Lama crossfade dalam detik (0 = mati, dibatasi 0..CROSSFADE_MAX_SECONDS)."""
+        self.crossfade_seconds = max(0.0, min(float(seconds), CROSSFADE_MAX_SECONDS)) if self.crossfade else 0.0
+        if self.crossfade is not None:
+            self.crossfade.invalidate()
+        self.invalidate_gapless()
+        return self.crossfade_seconds
+
+    def set_volume(self, volume):
+        """Volume pengguna; saat crossfade berjalan, gain fade tetap dikalikan di atasnya."""
+        if self.crossfade is not None:
+            self.crossfade.set_volume(volume)
+        else:
+            pygame.mixer.music.set_volume(volume)
+
+    def _crossfade_enabled(self):
+        return self.crossfade is not None and self.crossfade_seconds > 0
+
+    def crossfade_lead(self):
+        """Detik sebelum akhir lagu saat UI harus pindah ke lagu berikutnya (0 jika tanpa crossfade)."""
+        if self._crossfade_enabled() and self.current_song and self.crossfade.has_tail(self.current_song.song_id):
+            return self.crossfade_seconds
+        return 0.0
+
+    def _crossfade_position(self):
+        """Posisi lagu saat ini jika pergantian ini harus di-crossfade, selain itu None."""
+        if not self._crossfade_enabled() or not self.is_playing or self.current_song is None:
+            return None
+        if not self.crossfade.has_tail(self.current_song.song_id):
+            return None
+        position = self.get_current_playback_time()
+        remaining = (self.current_song.duration_seconds or 0) - position
+        if remaining > self.crossfade_seconds + GAPLESS_END_TOLERANCE:
+            return None  # Next ditekan jauh sebelum akhir lagu: potong seperti biasa
+        return position
+
+    def invalidate_gapless(self):
+        """Lagu berikutnya mungkin berubah (shuffle/repeat/antrean/radio): siapkan ulang pada tick berikutnya."""
+        with self._gapless_lock:
+            # Persiapan yang masih membaca file di thread latar tidak boleh lagi mengantrekan lagunya
+            self._gapless_generation += 1
+            self._gapless_prepared = None
+            self._gapless_planned = False
+            if self._gapless_in_mixer is None:
+                self._gapless_next = None
+
+    def _reset_gapless(self):
+        """Dipanggil dengan _gapless_lock saat musik di-load/seek: antrean mixer lama tidak berlaku lagi."""
+        self._gapless_generation += 1
+        self._gapless_prepared = None
+        self._gapless_next = None
+        self._gapless_planned = False
+        self._gapless_in_mixer = None
+        self._gapless_last_pos = 0
+        self._gapless_ended_at = None
+
+    def maybe_prepare_gapless(self):
+        """
+        Dipanggil berkala dari loop UI. Saat lagu tinggal GAPLESS_PREPARE_SECONDS, lagu
+        berikutnya ditentukan lalu file-nya dibaca dan diantrekan ke mixer di thread latar,
+        sehingga mixer menyambungnya tepat di sampel terakhir lagu saat ini.
+        Jika crossfade aktif, yang disiapkan adalah PCM ekor lagu ini dan kepala lagu berikutnya.
+        """
+        fading = self._crossfade_enabled()
+        if not (self.gapless or fading) or not self.is_playing or self.current_song is None:
+            return
+        if self._gapless_prepared == self._gapless_generation:
+            return
+        duration = self.current_song.duration_seconds or 0
+        lead = GAPLESS_PREPARE_SECONDS + (self.crossfade_seconds if fading else 0.0)
+        if duration - self.get_current_playback_time() > lead:
+            return
+        self._gapless_prepared = self._gapless_generation
+        song, planned = self._peek_next_song()
+        if song is None or not song.file_path or song.file_path == "dummy/path.mp3":
+            if fading:
+                self.crossfade.invalidate()
+            return
+        if fading:
+            self._gapless_next, self._gapless_planned = song, planned
+            self.crossfade.prepare(self.current_song, song, self.crossfade_seconds)
+            return
+        if self._gapless_in_mixer is not None and self._gapless_in_mixer.song_id == song.song_id:
+            self._gapless_next, self._gapless_planned = song, planned
+            return  # Sudah diantrekan
+        self._gapless_next, self._gapless_planned = song, planned
+        threading.Thread(target=self._gapless_queue, args=(self._gapless_generation, song), daemon=True).start()
+
+    def _gapless_queue(self, generation, song):
+        try:
+            with open(song.file_path, 'rb') as f:
+                while f.read(GAPLESS_WARM_CHUNK):  # Membawa file ke cache OS sebelum decoder membukanya
+                    pass
+            with self._gapless_lock:
+                if generation != self._gapless_generation or self._gapless_next is not song:
+                    return  # Lagu/posisi sudah berganti selama file dibaca
+                pygame.mixer.music.queue(song.file_path)
+                self._gapless_in_mixer = song
+                self._gapless_last_pos = max(self._gapless_last_pos, pygame.mixer.music.get_pos())
+        except Exception as e:
+            print(f"Gapless: gagal menyiapkan {song.file_path}: {e}")
+            with self._gapless_lock:
+                if self._gapless_next is song:
+                    self._gapless_next = None
+
+    def _peek_next_song(self):
+        """
+        (Song, planned) yang akan diputar play_next_song, tanpa mengubah state.
+        Mode acak (lagu mirip, weighted shuffle) diundi sekarang dan undiannya dipakai
+        play_next_song nanti (planned=True). (None, False) jika tidak bisa ditebak.
+        """
+        if self.repeat_mode == "one":
+            return self.current_song, False
+        for _, song in self.peek_queue(1):
+            return song, False
+        if isinstance(self.current_context, DoublyLinkedList):
+            playlist = self.current_context
+            if self.is_shuffle:
+                return self._peek_shuffled(), False
+            node = playlist.current_song_node
+            if node is not None:
+                node = node.next or playlist.head
+            elif self.repeat_mode == "all":
+                node = playlist.head
+            return (node.song if node else None), False
+        if self.radio is not None:
+            song_ids = self.radio.peek(1)
+            return (self.song_library.get(song_ids[0]) if song_ids else None), False
+        if self.is_shuffle and self.shuffle_mode == "weighted":
+            song_id = self.weighted_shuffle.pick(time.time(), exclude=self.current_song.song_id)
+            return (self.song_library.get(song_id) if song_id else None), True
+        if self.is_shuffle:
+            return self._peek_shuffled(), False
+        return self._find_similar_song(), True
+
+    def _peek_shuffled(self):
+        song_id = self._get_shuffle_order().peek_next()
+        # None saat permutasi habis: repeat 'all' mengacak ulang, jadi tidak bisa ditebak
+        return self.song_library.get(song_id) if song_id else None
+
+    def _take_gapless_plan(self):
+        """Undian lagu berikutnya yang sudah dibuat (dan mungkin diantrekan) saat persiapan gapless."""
+        if not self._gapless_planned or self._gapless_next is None:
+            return None
+        self._gapless_planned = False
+        song = self._gapless_next
+        return song if song.song_id in self.song_library else None
+
+    def poll_gapless(self):
+        """
+        Dipanggil berkala dari loop UI. Perpindahan mixer ke lagu antrean diukur dari
+        get_pos(), yang kembali ke ~0 saat lagu antrean mulai, bukan dari durasi metadata.
+        None jika tidak ada lagu di antrean mixer, False jika lagu saat ini masih berbunyi,
+        True jika lagu ini sudah selesai (UI lalu memanggil play_next_song). Jika mixer
+        diam tanpa memulai lagu antrean, atau perpindahan tidak terukur sampai lewat
+        durasi + GAPLESS_END_TOLERANCE, lagu juga dianggap selesai dan lagu berikutnya
+        dimuat seperti biasa.
+        """
+        if self._gapless_in_mixer is None or not self.is_playing:
+            return None
+        with self._gapless_lock:
+            if self._gapless_in_mixer is None:
+                return None
+            if self._gapless_ended_at is not None:
+                return True
+            pos = pygame.mixer.music.get_pos()
+            if not pygame.mixer.music.get_busy() or pos < 0:
+                return True  # Antrean tidak dimulai mixer
+            if pos < self._gapless_last_pos:
+                self._gapless_ended_at = time.time() - pos / 1000.0
+                return True
+            self._gapless_last_pos = pos
+            duration = self.current_song.duration_seconds or 0
+            return self.get_current_playback_time() > duration + GAPLESS_END_TOLERANCE
+
+    def _gapless_adopt_time(self, song):
+        """Waktu (time.time) lagu sebelumnya habis jika mixer terukur sudah pindah ke song, selain itu None."""
+        queued = self._gapless_in_mixer
+        if queued is None or queued.song_id != song.song_id or self._gapless_ended_at is None:
+            return None  # Next ditekan sebelum antrean berjalan: lagu dimuat seperti biasa
+        return self._gapless_ended_at
+
     def cycle_repeat_mode(self):
         if self.repeat_mode == "none":
             self.repeat_mode = "all"
@@ -400,6 +1371,7 @@ class MusicPlayer:
             self.repeat_mode = "one"
         elif self.repeat_mode == "one":
             self.repeat_mode = "none"
+        self.invalidate_gapless()
         return self.repeat_mode
 
     def play_song(self, song, context_playlist=None):
@@ -407,24 +1379,55 @@ class MusicPlayer:
             print(f"Error: Tidak ada file audio valid untuk {song.title}")
             return
 
+        # Lagu ini sudah disambung mixer dari antrean gapless: cukup perbarui state
+        ended_at = self._gapless_adopt_time(song)
+        fade_from = self._crossfade_position() if ended_at is None else None
+        previous = self.current_song
+        if fade_from is not None:
+            # Ekor lagu lama tetap terdengar sampai habis di channel crossfade
+            self._end_listening_session(listened=previous.duration_seconds or fade_from)
+        else:
+            self._end_listening_session()
         self.current_seek_time = 0.0
         self.current_song = song
         self.is_playing = True
-        try:
-            pygame.mixer.music.load(song.file_path)
-            pygame.mixer.music.play()
-
-            # --- UPDATE INI ---
-            self.current_seek_time = 0.0
-            self.start_time = time.time()  # Catat waktu mulai
-            self.is_playing = True
-            print(f"▶️ Memutar: {song.title}")
-        except Exception as e:
-            print(f"Error memutar file {song.file_path}: {e}")
-            self.is_playing = False
-            return
+        if ended_at is not None:
+            self.start_time = ended_at  # Lagu mulai tepat saat lagu sebelumnya habis
+            self._reset_gapless()
+            print(f"▶️ Memutar (gapless): {song.title}")
+        else:
+            try:
+                with self._gapless_lock:
+                    self._reset_gapless()
+                    fading = self.crossfade is not None and fade_from is not None and \
+                        self.crossfade.start(previous.song_id, fade_from, song.song_id)
+                    if self.crossfade is not None and not fading:
+                        self.crossfade.cancel()  # Pergantian biasa: hentikan fade yang masih berjalan
+                    pygame.mixer.music.load(song.file_path)
+                    pygame.mixer.music.play()
+                    if self.crossfade is not None:
+                        self.crossfade.set_volume(self.crossfade.volume)  # Gain fade untuk lagu baru
+                    if fading:
+                        self.crossfade.run()  # Channel diisi setelah lagu baru (bisu) berjalan di mixer
+
+                # --- UPDATE INI ---
+                self.current_seek_time = 0.0
+                self.start_time = time.time()  # Catat waktu mulai
+                self.is_playing = True
+                print(f"▶️ Memutar: {song.title}")
+            except Exception as e:
+                print(f"Error memutar file {song.file_path}: {e}")
+                if self.crossfade is not None:
+                    self.crossfade.cancel()  # Kembalikan gain mixer.music yang dibisukan start()
+                self.is_playing = False
+                return
 
-        self.recently_played_history.append(song)
+        played_at = time.time()
+        self.recently_played.touch(song.song_id, played_at)
+        self._record('history_touch', song_id=song.song_id, played_at=played_at)
+        self._log_listening('start', song)
+        self.listening_song = song
+        self.weighted_shuffle.update(song.song_id)
 
         # --- BAGIAN PERBAIKAN BUG ---
         # Kita cek apakah context_playlist ada DAN bukan string 'library'
@@ -439,10 +1442,16 @@ class MusicPlayer:
         else:
             self.current_context = 'library'
 
+        if self.is_shuffle and self.shuffle_order is not None:
+            if self.shuffle_context == self.current_context:
+                self.shuffle_order.seek(song.song_id)
+
     def stop_song(self):
         if self.is_playing:
             # PAUSE
             pygame.mixer.music.pause()
+            if self.crossfade is not None:
+                self.crossfade.pause()
             self.is_playing = False
             # Hitung sudah berapa lama lagu berjalan sebelum dipause
             # dan tambahkan ke seek_time
@@ -452,6 +1461,8 @@ class MusicPlayer:
             if self.current_song:
                 # UNPAUSE
                 pygame.mixer.music.unpause()
+                if self.crossfade is not None:
+                    self.crossfade.resume()
                 self.is_playing = True
                 # Reset start_time ke "sekarang"
                 self.start_time = time.time()
@@ -460,7 +1471,12 @@ class MusicPlayer:
     def seek_song(self, time_seconds):
         if not self.current_song: return
         try:
-            pygame.mixer.music.play(start=time_seconds)
+            with self._gapless_lock:
+                self._reset_gapless()  # Waktu habis berubah; disiapkan ulang oleh maybe_prepare_gapless
+                if self.crossfade is not None:
+                    self.crossfade.cancel()
+                    self.crossfade.invalidate()
+                pygame.mixer.music.play(start=time_seconds)
             # --- UPDATE INI ---
             self.current_seek_time = time_seconds  # Set posisi baru
             self.start_time = time.time()  # Reset waktu mulai
@@ -483,33 +1499,40 @@ class MusicPlayer:
 
     # --- DIPERBARUI: Implementasi Lagu Mirip ---
     def _find_similar_song(self):
-        """Mencari lagu yang mirip berdasarkan Artis, lalu Genre."""
+        """
+        Mencari lagu yang mirip: lagu yang sering diputar bersebelahan (co-listening),
+        tetangga terdekat fitur audio jika lagu sudah dianalisis, lalu Artis, lalu
+        Genre (posisi acak di bucket, tanpa memindai library).
+        """
         if not self.current_song:
             return None
 
-        current_artist = self.current_song.artist
-        current_genre = self.current_song.genre
-
-        artist_matches = []
-        genre_matches = []
-
-        for song in self.song_library.values():
-            if song == self.current_song:
-                continue  # Jangan pilih lagu yang sama
-
-            # Prioritas 1: Artis yang sama
-            if song.artist == current_artist:
-                artist_matches.append(song)
-            # Prioritas 2: Genre yang sama
-            elif song.genre == current_genre:
-                genre_matches.append(song)
-
-        if artist_matches:
-            print(f"Menemukan lagu mirip (artis sama): {len(artist_matches)} lagu")
-            return random.choice(artist_matches)
-        elif genre_matches:
-            print(f"Menemukan lagu mirip (genre sama): {len(genre_matches)} lagu")
-            return random.choice(genre_matches)
+        recent = self.recently_played.page(0, SIMILAR_AVOID_RECENT)
+        # Prioritas 0: Lagu yang biasa didengarkan bersama lagu ini
+        related = self.get_related_song_ids(self.current_song.song_id, RELATED_NEIGHBOURS + len(recent))
+        related = [s_id for s_id in related if s_id not in recent][:RELATED_NEIGHBOURS]
+        if related:
+            print(f"Menemukan lagu mirip (sering diputar bersama): {len(related)} kandidat")
+            return self.song_library[random.choice(related)]
+
+        # Prioritas 1: Suara yang mirip (cosine similarity fitur audio)
+        if self.audio_features is not None:
+            neighbours = self.audio_features.nearest(self.current_song.song_id, SIMILAR_NEIGHBOURS, exclude=recent)
+            neighbours = [s_id for s_id in neighbours if s_id in self.song_library]
+            if neighbours:
+                print(f"Menemukan lagu mirip (fitur audio): {len(neighbours)} kandidat")
+                return self.song_library[random.choice(neighbours)]
+
+        # Prioritas 2: Artis yang sama (termasuk kredit 'feat.')
+        song_id = self.similar_buckets.pick_same_artist(self.current_song, random)
+        if song_id is not None:
+            print("Menemukan lagu mirip (artis sama)")
+            return self.song_library[song_id]
+        # Prioritas 3: Genre yang sama
+        song_id = self.similar_buckets.pick_same_genre(self.current_song, random)
+        if song_id is not None:
+            print("Menemukan lagu mirip (genre sama)")
+            return self.song_library[song_id]
 
         # Fallback jika tidak ada yang cocok
         print("Tidak ada lagu mirip ditemukan.")
@@ -517,6 +1540,14 @@ class MusicPlayer:
 
     def play_next_song(self):
         if not self.current_song: return
+        self._play_next_song()
+        if self._gapless_in_mixer is not None and not self.is_playing:
+            # Tidak ada lagu berikutnya, tetapi mixer masih menyimpan antrean gapless: hentikan
+            with self._gapless_lock:
+                self._reset_gapless()
+                pygame.mixer.music.stop()
+
+    def _play_next_song(self):
 
         # 1. Mode Repeat One
         if self.repeat_mode == "one":
@@ -524,17 +1555,18 @@ class MusicPlayer:
             self.play_song(self.current_song, self.current_context)
             return
 
+        # 1b. Antrean "Up Next" diputar lebih dulu dari konteks
+        if self._play_from_queue():
+            return
+
         # 2. Jika di dalam Playlist (Doubly Linked List)
         if isinstance(self.current_context, DoublyLinkedList):
             playlist = self.current_context
             next_node = None
 
-            # 2a. Jika Shuffle aktif
+            # 2a. Jika Shuffle aktif (permutasi tanpa pengulangan)
             if self.is_shuffle:
-                all_songs = playlist.view_songs()
-                if not all_songs: self.is_playing = False; return
-                random_song = random.choice(all_songs)
-                self.play_song(random_song, context_playlist=playlist)
+                self._play_shuffled(forward=True)
                 return
 
             # 2b. Jika Shuffle non-aktif (mengikuti urutan DLL)
@@ -552,16 +1584,20 @@ class MusicPlayer:
 
         # 3. Jika di Library (bukan playlist)
         else:
+            # Mode radio: lagu berikutnya sudah disiapkan di antrean stasiun
+            if self.radio is not None and self._play_radio(forward=True):
+                return
+
             # 3a. Jika Shuffle aktif (prioritas)
+            if self.is_shuffle and self.shuffle_mode == "weighted":
+                self._play_weighted(forward=True)
+                return
             if self.is_shuffle:
-                all_songs_list = list(self.song_library.values())
-                if not all_songs_list: self.is_playing = False; return
-                random_song = random.choice(all_songs_list)
-                self.play_song(random_song, context_playlist=None)
+                self._play_shuffled(forward=True)
                 return
 
-            # 3b. Jika Shuffle non-aktif (cari lagu mirip)
-            similar_song = self._find_similar_song()  # <-- PANGGIL FUNGSI YANG DIPERBARUI
+            # 3b. Jika Shuffle non-aktif (cari lagu mirip; pakai undian gapless jika sudah ada)
+            similar_song = self._take_gapless_plan() or self._find_similar_song()
             if similar_song:
                 self.play_song(similar_song, context_playlist=None)
             else:
@@ -574,10 +1610,8 @@ class MusicPlayer:
         # 1. Logika jika berada di dalam Playlist (tetap sama)
         if isinstance(self.current_context, DoublyLinkedList):
             if self.is_shuffle:
-                all_songs = self.current_context.view_songs()
-                if not all_songs: self.is_playing = False; return
-                random_song = random.choice(all_songs)
-                self.play_song(random_song, context_playlist=self.current_context)
+                # Mundur di riwayat permutasi shuffle
+                self._play_shuffled(forward=False)
                 return
 
             # Urutan mundur sesuai linked list
@@ -588,12 +1622,15 @@ class MusicPlayer:
 
         # 2. Logika jika di Library (Sesuai PDF: Cari Lagu Mirip)
         else:
+            if self.radio is not None and self._play_radio(forward=False):
+                return
+
             # Jika Shuffle aktif
+            if self.is_shuffle and self.shuffle_mode == "weighted":
+                self._play_weighted(forward=False)
+                return
             if self.is_shuffle:
-                all_songs_list = list(self.song_library.values())
-                if not all_songs_list: self.is_playing = False; return
-                random_song = random.choice(all_songs_list)
-                self.play_song(random_song, context_playlist=None)
+                self._play_shuffled(forward=False)
                 return
 
             # Jika Normal: Cari lagu mirip (sama seperti Next)
@@ -674,7 +1711,11 @@ class MusicPlayer:
     def user_delete_playlist(self, playlist_name):
         """Deletes a playlist by name."""
         if playlist_name in self.user_playlists:
-            del self.user_playlists[playlist_name]
-            self.save_data()
+            playlist = self.user_playlists.pop(playlist_name)
+            if self.shuffle_context is playlist:
+                self.shuffle_order = None
+                self.shuffle_context = None
+            playlist.clear()
+            self._record('playlist_delete', name=playlist_name)
             return True, f"Playlist '{playlist_name}' deleted."
         return False, f"Playlist '{playlist_name}' not found."
\ No newline at end of file
@@ -0,0 +1,368 @@
+"""
+Blue Mood - Binary Catalog (music_data.cat)
+Format katalog biner berversi yang dibaca lewat mmap.
+
+Tata letak file:
+    [header 64 byte]
+    [tabel record lebar tetap]   -> satu record per lagu (offset+panjang string, durasi)
+    [index ID]                   -> nomor record yang diurutkan berdasarkan song_id
+    [string pool]                -> semua teks (UTF-8), opsional dikompres zlib
+    [meta JSON]                  -> username, playlist, journal_seq
+
+Objek Song tidak dibuat saat startup. LazySongLibrary baru membuat Song
+ketika lagu tersebut pertama kali diakses, sehingga waktu startup hampir
+konstan berapapun ukuran katalog.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from collections import namedtuple
+from collections.abc import MutableMapping
+
+CATALOG_FILE = "music_data.cat"
+
+MAGIC = b"BLUECAT\0"
+VERSION = 1
+FLAG_ZLIB_POOL = 0x1
+
+# magic, version, flags, jumlah lagu, offset tabel, offset index,
+# offset pool, ukuran pool, offset meta, ukuran meta
+HEADER = struct.Struct("<8sHHIQQQQQQ")
+# 7 string (offset, panjang) + durasi
+STRING_FIELDS = ('song_id', 'title', 'artist', 'album', 'genre', 'file_path', 'image_path')
+RECORD = struct.Struct("<" + "II" * len(STRING_FIELDS) + "i")
+INDEX_ENTRY = struct.Struct("<I")
+
+# Record ringan (tanpa membuat Song) untuk membangun index
+SongRecord = namedtuple('SongRecord', STRING_FIELDS + ('duration_seconds',))
+
+# Kunci snapshot yang punya tempat sendiri di katalog; sisanya disimpan di meta sebagai extra
+CATALOG_KEYS = ('username', 'songs', 'playlists', 'journal_seq')
+
+NONE_LEN = 0xFFFFFFFF  # Penanda string bernilai None
+NONE_DURATION = -1
+
+
+class BinaryCatalog:
+    """Pembaca katalog biner. Semua akses bersifat lazy langsung dari mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mm)
+
+        (magic, version, flags, self.count, self._table_off, self._index_off,
+         pool_off, pool_size, meta_off, meta_size) = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' bukan file katalog Blue Mood.")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Versi katalog {version} tidak didukung.")
+
+        if flags & FLAG_ZLIB_POOL:
+            # Pool terkompres harus dibuka sekali; tabel record tetap dibaca dari mmap
+            self._pool = zlib.decompress(self._buf[pool_off:pool_off + pool_size])
+            self._pool_off = 0
+        else:
+            self._pool = None  # Dibaca langsung dari mmap
+            self._pool_off = pool_off
+        self.meta = json.loads(bytes(self._buf[meta_off:meta_off + meta_size]).decode('utf-8'))
+
+    def _pool_bytes(self, offset, length):
+        pool = self._buf if self._pool is None else self._pool
+        start = self._pool_off + offset
+        return bytes(pool[start:start + length])
+
+    def _string(self, offset, length):
+        if length == NONE_LEN:
+            return None
+        return self._pool_bytes(offset, length).decode('utf-8')
+
+    def _song_id_bytes(self, index):
+        offset, length = struct.unpack_from("<II", self._buf, self._table_off + index * RECORD.size)
+        return self._pool_bytes(offset, length)
+
+    def song_id(self, index):
+        return self._song_id_bytes(index).decode('utf-8')
+
+    def record(self, index):
+        """Detail satu lagu (dict) berdasarkan nomor record."""
+        values = RECORD.unpack_from(self._buf, self._table_off + index * RECORD.size)
+        details = {}
+        for i, field in enumerate(STRING_FIELDS):
+            details[field] = self._string(values[2 * i], values[2 * i + 1])
+        duration = values[-1]
+        details['duration_seconds'] = None if duration == NONE_DURATION else duration
+        return details
+
+    def find(self, song_id):
+        """Binary search di index ID. Mengembalikan nomor record atau None."""
+        target = song_id.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            index = INDEX_ENTRY.unpack_from(self._buf, self._index_off + mid * INDEX_ENTRY.size)[0]
+            key = self._song_id_bytes(index)
+            if key == target:
+                return index
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def detach(self):
+        """
+        Menyalin isi file ke memori lalu menutup mmap. Hanya dibutuhkan di Windows,
+        yang tidak mengizinkan file yang sedang di-mmap ditimpa saat compaction.
+        """
+        if self._mm is None:
+            return
+        data = bytes(self._buf)
+        self.close()
+        self._buf = memoryview(data)
+
+    def close(self):
+        if self._mm is not None:
+            self._buf.release()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+
+
+def write_catalog(path, username, songs, playlists, journal_seq=0, compress=False, extra=None):
+    """
+    Menulis katalog biner secara atomik.
+    songs: iterable (song_id, details_dict) sesuai urutan library.
+    extra: state pemutar lain (mis. antrean) yang ikut disimpan di meta JSON.
+    """
+    pool = bytearray()
+    pool_index = {}  # String yang sama (artis, album, genre) hanya disimpan sekali
+
+    def intern(text):
+        if text is None:
+            return 0, NONE_LEN
+        if text not in pool_index:
+            data = str(text).encode('utf-8')
+            pool_index[text] = (len(pool), len(data))
+            pool.extend(data)
+        return pool_index[text]
+
+    table = bytearray()
+    ids = []
+    for song_id, details in songs:
+        values = []
+        for field in STRING_FIELDS:
+            values.extend(intern(song_id if field == 'song_id' else details.get(field)))
+        duration = details.get('duration_seconds')
+        values.append(NONE_DURATION if duration is None else int(duration))
+        table.extend(RECORD.pack(*values))
+        ids.append(song_id.encode('utf-8'))
+
+    order = sorted(range(len(ids)), key=ids.__getitem__)
+    index = b"".join(INDEX_ENTRY.pack(i) for i in order)
+
+    pool_bytes = zlib.compress(bytes(pool)) if compress else bytes(pool)
+    meta = dict(extra or {})
+    meta.update({'username': username, 'playlists': playlists, 'journal_seq': journal_seq})
+    meta = json.dumps(meta).encode('utf-8')
+
+    table_off = HEADER.size
+    index_off = table_off + len(table)
+    pool_off = index_off + len(index)
+    meta_off = pool_off + len(pool_bytes)
+    header = HEADER.pack(MAGIC, VERSION, FLAG_ZLIB_POOL if compress else 0, len(ids),
+                         table_off, index_off, pool_off, len(pool_bytes), meta_off, len(meta))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(table)
+        f.write(index)
+        f.write(pool_bytes)
+        f.write(meta)
+    os.replace(tmp_path, path)
+
+
+class LazySongLibrary(MutableMapping):
+    """
+    Pengganti dict song_library di atas BinaryCatalog.
+    Song dibuat (materialize) saat pertama diakses lalu disimpan di cache.
+
+    Setelah compaction, katalog baru dipasang lewat adopt() dari thread writer;
+    _lock menjaga katalog, _removed dan _extra tetap konsisten satu sama lain.
+    """
+
+    def __init__(self, catalog, song_factory):
+        self.catalog = catalog
+        self.song_factory = song_factory
+        self._songs = {}  # Song yang sudah dibuat (dari katalog maupun lagu baru)
+        self._removed = set()  # ID katalog yang sudah dihapus
+        self._extra = {}  # ID lagu baru yang tidak ada di katalog (urutan sisip)
+        self._lock = threading.RLock()
+        # ID yang ditambah/dihapus sejak export tertua yang katalognya belum dipasang
+        self._touched = []
+        self._touched_base = 0  # Posisi absolut _touched[0]
+        self.export_mark = 0  # Posisi _touched saat export_details() terakhir
+
+    def _in_catalog(self, song_id):
+        return self.catalog.find(song_id) is not None
+
+    def __getitem__(self, song_id):
+        song = self._songs.get(song_id)
+        if song is not None:
+            return song
+        with self._lock:
+            if song_id in self._removed:
+                raise KeyError(song_id)
+            index = self.catalog.find(song_id)
+            if index is None:
+                raise KeyError(song_id)
+            song = self.song_factory(**self.catalog.record(index))
+            self._songs[song_id] = song
+        return song
+
+    def __contains__(self, song_id):
+        if song_id in self._songs:
+            return True
+        with self._lock:
+            return song_id not in self._removed and self._in_catalog(song_id)
+
+    def __setitem__(self, song_id, song):
+        with self._lock:
+            if song_id in self._removed or (song_id not in self._extra and self._in_catalog(song_id)):
+                self._removed.discard(song_id)
+            else:
+                self._extra[song_id] = None
+            self._songs[song_id] = song
+            self._touched.append(song_id)
+
+    def __delitem__(self, song_id):
+        with self._lock:
+            if song_id not in self:
+                raise KeyError(song_id)
+            self._songs.pop(song_id, None)
+            if song_id in self._extra:
+                del self._extra[song_id]
+            else:
+                self._removed.add(song_id)
+            self._touched.append(song_id)
+
+    def __iter__(self):
+        with self._lock:
+            catalog, removed, extra = self.catalog, self._removed, list(self._extra)
+        for i in range(catalog.count):
+            song_id = catalog.song_id(i)
+            if song_id not in removed:
+                yield song_id
+        yield from extra
+
+    def __len__(self):
+        with self._lock:
+            return self.catalog.count - len(self._removed) + len(self._extra)
+
+    def export_details(self):
+        """(song_id, details) untuk snapshot tanpa membuat Song bagi lagu yang belum diakses."""
+        with self._lock:
+            self.export_mark = self._touched_base + len(self._touched)
+        for song_id, details in self._iter_details():
+            yield song_id, details
+
+    def adopt(self, catalog, mark):
+        """
+        Memasang katalog hasil compaction dari export dengan posisi mark.
+        Katalog baru berisi library saat export; hanya ID yang berubah sesudahnya
+        yang perlu dicatat ulang sebagai _removed/_extra terhadap katalog baru.
+        """
+        with self._lock:
+            if mark < self._touched_base:
+                return False  # Export lama; katalog yang lebih baru sudah terpasang
+            removed, extra = set(), {}
+            for song_id in dict.fromkeys(self._touched[mark - self._touched_base:]):
+                in_new = catalog.find(song_id) is not None
+                present = song_id in self
+                if present and not in_new:
+                    extra[song_id] = None
+                elif in_new and not present:
+                    removed.add(song_id)
+            self.catalog, self._removed, self._extra = catalog, removed, extra
+            del self._touched[:mark - self._touched_base]
+            self._touched_base = mark
+        # Katalog lama tidak ditutup di sini: iterator yang sedang berjalan masih
+        # memegangnya, dan mmap-nya dilepas sendiri saat tidak lagi direferensikan
+        return True
+
+    def _iter_details(self):
+        with self._lock:
+            catalog, removed, extra = self.catalog, self._removed, list(self._extra)
+        for i in range(catalog.count):
+            song_id = catalog.song_id(i)
+            if song_id in removed:
+                continue
+            song = self._songs.get(song_id)
+            yield song_id, (_song_details(song) if song else catalog.record(i))
+        for song_id in extra:
+            song = self._songs.get(song_id)
+            if song is not None:
+                yield song_id, _song_details(song)
+
+    def iter_records(self):
+        """Song yang sudah dibuat, atau SongRecord ringan untuk lagu yang belum diakses."""
+        for song_id, details in self._iter_details():
+            song = self._songs.get(song_id)
+            yield song if song is not None else SongRecord(**details)
+
+
+def _song_details(song):
+    return {field: getattr(song, field) for field in STRING_FIELDS + ('duration_seconds',)}
+
+
+# --- KONVERTER music_data.json <-> music_data.cat ---
+def snapshot_extra(snapshot):
+    """State pemutar di luar lagu/playlist (antrean, riwayat, ...) untuk meta katalog."""
+    return {key: value for key, value in snapshot.items() if key not in CATALOG_KEYS}
+
+
+def json_to_catalog(json_path, catalog_path, compress=False):
+    with open(json_path, 'r') as f:
+        data = json.load(f)
+    write_catalog(catalog_path, data.get('username', 'Mokhammad Bahauddin'),
+                  data.get('songs', {}).items(), data.get('playlists', {}),
+                  data.get('journal_seq', 0), compress=compress, extra=snapshot_extra(data))
+
+
+def catalog_to_json(catalog_path, json_path):
+    catalog = BinaryCatalog(catalog_path)
+    try:
+        songs = {}
+        for i in range(catalog.count):
+            details = catalog.record(i)
+            songs[details.pop('song_id')] = details
+        data = {'username': catalog.meta.get('username'), 'songs': songs,
+                'playlists': catalog.meta.get('playlists', {}),
+                'journal_seq': catalog.meta.get('journal_seq', 0)}
+        data.update(snapshot_extra(catalog.meta))
+    finally:
+        catalog.close()
+    with open(json_path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+
+if __name__ == "__main__":
+    # python binary_catalog.py to-cat music_data.json music_data.cat [--zlib]
+    # python binary_catalog.py to-json music_data.cat music_data.json
+    if len(sys.argv) < 4 or sys.argv[1] not in ("to-cat", "to-json"):
+        print("Pemakaian: binary_catalog.py to-cat|to-json <sumber> <tujuan> [--zlib]")
+        sys.exit(1)
+    if sys.argv[1] == "to-cat":
+        json_to_catalog(sys.argv[2], sys.argv[3], compress="--zlib" in sys.argv)
+    else:
+        catalog_to_json(sys.argv[2], sys.argv[3])
+    print("Konversi selesai.")
@@ -0,0 +1,293 @@
+"""
+Blue Mood - Crossfade
+Menumpuk ekor lagu yang sedang diputar dengan kepala lagu berikutnya.
+
+Menjelang akhir lagu, thread latar men-decode ekor lagu saat ini dan kepala
+lagu berikutnya ke PCM (format mixer). Saat crossfade dimulai:
+- Channel A memutar ekor lagu lama dengan kurva gain cos (fade-out),
+- Channel B memutar kepala lagu baru dengan kurva gain sin (fade-in),
+- mixer.music sudah memutar lagu baru dari detik 0 tetapi dibisukan.
+Kurva equal-power (cos^2 + sin^2 = 1) menjaga kerasnya suara tetap rata.
+Channel B baru diisi setelah mixer.music berjalan, dan kepala lagu baru dipotong
+sepanjang get_pos() mixer saat itu, sehingga kedua salinan lagu baru sejajar.
+Setelah fade, suara lagu baru dipindah dari Channel B ke mixer.music lewat
+beberapa langkah volume yang saling melengkapi (handoff), lalu channel berhenti.
+
+Karena lagu baru sudah berjalan di mixer.music sejak awal crossfade, waktu
+putar, visualizer (get_pos) dan sinkronisasi lirik langsung mengikuti lagu baru.
+Gain dikalikan per blok dengan NumPy (tanpa loop per sampel) tepat sebelum
+blok diantrekan ke channel.
+
+Ekor/kepala lagu di-decode hanya sepanjang jendela yang dibutuhkan lewat
+librosa (offset + duration). Tanpa librosa, file di-decode utuh lewat
+pygame.mixer.Sound lalu langsung dilepas setelah potongannya disalin.
+"""
+
+import math
+import threading
+import time
+
+import pygame
+
+try:
+    import numpy as np
+    CROSSFADE_AVAILABLE = True
+except ImportError:
+    CROSSFADE_AVAILABLE = False
+
+try:
+    import librosa
+    WINDOW_DECODE_AVAILABLE = True
+except ImportError:
+    WINDOW_DECODE_AVAILABLE = False
+
+CROSSFADE_MAX_SECONDS = 12.0
+CROSSFADE_BLOCK_SECONDS = 0.25  # Panjang satu blok PCM yang diantrekan ke channel
+CROSSFADE_HANDOFF_SECONDS = 0.2  # Durasi perpindahan Channel B -> mixer.music
+CROSSFADE_HANDOFF_STEPS = 8
+CROSSFADE_POLL_SECONDS = 0.005
+
+
+def equal_power_gains(n):
+    """Kurva gain (fade_out, fade_in) sepanjang n sampel: cos dan sin dari 0 sampai pi/2."""
+    t = np.linspace(0.0, math.pi / 2, n, dtype=np.float32)
+    return np.cos(t), np.sin(t)
+
+
+def decode_segment(file_path, start, seconds):
+    """PCM (frame, channel) lagu pada [start, start+seconds) detik, dalam format mixer."""
+    if WINDOW_DECODE_AVAILABLE:
+        return _decode_window(file_path, start, seconds)
+    freq = pygame.mixer.get_init()[0]
+    sound = pygame.mixer.Sound(file_path)
+    samples = pygame.sndarray.samples(sound)
+    if samples.ndim == 1:
+        samples = samples.reshape(-1, 1)
+    a = max(0, int(start * freq))
+    b = len(samples) if seconds is None else min(len(samples), a + int(seconds * freq))
+    segment = np.array(samples[a:b])
+    del samples, sound  # Lepas lagu utuh segera setelah potongannya disalin
+    return segment
+
+
+def _decode_window(file_path, start, seconds):
+    """Decode hanya jendela [start, start+seconds) lalu ubah ke format sampel mixer."""
+    freq, size, channels = pygame.mixer.get_init()
+    y, _ = librosa.load(file_path, sr=freq, mono=False, offset=max(0.0, start), duration=seconds)
+    pcm = np.atleast_2d(y).T  # (frame, channel) float32 di [-1, 1]
+    if pcm.shape[1] != channels:
+        pcm = np.repeat(pcm.mean(axis=1, keepdims=True), channels, axis=1)
+    if size == 32:
+        return np.ascontiguousarray(pcm, dtype=np.float32)
+    bits = abs(size)
+    scale = float((1 << (bits - 1)) - 1)
+    if size < 0:
+        return np.ascontiguousarray(np.clip(pcm, -1.0, 1.0) * scale, dtype=np.int16 if bits == 16 else np.int8)
+    return np.ascontiguousarray((np.clip(pcm, -1.0, 1.0) + 1.0) * scale, dtype=np.uint16 if bits == 16 else np.uint8)
+
+
+class CrossfadeEngine:
+    def __init__(self):
+        self.volume = 1.0  # Volume pengguna (slider), dikalikan ke channel dan mixer.music
+        self.active = False
+        self._tail = None  # (song_id, detik awal ekor, PCM)
+        self._head = None  # (song_id, PCM)
+        self._prepare_generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = None  # (PCM lama, PCM baru, freq) menunggu mixer.music mulai
+        self._music_gain = 1.0
+        self._channels = None
+
+    def _get_channels(self):
+        if self._channels is None:
+            pygame.mixer.set_reserved(2)  # Channel 0 dan 1 tidak dipakai Sound lain
+            self._channels = (pygame.mixer.Channel(0), pygame.mixer.Channel(1))
+        return self._channels
+
+    # --- PERSIAPAN (thread latar) ---
+    def prepare(self, out_song, in_song, seconds):
+        """Men-decode ekor out_song dan kepala in_song (in_song boleh None) di thread latar."""
+        with self._lock:
+            self._prepare_generation += 1
+            generation = self._prepare_generation
+            self._tail = self._head = None
+        threading.Thread(target=self._prepare, args=(generation, out_song, in_song, seconds), daemon=True).start()
+
+    def _prepare(self, generation, out_song, in_song, seconds):
+        try:
+            tail_start = max(0.0, (out_song.duration_seconds or 0) - seconds)
+            tail = (out_song.song_id, tail_start, decode_segment(out_song.file_path, tail_start, None))
+            head = None
+            if in_song is not None:
+                head = (in_song.song_id, decode_segment(in_song.file_path, 0.0, seconds + CROSSFADE_HANDOFF_SECONDS))
+        except Exception as e:
+            print(f"Crossfade: gagal men-decode: {e}")
+            return
+        with self._lock:
+            if generation == self._prepare_generation:
+                self._tail, self._head = tail, head
+
+    def invalidate(self):
+        with self._lock:
+            self._prepare_generation += 1
+            self._tail = self._head = None
+
+    def has_tail(self, song_id):
+        tail = self._tail
+        return tail is not None and tail[0] == song_id
+
+    # --- CROSSFADE ---
+    def start(self, out_song_id, position, in_song_id):
+        """
+        Menyiapkan fade dari detik position lagu lama. Dipanggil tepat sebelum mixer.music
+        memuat lagu baru; mixer.music dibisukan jika kepala lagu baru sudah di-decode.
+        Channel baru diisi oleh run() setelah mixer.music mulai memutar lagu baru.
+        False jika ekor lagu lama belum siap (pemanggil memotong lagu seperti biasa).
+        """
+        with self._lock:
+            tail, head = self._tail, self._head
+            self._tail = self._head = None
+        if tail is None or tail[0] != out_song_id:
+            return False
+        self.cancel()
+        freq = pygame.mixer.get_init()[0]
+        out_pcm = tail[2][max(0, int((position - tail[1]) * freq)):]
+        if len(out_pcm) == 0:
+            return False
+        in_pcm = head[1] if head is not None and head[0] == in_song_id else None
+        self._stop.clear()
+        self.active = True
+        self._pending = (out_pcm, in_pcm, freq)
+        self._set_music_gain(0.0 if in_pcm is not None else 1.0)
+        return True
+
+    def run(self):
+        """Mulai mengisi channel; dipanggil setelah mixer.music.play() untuk lagu baru."""
+        pending, self._pending = self._pending, None
+        if pending is None or self._stop.is_set():
+            return
+        self._thread = threading.Thread(target=self._run, args=pending, daemon=True)
+        self._thread.start()
+
+    def _steps(self, out_pcm, in_pcm, freq):
+        """Blok (PCM lama, PCM baru, gain mixer.music) dengan gain sudah dikalikan per blok."""
+        n = len(out_pcm)
+        fade_out, fade_in = equal_power_gains(n)
+        block = max(1, int(CROSSFADE_BLOCK_SECONDS * freq))
+        for i in range(0, n, block):
+            j = min(n, i + block)
+            a = self._apply_gain(out_pcm[i:j], fade_out[i:j])
+            b = None
+            if in_pcm is not None:
+                b = self._apply_gain(in_pcm[i:j], fade_in[i:j]) if i < len(in_pcm) else None
+            yield a, b, 0.0 if in_pcm is not None else 1.0
+        if in_pcm is None:
+            return
+        # Handoff: Channel B turun, mixer.music naik dengan langkah yang saling melengkapi
+        step = max(1, int(CROSSFADE_HANDOFF_SECONDS * freq / CROSSFADE_HANDOFF_STEPS))
+        for k in range(CROSSFADE_HANDOFF_STEPS):
+            i = n + k * step
+            if i >= len(in_pcm):
+                break
+            music_gain = (k + 1) / (CROSSFADE_HANDOFF_STEPS + 1)
+            gain = np.full(min(step, len(in_pcm) - i), 1.0 - music_gain, dtype=np.float32)
+            yield None, self._apply_gain(in_pcm[i:i + step], gain), music_gain
+
+    @staticmethod
+    def _apply_gain(pcm, gain):
+        if len(pcm) == 0:
+            return None
+        mixed = pcm.astype(np.float32) * gain[:len(pcm), None]
+        if np.issubdtype(pcm.dtype, np.integer):
+            info = np.iinfo(pcm.dtype)
+            np.clip(mixed, info.min, info.max, out=mixed)
+        mixed = mixed.astype(pcm.dtype)
+        if pygame.mixer.get_init()[2] == 1:
+            mixed = mixed[:, 0]
+        return pygame.sndarray.make_sound(np.ascontiguousarray(mixed))
+
+    def _run(self, out_pcm, in_pcm, freq):
+        ch_a, ch_b = self._get_channels()
+        ch_a.set_volume(self.volume)
+        ch_b.set_volume(self.volume)
+        if in_pcm is not None:
+            # Lagu baru sudah berjalan di mixer.music: mulai kepala dari posisi mixer saat ini
+            in_pcm = in_pcm[max(0, int(pygame.mixer.music.get_pos() * freq / 1000)):]
+            if len(in_pcm) == 0:
+                in_pcm = None
+        # Kanal penanda waktu: B selama ada kepala lagu baru, selain itu A
+        steps = self._steps(out_pcm, in_pcm, freq)
+        try:
+            current = next(steps)
+        except StopIteration:
+            self._finish()
+            return
+        self._play(ch_a, ch_b, current, queue=False)
+        self._set_music_gain(current[2])
+        for upcoming in steps:
+            self._play(ch_a, ch_b, upcoming, queue=True)
+            # Tunggu blok yang diantrekan mulai berbunyi, lalu terapkan gain mixer.music miliknya
+            clock = ch_b if upcoming[1] is not None else ch_a
+            while clock.get_queue() is not None and not self._stop.is_set():
+                if not clock.get_busy():
+                    break
+                time.sleep(CROSSFADE_POLL_SECONDS)
+            if self._stop.is_set():
+                return
+            self._set_music_gain(upcoming[2])
+        while (ch_a.get_busy() or ch_b.get_busy()) and not self._stop.is_set():
+            time.sleep(CROSSFADE_POLL_SECONDS)
+        if not self._stop.is_set():
+            self._finish()
+
+    @staticmethod
+    def _play(ch_a, ch_b, step, queue):
+        a, b, _ = step
+        for channel, sound in ((ch_a, a), (ch_b, b)):
+            if sound is None:
+                continue
+            if queue and channel.get_busy():
+                channel.queue(sound)
+            else:
+                channel.play(sound)
+
+    def _finish(self):
+        self._set_music_gain(1.0)
+        self.active = False
+
+    def _set_music_gain(self, gain):
+        self._music_gain = gain
+        pygame.mixer.music.set_volume(self.volume * gain)
+
+    # --- KONTROL ---
+    def set_volume(self, volume):
+        self.volume = volume
+        if self._channels is not None:
+            for channel in self._channels:
+                channel.set_volume(volume)
+        pygame.mixer.music.set_volume(volume * self._music_gain)
+
+    def pause(self):
+        if self.active and self._channels is not None:
+            for channel in self._channels:
+                channel.pause()
+
+    def resume(self):
+        if self.active and self._channels is not None:
+            for channel in self._channels:
+                channel.unpause()
+
+    def cancel(self):
+        """Menghentikan fade yang sedang berjalan (lagu dipilih manual, seek, keluar)."""
+        self._pending = None
+        if not self.active:
+            return
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=0.5)
+        if self._channels is not None:
+            for channel in self._channels:
+                channel.stop()
+        self._finish()
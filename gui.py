@@ -32,6 +32,8 @@ except ImportError as e:
     print(f"⚠️ Visualizer not available: {e}")
     VISUALIZER_AVAILABLE = False
 
+from search import SearchWorker
+
 try:
     from backend import MusicPlayer, Song, DoublyLinkedList
 except ImportError:
@@ -58,6 +60,23 @@ ctk.set_appearance_mode("dark")
 # --- PERBAIKAN: Kembali ke tema default untuk menghindari error ---
 ctk.set_default_color_theme("blue")
 
+# Jumlah baris riwayat yang ditampilkan di sidebar kanan
+HISTORY_SIDEBAR_ROWS = 10
+
+# Type-ahead: jeda setelah ketikan terakhir (ms) dan jumlah saran yang ditampilkan
+SEARCH_DEBOUNCE_MS = 250
+TYPEAHEAD_LIMIT = 8
+# Jumlah hasil pencarian lengkap per halaman
+SEARCH_PAGE_SIZE = 50
+# Jumlah lagu library per halaman dan pilihan urutan (label tombol, kunci urut)
+LIBRARY_PAGE_SIZE = 200
+LIBRARY_SORT_OPTIONS = (("Judul", "title"), ("Artis", "artist"), ("Album", "album"),
+                        ("Durasi", "duration"), ("Terbaru", "date_added"))
+# Jumlah lagu playlist per halaman
+PLAYLIST_PAGE_SIZE = 200
+# Pilihan lama crossfade di player bar (detik, 0 = mati)
+CROSSFADE_CHOICES = (0, 2, 4, 6, 8, 10, 12)
+
 
 # =============================================================================
 # JENDELA UTAMA (USER VIEW)
@@ -124,7 +143,7 @@ class App(ctk.CTk):
         self.add_to_playlist_window = None
         self.last_seek_time = 0.0
         self.is_slider_seeking = False
-        self.current_genre_filter = "All"
+        self.current_genre_filter = None  # None = semua genre
         self.genre_buttons = {}
         self.admin_file_path_var = ctk.StringVar(value="Belum ada file dipilih")
         self.admin_image_path_var = ctk.StringVar(value="Belum ada gambar dipilih")
@@ -239,6 +258,13 @@ class App(ctk.CTk):
                                          text_color=self.COLOR_PALETTE["text_primary"],
                                          placeholder_text_color="#FDECEE")
         self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        self.search_entry.bind("<KeyRelease>", self.on_search_typing)
+        self.search_entry.bind("<Return>", lambda event: self.on_search())
+        # Pencarian type-ahead berjalan di thread worker; hasil basi dibuang lewat nomor generasi
+        self.search_worker = SearchWorker(self.player.suggest_song_ids)
+        self._search_generation = 0
+        self._search_after_id = None
+        self.library_sort = ("title", False)  # (kunci urut, terbalik)
         self.search_btn = ctk.CTkButton(self.search_frame, text="search", width=60, command=self.on_search,
                                         fg_color=self.COLOR_PALETTE["card_bg"],
                                         hover_color=self.COLOR_PALETTE["card_hover"])
@@ -362,6 +388,19 @@ class App(ctk.CTk):
                                            hover_color=self.COLOR_PALETTE["card_hover"])
         self.repeat_button.grid(row=0, column=5, padx=5, pady=5)
 
+        # Pilihan lama crossfade antar lagu
+        self.crossfade_menu = ctk.CTkOptionMenu(self.button_frame, width=110,
+                                                values=[self._crossfade_label(s) for s in CROSSFADE_CHOICES],
+                                                command=self.on_crossfade_change,
+                                                fg_color=self.COLOR_PALETTE["card_bg"],
+                                                button_color=self.COLOR_PALETTE["card_bg"],
+                                                button_hover_color=self.COLOR_PALETTE["card_hover"],
+                                                text_color=self.COLOR_PALETTE["text_secondary"])
+        self.crossfade_menu.set(self._crossfade_label(self.player.crossfade_seconds))
+        if self.player.crossfade is None:
+            self.crossfade_menu.configure(state="disabled")  # NumPy tidak tersedia
+        self.crossfade_menu.grid(row=0, column=6, padx=5, pady=5, sticky="w")
+
         self.slider_frame = ctk.CTkFrame(self.controls_frame, fg_color="transparent")
         self.slider_frame.pack(fill="x", expand=True, padx=10)
         # --- PERBAIKAN: Hanya kolom 1 yang diberi 'weight' ---
@@ -404,6 +443,7 @@ class App(ctk.CTk):
         self.volume_percent_label.grid(row=0, column=5, padx=(0, 10))
 
         self.create_now_playing_view()
+        self.update_shuffle_button(self.player.shuffle_state())  # Mode shuffle tersimpan dari sesi lalu
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.update_progress()
         self.show_dashboard()
@@ -648,6 +688,10 @@ class App(ctk.CTk):
         if self.player.is_playing and self.player.current_song and not self.is_slider_seeking:
             total_duration = self.player.current_song.duration_seconds
             current_time = self.player.get_current_playback_time()
+            # Gapless: lagu berikutnya diantrekan ke mixer menjelang akhir lagu (disiapkan di thread latar).
+            # handoff True = lagu ini selesai (mixer pindah/diam/lewat durasi), False = lagu ini masih berbunyi.
+            self.player.maybe_prepare_gapless()
+            handoff = self.player.poll_gapless()
             # --- BARU: Logika Lirik ---
             # 1. Coba muat lirik jika belum ada (mungkin baru selesai download)
             if self.current_lyrics is None:
@@ -673,12 +717,15 @@ class App(ctk.CTk):
                     # Hanya update jika Now Playing sedang dibuka
                     if self.now_playing_frame.winfo_ismapped():
                         self.np_lyrics_label.configure(text=display_text)
-            if current_time < total_duration:
+            # Dengan crossfade, lagu berikutnya dimulai sekian detik sebelum lagu ini habis.
+            # Selama lagu antrean gapless belum mulai, durasi metadata tidak dipakai untuk pindah lagu.
+            if handoff is False or (not handoff and current_time < total_duration - self.player.crossfade_lead()):
+                current_time = min(current_time, total_duration or current_time)
                 current_time_str = self.format_time(current_time)
                 self.time_start_label.configure(text=current_time_str)
                 self.np_time_start_label.configure(text=current_time_str)
 
-                slider_pos = current_time / total_duration
+                slider_pos = current_time / total_duration if total_duration else 0.0
                 self.slider.set(slider_pos)
                 self.np_slider.set(slider_pos)
             else:
@@ -712,10 +759,18 @@ class App(ctk.CTk):
 
             self.player.seek_song(seek_time_sec)
 
+    @staticmethod
+    def _crossfade_label(seconds):
+        return f"Fade {int(seconds)}s" if seconds else "Fade off"
+
+    def on_crossfade_change(self, choice):
+        seconds = next(s for s in CROSSFADE_CHOICES if self._crossfade_label(s) == choice)
+        self.crossfade_menu.set(self._crossfade_label(self.player.set_crossfade(seconds)))
+
     # --- BARU: Fungsi Kontrol Volume ---
     def on_volume_change(self, value):
         """Dipanggil oleh KEDUA slider volume."""
-        pygame.mixer.music.set_volume(value)
+        self.player.set_volume(value)
 
         self.volume_slider.set(value)
         self.np_volume_slider.set(value)
@@ -735,7 +790,7 @@ class App(ctk.CTk):
     def update_history_sidebar(self):
         for widget in self.history_frame.winfo_children():
             widget.destroy()
-        history = self.player.get_recently_played()
+        history = self.player.get_recently_played(0, HISTORY_SIDEBAR_ROWS)
         if not history:
             ctk.CTkLabel(self.history_frame, text="Belum ada riwayat.").pack(anchor="w", padx=10)
             return
@@ -837,13 +892,20 @@ class App(ctk.CTk):
         genre_frame = ctk.CTkFrame(genre_container, fg_color="transparent")
         genre_frame.pack(anchor="center")
 
-        genres = ["All", "Pop", "R&B", "Rock", "K-Pop", "Jazz", "Blues", "Ambient", "Indie"]
+        # Genre dan jumlahnya diambil dari data library (facet bitmap index, kunci tanpa beda huruf).
+        # Tombol "All" memakai filter None agar tidak bentrok dengan genre bernama "All".
+        genre_counts = self.player.get_library_facets()['genre']
+        total_songs = sum(genre_counts.values())
+        genres = sorted((g for g in genre_counts if g), key=lambda g: (-genre_counts[g], g.lower()))
+        if self.current_genre_filter not in genre_counts:
+            self.current_genre_filter = None
         self.genre_buttons = {}
 
-        for genre in genres:
+        for genre in [None] + genres:
+            count = total_songs if genre is None else genre_counts[genre]
             btn = ctk.CTkButton(
                 genre_frame,
-                text=genre,
+                text=f"{'All' if genre is None else genre} {count}",
                 font=ctk.CTkFont(size=14, weight="bold"),
                 fg_color="transparent",
                 border_width=2,
@@ -898,16 +960,12 @@ class App(ctk.CTk):
             widget.destroy()
 
         # Filter songs
-        all_songs = list(self.player.song_library.values())
-        if genre != "All":
-            filtered_songs = [s for s in all_songs if s.genre and s.genre.lower() == genre.lower()]
-        else:
-            filtered_songs = all_songs
+        filtered_songs = self.player.get_songs_by_genre(genre)
 
         if not filtered_songs:
             ctk.CTkLabel(
                 self.songs_container,
-                text=f"No songs found for genre: {genre}",
+                text=f"No songs found for genre: {genre or 'All'}",
                 text_color=self.COLOR_PALETTE["text_secondary"]
             ).pack(pady=20)
             return
@@ -920,13 +978,47 @@ class App(ctk.CTk):
 
         self.clear_content_frame()
         self.main_title_label.configure(text="All Songs in Library")
-        all_songs = self.player.song_library.values()
-        if not all_songs:
+        if not self.player.song_library:
             ctk.CTkLabel(self.content_frame, text="Library kosong.").pack(fill="x", padx=10)
             return
-        for song in all_songs:
+
+        sort_key, reverse = self.library_sort
+        sort_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        sort_frame.pack(fill="x", padx=10, pady=(0, 10))
+        for label, key in LIBRARY_SORT_OPTIONS:
+            active = key == sort_key
+            if active:
+                label += " ▼" if reverse else " ▲"
+            ctk.CTkButton(sort_frame, text=label, width=80, corner_radius=15,
+                          fg_color=self.COLOR_PALETTE["accent_blue"] if active else self.COLOR_PALETTE["card_bg"],
+                          hover_color=self.COLOR_PALETTE["card_hover"],
+                          command=lambda k=key: self.on_library_sort(k)).pack(side="left", padx=(0, 6))
+        self._render_library_page(0)
+
+    def on_library_sort(self, sort_key):
+        """Klik kunci yang sama membalik arah; kunci lain mulai dari urutan naik ('Terbaru' dari yang terbaru)."""
+        current_key, reverse = self.library_sort
+        if sort_key == current_key:
+            self.library_sort = (sort_key, not reverse)
+        else:
+            self.library_sort = (sort_key, sort_key == "date_added")
+        self.show_library()
+
+    def _render_library_page(self, start, more_btn=None):
+        """Render satu halaman library terurut (hanya baris yang tampil yang dibaca dari index)."""
+        if more_btn:
+            more_btn.destroy()
+        sort_key, reverse = self.library_sort
+        for song in self.player.view_library(sort_key, start, LIBRARY_PAGE_SIZE, reverse):
             self.create_song_widget(self.content_frame, song, context_playlist=None)
 
+        if start + LIBRARY_PAGE_SIZE < len(self.player.song_library):
+            more_btn = ctk.CTkButton(self.content_frame, text="Tampilkan lebih banyak",
+                                     fg_color=self.COLOR_PALETTE["card_bg"],
+                                     hover_color=self.COLOR_PALETTE["card_hover"])
+            more_btn.configure(command=lambda b=more_btn: self._render_library_page(start + LIBRARY_PAGE_SIZE, b))
+            more_btn.pack(pady=10)
+
     def show_playlists(self):
         self._reset_sidebar_buttons()
         self.playlists_button.configure(fg_color=self.COLOR_PALETTE["accent_blue"],
@@ -1015,13 +1107,26 @@ class App(ctk.CTk):
         add_song_btn.grid(row=0, column=2, padx=10, sticky="e")
         # --- Akhir Frame Header ---
 
-        songs = playlist_obj.view_songs()
-        if not songs:
+        if playlist_obj.length == 0:
             ctk.CTkLabel(self.content_frame, text="Playlist ini kosong.").pack(fill="x", padx=10)
             return
-        for song in songs:
+        self._render_playlist_page(playlist_obj, 0)
+
+    def _render_playlist_page(self, playlist_obj, start, more_btn=None):
+        """Render playlist per halaman lewat slice() agar playlist panjang tidak dibangun sekaligus."""
+        if more_btn:
+            more_btn.destroy()
+        for song in playlist_obj.slice(start, start + PLAYLIST_PAGE_SIZE):
             self.create_song_widget(self.content_frame, song, context_playlist=playlist_obj)
 
+        if start + PLAYLIST_PAGE_SIZE < playlist_obj.length:
+            more_btn = ctk.CTkButton(self.content_frame, text="Tampilkan lebih banyak",
+                                     fg_color=self.COLOR_PALETTE["card_bg"],
+                                     hover_color=self.COLOR_PALETTE["card_hover"])
+            more_btn.configure(command=lambda b=more_btn: self._render_playlist_page(
+                playlist_obj, start + PLAYLIST_PAGE_SIZE, b))
+            more_btn.pack(pady=10)
+
     def show_favourites(self):
         self._reset_sidebar_buttons()
         self.favourite_button.configure(fg_color=self.COLOR_PALETTE["accent_blue"],
@@ -1315,6 +1420,7 @@ class App(ctk.CTk):
 
         # 1. Matikan Flag Utama (Hentikan loop update_progress)
         self.is_running = False
+        self.search_worker.stop()
 
         # 2. BATALKAN SEMUA JADWAL .after() YANG TERSISA
         # Ini adalah obat manjur untuk error 'invalid command name'
@@ -1325,7 +1431,13 @@ class App(ctk.CTk):
         except Exception:
             pass  # Abaikan jika gagal, yang penting sudah dicoba
 
-        # 3. Stop Audio & Mixer
+        # 3. Tulis semua perubahan data yang masih tertunda di thread writer
+        try:
+            self.player.close()
+        except Exception as e:
+            print(f"Gagal menyimpan data: {e}")
+
+        # 4. Stop Audio & Mixer
         try:
             if pygame.mixer.get_init():
                 pygame.mixer.music.stop()
@@ -1334,14 +1446,14 @@ class App(ctk.CTk):
         except Exception:
             pass
 
-        # 4. Stop Visualizer Thread
+        # 5. Stop Visualizer Thread
         if self.visualizer_engine:
             try:
                 self.visualizer_engine.stop()
             except Exception:
                 pass
 
-        # 5. Hancurkan Window (Opsional di sini, tapi bagus untuk memastikan)
+        # 6. Hancurkan Window (Opsional di sini, tapi bagus untuk memastikan)
         # Kita gunakan .quit() dulu untuk keluar mainloop, baru destroy
         try:
             self.quit()  # Keluar dari mainloop
@@ -1367,7 +1479,7 @@ class App(ctk.CTk):
 
     def on_closing(self):
         """Dipanggil saat user menekan tombol X (Close Window)."""
-        # 1. Matikan proses internal (musik, thread)
+        # 1. Matikan proses internal (musik, thread) dan flush data ke disk
         self.cleanup()
 
         # 2. Hancurkan window dengan aman
@@ -1392,7 +1504,7 @@ class App(ctk.CTk):
         song_label = ctk.CTkLabel(song_frame, text=info, anchor="w", text_color=self.COLOR_PALETTE["text_primary"])
         song_label.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
 
-        is_favourite = song in self.player.favourite_playlist.view_songs()
+        is_favourite = self.player.favourite_playlist.contains(song)
         like_text = "❤" if is_favourite else "♡"
         # 3. Ganti warna tombol 'like'
         like_color = self.COLOR_PALETTE["accent_pink"] if is_favourite else self.COLOR_PALETTE["text_secondary"]
@@ -1415,6 +1527,11 @@ class App(ctk.CTk):
             remove_btn = ctk.CTkButton(song_frame, text="X", width=30, fg_color="transparent", hover_color= self.COLOR_PALETTE["card_hover"],
                                        command=lambda s=song, p=context_playlist: self.on_remove_from_playlist(s, p))
             remove_btn.grid(row=0, column=3, padx=(0, 10))
+        elif not context_playlist:
+            radio_btn = ctk.CTkButton(song_frame, text="📻", width=30, fg_color="transparent",
+                                      hover_color=self.COLOR_PALETTE["card_hover"],
+                                      command=lambda s=song: self.on_start_radio(s))
+            radio_btn.grid(row=0, column=3, padx=(0, 10))
 
     def create_song_card(self, parent_frame, song):
         """Replace your existing create_song_card method with this"""
@@ -1479,7 +1596,7 @@ class App(ctk.CTk):
         artist.pack(anchor="w")
 
         # Like button
-        is_favourite = song in self.player.favourite_playlist.view_songs()
+        is_favourite = self.player.favourite_playlist.contains(song)
         like_text = "❤" if is_favourite else "♡"
         like_color = self.COLOR_PALETTE["accent_blue"] if is_favourite else self.COLOR_PALETTE["text_secondary"]
 
@@ -1682,23 +1799,8 @@ class App(ctk.CTk):
             self.admin_edit_status_label.configure(text="Masukkan kata kunci pencarian.", text_color="red")
             return
 
-        song = None
-
-        # 1. Coba cari berdasarkan ID Persis
-        song = self.player.get_song_by_id(query)
-
-        # 2. Jika tidak ketemu, cari secara luas (ID case-insensitive, Judul, Artis, Album, Genre)
-        if not song:
-            query_lower = query.lower()
-            for s in self.player.song_library.values():
-                # Cek apakah query ada di dalam salah satu atribut lagu
-                if (s.song_id.lower() == query_lower or
-                        query_lower in s.title.lower() or
-                        query_lower in s.artist.lower() or
-                        query_lower in s.album.lower() or
-                        query_lower in s.genre.lower()):
-                    song = s
-                    break  # Ambil yang pertama ketemu
+        # ID persis, ID tanpa beda huruf, lalu judul/artis/album/genre (lewat index pencarian)
+        song = self.player.admin_find_song(query)
 
         if song:
             self.loaded_song_id_to_edit = song.song_id  # Penting: Simpan ID aslinya
@@ -1873,16 +1975,12 @@ class App(ctk.CTk):
             widget.destroy()
 
         # Filter songs
-        all_songs = list(self.player.song_library.values())
-        if genre != "All":
-            filtered_songs = [s for s in all_songs if s.genre and s.genre.lower() == genre.lower()]
-        else:
-            filtered_songs = all_songs
+        filtered_songs = self.player.get_songs_by_genre(genre)
 
         if not filtered_songs:
             ctk.CTkLabel(
                 self.songs_container,
-                text=f"No songs found for genre: {genre}",
+                text=f"No songs found for genre: {genre or 'All'}",
                 text_color=self.COLOR_PALETTE["text_secondary"]
             ).pack(pady=20)
             return
@@ -1907,18 +2005,99 @@ class App(ctk.CTk):
 
 
 
+    def on_search_typing(self, event):
+        if event.keysym == "Return":
+            return
+        # Debounce: query baru dijalankan setelah user berhenti mengetik sebentar
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(SEARCH_DEBOUNCE_MS, self._run_typeahead)
+
+    def _run_typeahead(self):
+        self._search_after_id = None
+        self._search_generation += 1
+        query = self.search_entry.get().strip()
+        if not query:
+            self.search_worker.cancel()
+            return
+        self.search_worker.submit(self._search_generation, query, TYPEAHEAD_LIMIT)
+        self._poll_typeahead(self._search_generation)
+
+    def _poll_typeahead(self, generation):
+        if not self.is_running or generation != self._search_generation:
+            return  # Sudah digantikan ketikan baru atau Enter
+        while not self.search_worker.results.empty():
+            result_generation, query, song_ids = self.search_worker.results.get_nowait()
+            if result_generation == self._search_generation:
+                self._render_suggestions(query, song_ids)
+                return
+        self.after(30, lambda: self._poll_typeahead(generation))
+
+    def _render_suggestions(self, query, song_ids):
+        self.clear_content_frame()
+        self.main_title_label.configure(text=f"Saran untuk '{query}'")
+        songs = [self.player.song_library[s_id] for s_id in song_ids if s_id in self.player.song_library]
+        if not songs:
+            ctk.CTkLabel(self.content_frame, text="Tidak ada saran. Tekan Enter untuk pencarian lengkap.").pack()
+            return
+        for song in songs:
+            self.create_song_widget(self.content_frame, song, context_playlist=None)
+
     def on_search(self):
+        # Enter/tombol search: batalkan type-ahead yang masih berjalan, tampilkan hasil lengkap
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+            self._search_after_id = None
+        self._search_generation += 1
+        self.search_worker.cancel()
         self.clear_content_frame()
         self.main_title_label.configure(text="Search Results")
         query = self.search_entry.get()
         if not query: return
-        results = self.player.user_search_song(query)
+        song_by_id = self.player.get_song_by_id(query)
+        if song_by_id:
+            self.create_song_widget(self.content_frame, song_by_id, context_playlist=None)
+            return
+        if ':' in query:
+            self._render_query_results(query)
+            return
+        self._render_search_page(query, None)
+
+    def _render_query_results(self, query):
+        """Hasil query terstruktur (genre:, artist:, album:, dur:, fav:) beserta ringkasan facet."""
+        try:
+            results, facets = self.player.query_songs(query)
+        except ValueError as e:
+            ctk.CTkLabel(self.content_frame, text=f"Query tidak valid: {e}", text_color="red").pack()
+            return
+        summary = "   ".join(f"{genre} ({count})" for genre, count in
+                             sorted(facets['genre'].items(), key=lambda item: -item[1])[:8])
+        ctk.CTkLabel(self.content_frame, text=f"{len(results)} lagu   {summary}",
+                     text_color=self.COLOR_PALETTE["text_secondary"]).pack(anchor="w", padx=10, pady=(0, 10))
         if not results:
             ctk.CTkLabel(self.content_frame, text="Tidak ada hasil.").pack()
             return
+        for song in results[:SEARCH_PAGE_SIZE]:
+            self.create_song_widget(self.content_frame, song, context_playlist=None)
+
+    def _render_search_page(self, query, cursor, more_btn=None):
+        """Hasil berperingkat (toleran salah ketik) per halaman; cursor menunjuk akhir halaman sebelumnya."""
+        if more_btn:
+            more_btn.destroy()
+        results, next_cursor = self.player.search_ranked(query, limit=SEARCH_PAGE_SIZE, cursor=cursor)
+        if not results and cursor is None:
+            ctk.CTkLabel(self.content_frame, text="Tidak ada hasil.").pack()
+            return
         for song in results:
             self.create_song_widget(self.content_frame, song, context_playlist=None)
 
+        if next_cursor is not None:
+            more_btn = ctk.CTkButton(self.content_frame, text="Tampilkan lebih banyak",
+                                     fg_color=self.COLOR_PALETTE["card_bg"],
+                                     hover_color=self.COLOR_PALETTE["card_hover"])
+            more_btn.configure(command=lambda b=more_btn: self._render_search_page(query, next_cursor, b))
+            more_btn.pack(pady=10)
+
     def on_toggle_favourite(self, song):
         self.player.toggle_favourite(song)
         current_title = self.main_title_label.cget("text")
@@ -1949,14 +2128,24 @@ class App(ctk.CTk):
             self.player.download_lyrics_background(self.player.current_song)
 
     def on_shuffle_click(self):
-        is_active = self.player.toggle_shuffle()
+        # Mati -> acak tanpa pengulangan -> acak berbobot (favorit/jarang diputar) -> mati
+        mode = self.player.cycle_shuffle_mode()
+        self.update_shuffle_button(mode)
+        print({"off": "Shuffle Mode: Off", "order": "Shuffle Mode: On",
+               "weighted": "Shuffle Mode: Weighted"}[mode])
+
+    def update_shuffle_button(self, mode):
         active_color = self.COLOR_PALETTE["accent_pink"]
         inactive_color = "transparent"
         text_secondary = self.COLOR_PALETTE["text_secondary"]
 
-        if is_active:
+        if mode == "order":
             self.shuffle_button.configure(text="🔀", fg_color=inactive_color, text_color=active_color)
             self.np_shuffle_button.configure(text="🔀", fg_color=inactive_color, text_color=active_color)
+        elif mode == "weighted":
+            # Ikon dadu: lagu diundi sesuai bobotnya
+            self.shuffle_button.configure(text="🎲", fg_color=inactive_color, text_color=active_color)
+            self.np_shuffle_button.configure(text="🎲", fg_color=inactive_color, text_color=active_color)
         else:
             self.shuffle_button.configure(text="🔀", fg_color=inactive_color, text_color=text_secondary)
             self.np_shuffle_button.configure(text="🔀", fg_color=inactive_color, text_color=text_secondary)
@@ -2007,6 +2196,7 @@ class App(ctk.CTk):
             self.update_player_ui()
 
     def on_play_song(self, song_object, context_playlist=None):
+        self.player.stop_radio()  # Memilih lagu sendiri keluar dari mode radio
         self.player.play_song(song_object, context_playlist=context_playlist)
 
         # --- TAMBAHAN BARU UNTUK VISUALIZER ---
@@ -2026,6 +2216,10 @@ class App(ctk.CTk):
         self.update_player_ui()
         self.update_history_sidebar()
 
+    def on_start_radio(self, song_object):
+        self.on_play_song(song_object, context_playlist=None)
+        self.player.start_radio(song_object)
+
     def on_play_pause_click(self):
         current_time = self.player.get_current_playback_time()
         self.player.stop_song()
@@ -2141,10 +2335,8 @@ class App(ctk.CTk):
             ctk.CTkLabel(scroll_frame, text="Library kosong.").pack(pady=20)
             return
 
-        current_song_ids = {song.song_id for song in target_playlist.view_songs()}
-
         for i, song in enumerate(all_songs):
-            is_in_playlist = song.song_id in current_song_ids
+            is_in_playlist = target_playlist.contains(song)
 
             song_item = ctk.CTkFrame(scroll_frame, fg_color=self.COLOR_PALETTE["card_bg"])
             song_item.grid(row=i, column=0, sticky="ew", pady=3)
@@ -2163,7 +2355,7 @@ class App(ctk.CTk):
             artist_label.grid(row=1, column=1, sticky="w", padx=5)
 
             # --- BARU: Tombol 'Like' ---
-            is_favourite = song in self.player.favourite_playlist.view_songs()
+            is_favourite = self.player.favourite_playlist.contains(song)
             like_text = "❤️" if is_favourite else "♡"
             like_color = self.COLOR_PALETTE["accent_pink"] if is_favourite else self.COLOR_PALETTE["text_secondary"]
 
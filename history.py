@@ -0,0 +1,53 @@
+"""
+Blue Mood - Recently Played
+Riwayat putar unik per lagu dengan urutan LRU.
+
+OrderedDict song_id -> waktu terakhir diputar. Lagu yang diputar ulang
+dipindah ke ujung (terbaru) dalam O(1), dan entri tertua dibuang jika
+melebihi kedalaman riwayat.
+"""
+
+from collections import OrderedDict
+from itertools import islice
+
+HISTORY_DEPTH = 1000
+
+
+class RecentlyPlayed:
+    def __init__(self, depth=HISTORY_DEPTH):
+        self.depth = depth
+        self.entries = OrderedDict()  # song_id -> timestamp, terlama di depan
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, song_id):
+        return song_id in self.entries
+
+    def touch(self, song_id, played_at):
+        """Mencatat lagu sebagai yang terbaru diputar (O(1))."""
+        self.entries[song_id] = played_at
+        self.entries.move_to_end(song_id)
+        while len(self.entries) > self.depth:
+            self.entries.popitem(last=False)
+
+    def remove(self, song_id):
+        return self.entries.pop(song_id, None) is not None
+
+    def last_played(self, song_id):
+        return self.entries.get(song_id)
+
+    def page(self, offset=0, limit=None):
+        """song_id terbaru lebih dulu; hanya baris [offset, offset+limit) yang dibaca."""
+        stop = None if limit is None else offset + limit
+        return list(islice(reversed(self.entries), offset, stop))
+
+    # --- PERSISTENSI ---
+    def to_list(self):
+        """[[song_id, timestamp], ...] dari yang terlama ke terbaru."""
+        return [[song_id, played_at] for song_id, played_at in self.entries.items()]
+
+    def load(self, items):
+        self.entries.clear()
+        for song_id, played_at in items:
+            self.touch(song_id, played_at)
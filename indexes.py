@@ -0,0 +1,1059 @@
+"""
+Blue Mood - Library Indexes
+Struktur index tambahan di atas song_library untuk filter dan pencarian cepat.
+
+Setiap index mengikuti protokol yang sama agar bisa didaftarkan di
+MusicPlayer.library_indexes:
+    song_added(song), song_updated(song), song_removed(song)
+dan dibangun (lazy) dari iterable record lagu saat pertama kali dipakai.
+"""
+
+import bisect
+import re
+import threading
+from collections import OrderedDict
+
+import order_tree
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def normalize(value):
+    """Normalisasi teks untuk perbandingan case-insensitive."""
+    return value.lower() if value else ""
+
+
+# ==============================================================================
+# KOLOM TERKODE (Dictionary Encoding)
+# ==============================================================================
+class _Dictionary:
+    """Memetakan nilai string ke kode integer (0, 1, 2, ...)."""
+
+    def __init__(self):
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.codes)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value):
+        return self.codes.get(value, -1)
+
+
+class ColumnarSongTable:
+    """
+    Bayangan library dalam bentuk kolom (array NumPy).
+    Genre, artis dan album disimpan sebagai kode integer, durasi sebagai
+    array int, dan posisi -> song_id sebagai vektor. Filter dijalankan
+    sebagai mask NumPy, bukan loop Python per lagu.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn  # Sumber data saat tabel pertama kali dibangun
+        self.built = False
+
+    def _reset(self, capacity):
+        self.size = 0
+        self.deleted = 0
+        self.genres = _Dictionary()  # Genre dibandingkan case-insensitive
+        self.artists = _Dictionary()
+        self.albums = _Dictionary()
+        self.genre_col = np.zeros(capacity, dtype=np.int32)
+        self.artist_col = np.zeros(capacity, dtype=np.int32)
+        self.album_col = np.zeros(capacity, dtype=np.int32)
+        self.duration_col = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.empty(capacity, dtype=object)
+        self.position = {}  # song_id -> posisi baris
+
+    def build(self):
+        records = list(self.records_fn())
+        self._reset(max(self.INITIAL_CAPACITY, len(records)))
+        for song in records:
+            self._append(song)
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _grow(self):
+        capacity = len(self.alive) * 2
+        for name in ('genre_col', 'artist_col', 'album_col', 'duration_col', 'alive', 'ids'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype) if old.dtype != object else np.empty(capacity, dtype=object)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _write_row(self, pos, song):
+        self.genre_col[pos] = self.genres.encode(normalize(song.genre))
+        self.artist_col[pos] = self.artists.encode(song.artist)
+        self.album_col[pos] = self.albums.encode(song.album)
+        self.duration_col[pos] = song.duration_seconds or 0
+
+    def _append(self, song):
+        if self.size == len(self.alive):
+            self._grow()
+        pos = self.size
+        self._write_row(pos, song)
+        self.ids[pos] = song.song_id
+        self.alive[pos] = True
+        self.position[song.song_id] = pos
+        self.size += 1
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if self.built:
+            self._append(song)
+
+    def song_updated(self, song):
+        if self.built and song.song_id in self.position:
+            self._write_row(self.position[song.song_id], song)
+
+    def song_removed(self, song):
+        if not self.built:
+            return
+        pos = self.position.pop(song.song_id, None)
+        if pos is None:
+            return
+        self.alive[pos] = False
+        self.ids[pos] = None
+        self.deleted += 1
+        # Padatkan jika lebih dari separuh baris sudah terhapus
+        if self.deleted > self.size // 2:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive[:self.size])
+        for name in ('genre_col', 'artist_col', 'album_col', 'duration_col', 'alive', 'ids'):
+            col = getattr(self, name)
+            col[:len(keep)] = col[keep]
+        self.size = len(keep)
+        self.alive[self.size:] = False
+        self.deleted = 0
+        self.position = {song_id: pos for pos, song_id in enumerate(self.ids[:self.size])}
+
+    # --- QUERY ---
+    def mask(self, genre=None, artist=None, album=None, min_duration=None, max_duration=None):
+        """Mask boolean (panjang = jumlah baris) untuk kombinasi filter."""
+        self.ensure_built()
+        m = self.alive[:self.size].copy()
+        if genre is not None:
+            m &= self.genre_col[:self.size] == self.genres.lookup(normalize(genre))
+        if artist is not None:
+            m &= self.artist_col[:self.size] == self.artists.lookup(artist)
+        if album is not None:
+            m &= self.album_col[:self.size] == self.albums.lookup(album)
+        if min_duration is not None:
+            m &= self.duration_col[:self.size] >= min_duration
+        if max_duration is not None:
+            m &= self.duration_col[:self.size] <= max_duration
+        return m
+
+    def ids_where(self, mask):
+        return self.ids[:self.size][mask].tolist()
+
+    def filter(self, **criteria):
+        """song_id yang cocok dengan filter, sesuai urutan library."""
+        return self.ids_where(self.mask(**criteria))
+
+
+# ==============================================================================
+# TRIGRAM INDEX (Pencarian Substring)
+# ==============================================================================
+SEARCH_FIELDS = ('title', 'artist', 'album', 'genre')
+# Bobot field untuk peringkat hasil: judul paling penting
+FIELD_WEIGHTS = {'title': 3.0, 'artist': 2.0, 'album': 1.0, 'genre': 0.5}
+SEARCH_CACHE_SIZE = 64
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Index trigram atas judul, artis, album dan genre (dinormalisasi).
+    Query >= 3 huruf: posting list setiap trigram query di-intersect, lalu
+    kandidat diverifikasi dengan 'query in field', jadi hasilnya sama persis
+    dengan pencarian substring linear. Query lebih pendek memindai teks yang
+    sudah dinormalisasi. Hasil query berulang disimpan di cache LRU kecil yang
+    dikosongkan setiap kali library berubah.
+    """
+
+    def __init__(self, records_fn, cache_size=SEARCH_CACHE_SIZE):
+        self.records_fn = records_fn
+        self.cache_size = cache_size
+        self.built = False
+
+    def build(self):
+        self.postings = {}  # trigram -> set song_id
+        self.texts = {}  # song_id -> tuple field ternormalisasi
+        self.order = {}  # song_id -> urutan di library (hasil mengikuti urutan library)
+        self.ids_casefold = {}  # song_id.lower() -> song_id
+        self.next_order = 0
+        self.cache = OrderedDict()
+        for song in self.records_fn():
+            self._add(song)
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _add(self, song):
+        song_id = song.song_id
+        texts = tuple(normalize(getattr(song, field)) for field in SEARCH_FIELDS)
+        self.texts[song_id] = texts
+        if song_id not in self.order:
+            self.order[song_id] = self.next_order
+            self.next_order += 1
+        self.ids_casefold.setdefault(song_id.lower(), song_id)
+        for gram in set().union(*(trigrams(t) for t in texts)):
+            self.postings.setdefault(gram, set()).add(song_id)
+
+    def _remove(self, song_id):
+        texts = self.texts.pop(song_id, None)
+        if texts is None:
+            return
+        for gram in set().union(*(trigrams(t) for t in texts)):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(song_id)
+                if not posting:
+                    del self.postings[gram]
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if self.built:
+            self._add(song)
+            self.cache.clear()
+
+    def song_updated(self, song):
+        if self.built:
+            self._remove(song.song_id)
+            self._add(song)
+            self.cache.clear()
+
+    def song_removed(self, song):
+        if self.built:
+            self._remove(song.song_id)
+            self.order.pop(song.song_id, None)
+            if self.ids_casefold.get(song.song_id.lower()) == song.song_id:
+                del self.ids_casefold[song.song_id.lower()]
+            self.cache.clear()
+
+    # --- QUERY ---
+    def search(self, query):
+        """song_id yang salah satu field-nya mengandung query (case-insensitive), urut library."""
+        self.ensure_built()
+        q = normalize(query)
+        if not q:
+            return []
+        cached = self.cache.get(q)
+        if cached is not None:
+            self.cache.move_to_end(q)
+            return list(cached)
+
+        grams = trigrams(q)
+        if grams:
+            postings = sorted((self.postings.get(g, ()) for g in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings[0] else set()
+        else:
+            candidates = self.texts.keys()
+        matches = [song_id for song_id in candidates
+                   if any(q in text for text in self.texts[song_id])]
+        matches.sort(key=self.order.__getitem__)
+
+        self.cache[q] = tuple(matches)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return matches
+
+    def substring_score(self, song_id, query):
+        """Skor peringkat untuk lagu yang cocok secara substring: field persis > awalan > di tengah."""
+        q = normalize(query)
+        best = 0.0
+        for field, text in zip(SEARCH_FIELDS, self.texts.get(song_id, ())):
+            if q not in text:
+                continue
+            quality = 1.0 if text == q else 0.75 if text.startswith(q) else 0.5
+            best = max(best, FIELD_WEIGHTS[field] * quality)
+        return best
+
+    def find_id(self, query):
+        """song_id yang sama dengan query tanpa memperhatikan huruf besar/kecil."""
+        self.ensure_built()
+        return self.ids_casefold.get(query.lower())
+
+
+# ==============================================================================
+# PREFIX TRIE (Saran Saat Mengetik)
+# ==============================================================================
+TRIE_FIELDS = ('title', 'artist', 'album')
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(value):
+    return _TOKEN_RE.findall(normalize(value))
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = None  # Set song_id yang punya token tepat sampai simpul ini
+
+
+class PrefixTrie:
+    """
+    Trie token (judul, artis, album) untuk type-ahead.
+    Setiap kata di query dicocokkan sebagai awalan token lagu, dan hasil tiap
+    kata di-intersect. Dipakai dari thread worker pencarian, jadi semua akses
+    dijaga lock.
+
+    Build pertama juga berjalan di thread worker. Perubahan library dari thread
+    GUI selama build tidak menunggu lock, tetapi dicatat di _backlog lalu
+    diterapkan setelah build selesai, sehingga ketikan tidak pernah tertahan.
+    """
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn
+        self.built = False
+        self._lock = threading.Lock()
+        self._backlog = None  # List (event, song) selama build berjalan
+        self._backlog_lock = threading.Lock()
+
+    def build(self):
+        with self._lock:
+            with self._backlog_lock:
+                self._backlog = []
+            self.root = _TrieNode()
+            self.tokens = {}  # song_id -> set token (untuk menghapus)
+            self.order = {}  # song_id -> urutan di library
+            self.next_order = 0
+            for song in self.records_fn():
+                self._add(song)
+            with self._backlog_lock:
+                # Perubahan yang sudah ikut terbaca di atas aman diterapkan ulang
+                for event, song in self._backlog:
+                    self._apply(event, song)
+                self._backlog = None
+                self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            with self._lock:
+                if self.built:
+                    return
+            self.build()
+
+    def _add(self, song):
+        tokens = set()
+        for field in TRIE_FIELDS:
+            tokens.update(tokenize(getattr(song, field)))
+        self.tokens[song.song_id] = tokens
+        if song.song_id not in self.order:
+            self.order[song.song_id] = self.next_order
+            self.next_order += 1
+        for token in tokens:
+            node = self.root
+            for ch in token:
+                node = node.children.setdefault(ch, _TrieNode())
+            if node.ids is None:
+                node.ids = set()
+            node.ids.add(song.song_id)
+
+    def _remove(self, song_id):
+        for token in self.tokens.pop(song_id, ()):
+            node = self.root
+            for ch in token:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+            if node is not None and node.ids:
+                node.ids.discard(song_id)
+
+    def _apply(self, event, song):
+        if event != 'song_added':
+            self._remove(song.song_id)
+        if event == 'song_removed':
+            self.order.pop(song.song_id, None)
+        else:
+            self._add(song)
+
+    def _notify(self, event, song):
+        with self._backlog_lock:
+            if self._backlog is not None:
+                self._backlog.append((event, song))
+                return
+            if not self.built:
+                return
+        with self._lock:
+            self._apply(event, song)
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        self._notify('song_added', song)
+
+    def song_updated(self, song):
+        self._notify('song_updated', song)
+
+    def song_removed(self, song):
+        self._notify('song_removed', song)
+
+    # --- QUERY ---
+    def _prefix_ids(self, prefix):
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.ids:
+                ids |= node.ids
+            stack.extend(node.children.values())
+        return ids
+
+    def suggest(self, query, limit):
+        """Hingga limit song_id yang token-nya diawali setiap kata di query, urut library."""
+        self.ensure_built()
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            # Kata terpanjang dulu: subtree-nya paling kecil
+            words.sort(key=len, reverse=True)
+            matches = self._prefix_ids(words[0])
+            for word in words[1:]:
+                if not matches:
+                    break
+                matches &= self._prefix_ids(word)
+            return sorted(matches, key=self.order.__getitem__)[:limit]
+
+
+# ==============================================================================
+# BK-TREE (Pencarian Toleran Salah Ketik)
+# ==============================================================================
+FUZZY_FIELDS = ('title', 'artist', 'album')
+
+
+def distance_to(word):
+    """
+    Fungsi jarak Levenshtein dari word ke teks lain, memakai algoritma bit-parallel
+    Myers/Hyyro (satu integer Python sebagai vektor bit). Tabel karakter word
+    dihitung sekali, jadi satu query ke banyak token jauh lebih cepat dari DP biasa.
+    """
+    m = len(word)
+    if m == 0:
+        return len
+    peq = {}
+    for i, ch in enumerate(word):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+
+    def distance(text):
+        pv, mv, score = mask, 0, m
+        for ch in text:
+            eq = peq.get(ch, 0)
+            xv = eq | mv
+            xh = (((eq & pv) + pv) ^ pv) | eq
+            ph = mv | ~(xh | pv)
+            mh = pv & xh
+            if ph & high:
+                score += 1
+            elif mh & high:
+                score -= 1
+            ph = (ph << 1) | 1
+            mh <<= 1
+            pv = (mh | ~(xv | ph)) & mask
+            mv = ph & xv
+        return score
+
+    return distance
+
+
+def max_typos(word):
+    """Jumlah salah ketik yang ditoleransi berdasarkan panjang kata."""
+    if len(word) < 3:
+        return 0
+    return 1 if len(word) < 6 else 2
+
+
+class BKTree:
+    """BK-tree atas kosakata token; simpul = [token, {jarak: anak}]."""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, token):
+        if self.root is None:
+            self.root = [token, {}]
+            self.size = 1
+            return
+        distance = distance_to(token)
+        node = self.root
+        while True:
+            d = distance(node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [token, {}]
+                self.size += 1
+                return
+            node = child
+
+    def query(self, word, max_distance):
+        """List (token, jarak) dengan jarak <= max_distance."""
+        if self.root is None:
+            return []
+        distance = distance_to(word)
+        found = []
+        stack = [self.root]
+        while stack:
+            token, children = stack.pop()
+            d = distance(token)
+            if d <= max_distance:
+                found.append((token, d))
+            for edge, child in children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return found
+
+
+class FuzzyIndex:
+    """
+    Index token (judul, artis, album) + BK-tree kosakata.
+    Setiap kata query dicocokkan dengan token berjarak edit kecil, lalu skor
+    lagu = jumlah (bobot field x kualitas kecocokan) untuk setiap kata.
+    Lagu harus cocok dengan semua kata query.
+    """
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn
+        self.built = False
+
+    def build(self):
+        self.tree = BKTree()
+        self.postings = {}  # token -> {song_id: bitmask field}
+        self.tokens = {}  # song_id -> set token
+        for song in self.records_fn():
+            self._add(song)
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _add(self, song):
+        masks = {}
+        for bit, field in enumerate(FUZZY_FIELDS):
+            for token in tokenize(getattr(song, field)):
+                masks[token] = masks.get(token, 0) | (1 << bit)
+        self.tokens[song.song_id] = set(masks)
+        for token, mask in masks.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                self.tree.add(token)  # Token yang kemudian kosong tetap di tree, posting-nya saja yang habis
+            posting[song.song_id] = mask
+
+    def _remove(self, song_id):
+        for token in self.tokens.pop(song_id, ()):
+            self.postings[token].pop(song_id, None)
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if self.built:
+            self._add(song)
+
+    def song_updated(self, song):
+        if self.built:
+            self._remove(song.song_id)
+            self._add(song)
+
+    def song_removed(self, song):
+        if self.built:
+            self._remove(song.song_id)
+
+    # --- QUERY ---
+    def _word_scores(self, word):
+        scores = {}
+        for token, d in self.tree.query(word, max_typos(word)):
+            quality = 1.0 - d / (len(word) + 1)
+            for song_id, mask in self.postings[token].items():
+                weight = max(FIELD_WEIGHTS[field] for bit, field in enumerate(FUZZY_FIELDS) if mask & (1 << bit))
+                score = weight * quality
+                if score > scores.get(song_id, 0.0):
+                    scores[song_id] = score
+        return scores
+
+    def score(self, query):
+        """{song_id: skor} untuk lagu yang cocok (toleran salah ketik) dengan semua kata query."""
+        self.ensure_built()
+        words = tokenize(query)
+        if not words:
+            return {}
+        total = None
+        for word in words:
+            scores = self._word_scores(word)
+            if total is None:
+                total = scores
+            else:
+                total = {s_id: total[s_id] + sc for s_id, sc in scores.items() if s_id in total}
+            if not total:
+                return {}
+        return total
+
+
+# ==============================================================================
+# BITMAP INDEX (Filter Gabungan + Facet)
+# ==============================================================================
+FACET_FIELDS = ('genre', 'artist', 'album')
+
+
+def rows_to_bits(rows):
+    """Bitset (int Python) dengan bit di setiap posisi baris."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    buf = bytearray(max(rows) // 8 + 1)
+    for row in rows:
+        buf[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def bits_to_rows(bits):
+    """Posisi baris dari bitset, urut naik."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    return [i * 8 + j for i, byte in enumerate(data) if byte for j in range(8) if byte >> j & 1]
+
+
+class BitmapIndex:
+    """
+    Bitset per nilai genre/artis/album (int Python, satu bit per baris) dan
+    index durasi terurut untuk query rentang. Filter digabung dengan operasi
+    bit (&, |, ~), lalu baris yang cocok dibaca sekali untuk menghasilkan
+    song_id sekaligus jumlah facet per genre, artis dan album.
+    Jumlah facet seluruh library disimpan terpisah dan diperbarui per mutasi.
+    """
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn
+        self.built = False
+
+    def build(self):
+        self.row_ids = []  # baris -> song_id (None = terhapus)
+        self.row_values = []  # baris -> tuple nilai ternormalisasi FACET_FIELDS
+        self.row_durations = []
+        self.rows = {}  # song_id -> baris
+        self.labels = {field: {} for field in FACET_FIELDS}  # nilai ternormalisasi -> teks tampilan
+        self.counts = {field: {} for field in FACET_FIELDS}  # nilai ternormalisasi -> jumlah lagu
+        self.deleted = 0
+        # Baris dikumpulkan per nilai dulu, lalu tiap list diubah menjadi bitset sekali
+        value_rows = {field: {} for field in FACET_FIELDS}
+        for row, song in enumerate(self.records_fn()):
+            values = tuple(normalize(getattr(song, field)) for field in FACET_FIELDS)
+            self.row_ids.append(song.song_id)
+            self.row_values.append(values)
+            self.row_durations.append(song.duration_seconds or 0)
+            self.rows[song.song_id] = row
+            for field, value in zip(FACET_FIELDS, values):
+                value_rows[field].setdefault(value, []).append(row)
+                self.labels[field].setdefault(value, getattr(song, field) or "")
+        self.alive = (1 << len(self.row_ids)) - 1
+        self.bitmaps = {field: {value: rows_to_bits(rows) for value, rows in values.items()}
+                        for field, values in value_rows.items()}
+        self.counts = {field: {value: len(rows) for value, rows in values.items()}
+                       for field, values in value_rows.items()}
+        self.durations = sorted((duration, row) for row, duration in enumerate(self.row_durations))
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _set_value(self, field, value, bit, label):
+        self.bitmaps[field][value] = self.bitmaps[field].get(value, 0) | bit
+        self.counts[field][value] = self.counts[field].get(value, 0) + 1
+        self.labels[field].setdefault(value, label or "")
+
+    def _clear_value(self, field, value, bit):
+        remaining = self.bitmaps[field][value] & ~bit
+        if remaining:
+            self.bitmaps[field][value] = remaining
+            self.counts[field][value] -= 1
+        else:
+            del self.bitmaps[field][value]
+            del self.counts[field][value]
+            del self.labels[field][value]
+
+    def _add(self, song):
+        row = len(self.row_ids)
+        bit = 1 << row
+        values = tuple(normalize(getattr(song, field)) for field in FACET_FIELDS)
+        self.row_ids.append(song.song_id)
+        self.row_values.append(values)
+        self.row_durations.append(song.duration_seconds or 0)
+        self.rows[song.song_id] = row
+        self.alive |= bit
+        for field, value in zip(FACET_FIELDS, values):
+            self._set_value(field, value, bit, getattr(song, field))
+        bisect.insort(self.durations, (self.row_durations[row], row))
+
+    def _update(self, song):
+        """Memperbarui nilai baris yang sama, sehingga posisi lagu di hasil filter tidak berubah."""
+        row = self.rows[song.song_id]
+        bit = 1 << row
+        values = tuple(normalize(getattr(song, field)) for field in FACET_FIELDS)
+        for field, old, new in zip(FACET_FIELDS, self.row_values[row], values):
+            if old != new:
+                self._clear_value(field, old, bit)
+                self._set_value(field, new, bit, getattr(song, field))
+        self.row_values[row] = values
+        duration = song.duration_seconds or 0
+        if duration != self.row_durations[row]:
+            del self.durations[bisect.bisect_left(self.durations, (self.row_durations[row], row))]
+            self.row_durations[row] = duration
+            bisect.insort(self.durations, (duration, row))
+
+    def _remove(self, song_id):
+        row = self.rows.pop(song_id, None)
+        if row is None:
+            return None
+        bit = 1 << row
+        self.alive &= ~bit
+        for field, value in zip(FACET_FIELDS, self.row_values[row]):
+            self._clear_value(field, value, bit)
+        self.row_ids[row] = None
+        i = bisect.bisect_left(self.durations, (self.row_durations[row], row))
+        del self.durations[i]
+        self.deleted += 1
+        return row
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if self.built:
+            self._add(song)
+
+    def song_updated(self, song):
+        if not self.built:
+            return
+        if song.song_id in self.rows:
+            self._update(song)
+        else:
+            self._add(song)
+
+    def song_removed(self, song):
+        if not self.built:
+            return
+        self._remove(song.song_id)
+        # Bangun ulang (lazy, saat query berikutnya) jika lebih dari separuh baris sudah terhapus
+        if self.deleted > len(self.row_ids) // 2:
+            self.built = False
+
+    # --- QUERY ---
+    def value_bits(self, field, value):
+        return self.bitmaps[field].get(normalize(value), 0)
+
+    def duration_bits(self, low=None, high=None):
+        """Bitset baris dengan low <= durasi <= high (bisect pada index terurut)."""
+        start = 0 if low is None else bisect.bisect_left(self.durations, (low, -1))
+        stop = len(self.durations) if high is None else bisect.bisect_right(self.durations, (high, float('inf')))
+        return rows_to_bits(row for _, row in self.durations[start:stop])
+
+    def ids_bits(self, song_ids):
+        return rows_to_bits(self.rows[s_id] for s_id in song_ids if s_id in self.rows)
+
+    def _labelled(self, counts):
+        return {field: {self.labels[field][value]: n for value, n in values.items()}
+                for field, values in counts.items()}
+
+    def facets(self):
+        """Facet seluruh library {field: {label: jumlah}} dari jumlah yang sudah dijaga (tanpa scan)."""
+        return self._labelled(self.counts)
+
+    def collect(self, bits):
+        """(list song_id, facet) untuk bitset hasil: {field: {label: jumlah}} dalam satu lintasan."""
+        counts = {field: {} for field in FACET_FIELDS}
+        song_ids = []
+        for row in bits_to_rows(bits & self.alive):
+            song_ids.append(self.row_ids[row])
+            for field, value in zip(FACET_FIELDS, self.row_values[row]):
+                counts[field][value] = counts[field].get(value, 0) + 1
+        return song_ids, self._labelled(counts)
+
+
+# ==============================================================================
+# SORTED VIEWS (Library Terurut)
+# ==============================================================================
+SORT_KEYS = ('title', 'artist', 'album', 'duration', 'date_added')
+
+
+class _SortNode:
+    __slots__ = ('song_id', 'key', 'left', 'right', 'parent', 'priority', 'size')
+
+    def __init__(self, song_id, key):
+        self.song_id = song_id
+        self.key = key
+        order_tree.init_tree_node(self)
+
+
+class SortedViews:
+    """
+    Satu treap order-statistic per kunci urut (judul, artis, album, durasi,
+    tanggal ditambahkan). Sisip, hapus dan update O(log n); view() membaca
+    satu jendela baris tanpa mengurutkan seluruh library. Setiap treap baru
+    dibangun saat kunci itu pertama kali dipakai.
+    'date_added' mengikuti urutan lagu masuk library.
+    """
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn
+        self.built = False
+
+    def build(self):
+        self.seq = {}  # song_id -> urutan masuk library (juga pemecah seri)
+        self.next_seq = 0
+        for song in self.records_fn():
+            self._assign_seq(song.song_id)
+        self.roots = {}  # kunci urut -> root treap (hanya yang sudah dibangun)
+        self.nodes = {}  # kunci urut -> {song_id: _SortNode}
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _assign_seq(self, song_id):
+        if song_id not in self.seq:
+            self.seq[song_id] = self.next_seq
+            self.next_seq += 1
+
+    def _key(self, sort_key, song):
+        seq = self.seq[song.song_id]
+        if sort_key == 'date_added':
+            return (seq,)
+        if sort_key == 'duration':
+            return (song.duration_seconds or 0, seq)
+        return (normalize(getattr(song, sort_key)), seq)
+
+    def _build_view(self, sort_key):
+        if sort_key not in SORT_KEYS:
+            raise ValueError(f"Kunci urut tidak dikenal: '{sort_key}'")
+        nodes = {}
+        for song in self.records_fn():
+            nodes[song.song_id] = _SortNode(song.song_id, self._key(sort_key, song))
+        self.nodes[sort_key] = nodes
+        self.roots[sort_key] = order_tree.build(sorted(nodes.values(), key=lambda n: n.key))
+
+    def _insert(self, sort_key, song):
+        node = _SortNode(song.song_id, self._key(sort_key, song))
+        self.nodes[sort_key][song.song_id] = node
+        root = self.roots[sort_key]
+        left, right = order_tree.split(root, order_tree.count_less(root, node.key))
+        self.roots[sort_key] = order_tree.merge(order_tree.merge(left, node), right)
+
+    def _delete(self, sort_key, song_id):
+        node = self.nodes[sort_key].pop(song_id, None)
+        if node is not None:
+            self.roots[sort_key] = order_tree.remove(self.roots[sort_key], node)
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if not self.built:
+            return
+        self._assign_seq(song.song_id)
+        for sort_key in self.roots:
+            self._insert(sort_key, song)
+
+    def song_updated(self, song):
+        if not self.built:
+            return
+        for sort_key in self.roots:
+            self._delete(sort_key, song.song_id)
+            self._insert(sort_key, song)
+
+    def song_removed(self, song):
+        if not self.built:
+            return
+        for sort_key in self.roots:
+            self._delete(sort_key, song.song_id)
+        self.seq.pop(song.song_id, None)
+
+    # --- QUERY ---
+    def view(self, sort_key, offset=0, limit=50, reverse=False):
+        """song_id pada baris [offset, offset+limit) dari library yang diurutkan berdasarkan sort_key."""
+        self.ensure_built()
+        if sort_key not in self.roots:
+            self._build_view(sort_key)
+        root = self.roots[sort_key]
+        size = root.size if root is not None else 0
+        if offset >= size or limit <= 0:
+            return []
+        node = order_tree.node_at(root, size - 1 - offset if reverse else offset)
+        step = order_tree.predecessor if reverse else order_tree.successor
+        song_ids = []
+        while node is not None and len(song_ids) < limit:
+            song_ids.append(node.song_id)
+            node = step(node)
+        return song_ids
+
+    def __len__(self):
+        self.ensure_built()
+        return len(self.seq)
+
+
+# ==============================================================================
+# BUCKET ARTIS & GENRE (Lagu Mirip)
+# ==============================================================================
+# Pemisah kredit artis: "A feat. B", "A ft B", "A featuring B", "A (feat. B)", "A & B", "A, B"
+_ARTIST_SPLIT = re.compile(r"\s*(?:[()\[\],;&]|\bfeat\b\.?|\bft\b\.?|\bfeaturing\b|\bvs\b\.?)\s*")
+# Jumlah percobaan acak sebelum jatuh ke penyaringan isi bucket
+SIMILAR_PICK_TRIES = 8
+
+
+def artist_keys(value):
+    """Nama artis ternormalisasi dari satu kredit, artis utama lebih dulu ('Foo feat. Bar' -> ('foo', 'bar'))."""
+    keys = []
+    for name in _ARTIST_SPLIT.split(normalize(value)):
+        name = " ".join(name.split())
+        if name and name not in keys:
+            keys.append(name)
+    return tuple(keys)
+
+
+def genre_key(value):
+    return " ".join(normalize(value).split())
+
+
+class _Bucket:
+    """List song_id yang bisa diakses per posisi + posisi per song_id (hapus O(1) dengan tukar ujung)."""
+
+    __slots__ = ('ids', 'pos')
+
+    def __init__(self):
+        self.ids = []
+        self.pos = {}
+
+    def add(self, song_id):
+        if song_id not in self.pos:
+            self.pos[song_id] = len(self.ids)
+            self.ids.append(song_id)
+
+    def discard(self, song_id):
+        i = self.pos.pop(song_id, None)
+        if i is None:
+            return
+        last = self.ids.pop()
+        if last != song_id:
+            self.ids[i] = last
+            self.pos[last] = i
+
+
+class SimilarityBuckets:
+    """
+    Bucket artis ternormalisasi -> lagu dan genre ternormalisasi -> lagu.
+    Lagu dengan kredit 'feat.' masuk ke bucket setiap artisnya. Memilih lagu
+    mirip cukup mengambil posisi acak di bucket, tanpa memindai library.
+    """
+
+    def __init__(self, records_fn):
+        self.records_fn = records_fn
+        self.built = False
+
+    def build(self):
+        self.artists = {}  # artis -> _Bucket
+        self.genres = {}  # genre -> _Bucket
+        self.keys = {}  # song_id -> (artist_keys, genre_key), untuk update/hapus
+        for song in self.records_fn():
+            self._add(song)
+        self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def _add(self, song):
+        artists, genre = artist_keys(song.artist), genre_key(song.genre)
+        self.keys[song.song_id] = (artists, genre)
+        for artist in artists:
+            self.artists.setdefault(artist, _Bucket()).add(song.song_id)
+        if genre:
+            self.genres.setdefault(genre, _Bucket()).add(song.song_id)
+
+    def _remove(self, song_id):
+        artists, genre = self.keys.pop(song_id, ((), ""))
+        for artist in artists:
+            self._discard(self.artists, artist, song_id)
+        if genre:
+            self._discard(self.genres, genre, song_id)
+
+    @staticmethod
+    def _discard(buckets, key, song_id):
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.discard(song_id)
+            if not bucket.ids:
+                del buckets[key]
+
+    # --- PROTOKOL INDEX ---
+    def song_added(self, song):
+        if self.built:
+            self._add(song)
+
+    def song_updated(self, song):
+        if self.built:
+            self._remove(song.song_id)
+            self._add(song)
+
+    def song_removed(self, song):
+        if self.built:
+            self._remove(song.song_id)
+
+    # --- QUERY ---
+    def pick_same_artist(self, song, rng):
+        """song_id acak yang berbagi artis dengan song (selain song itu sendiri), atau None."""
+        self.ensure_built()
+        buckets = [self.artists[a] for a in artist_keys(song.artist) if a in self.artists]
+        total = sum(len(b.ids) for b in buckets)
+        for _ in range(SIMILAR_PICK_TRIES if total else 0):
+            i = rng.randrange(total)
+            for bucket in buckets:
+                if i < len(bucket.ids):
+                    break
+                i -= len(bucket.ids)
+            if bucket.ids[i] != song.song_id:
+                return bucket.ids[i]
+        candidates = {s_id for b in buckets for s_id in b.ids if s_id != song.song_id}
+        return rng.choice(sorted(candidates)) if candidates else None
+
+    def pick_same_genre(self, song, rng):
+        """song_id acak bergenre sama tetapi tanpa artis yang sama, atau None."""
+        self.ensure_built()
+        bucket = self.genres.get(genre_key(song.genre))
+        if bucket is None:
+            return None
+        artists = set(artist_keys(song.artist))
+        for _ in range(SIMILAR_PICK_TRIES):
+            s_id = rng.choice(bucket.ids)
+            if not artists.intersection(self.keys[s_id][0]):
+                return s_id
+        candidates = [s_id for s_id in bucket.ids if not artists.intersection(self.keys[s_id][0])]
+        return rng.choice(candidates) if candidates else None
@@ -0,0 +1,283 @@
+"""
+Blue Mood - Listening Events & Stats
+Log kejadian mendengarkan (append-only) + agregat yang diperbarui bertahap.
+
+Setiap sesi lagu menghasilkan event 'start', lalu 'skip' atau 'complete'
+beserta detik yang didengarkan. Event ditulis ke listening_events.log oleh
+PersistenceWriter (satu JSON per baris, banyak event per tulis). Agregat
+(jumlah putar per lagu, total per artis/genre/hari, top-k) disimpan berkala
+ke listening_stats.json bersama offset log, sehingga saat startup hanya
+ekor log setelah offset itu yang perlu diputar ulang.
+
+Event 'start' yang berurutan dalam satu sesi juga mengisi model
+co-listening (lagu A sering diputar bersebelahan dengan lagu B).
+"""
+
+import heapq
+import json
+import os
+import time
+
+LISTENING_LOG_FILE = "listening_events.log"
+LISTENING_STATS_FILE = "listening_stats.json"
+
+# Jumlah event sebelum agregat disimpan ulang ke file stats
+STATS_SNAPSHOT_EVERY = 200
+STATS_TOP_K = 50
+
+# Co-listening: dua lagu dianggap satu sesi jika jarak mulai putarnya tidak
+# lebih dari SESSION_GAP_SECONDS. Bobot pasangan meluruh setengahnya setiap
+# RELATED_HALF_LIFE_SECONDS; RELATED_TOP_K tetangga teratas dijaga per lagu.
+SESSION_GAP_SECONDS = 30 * 60
+RELATED_HALF_LIFE_SECONDS = 30 * 24 * 60 * 60
+RELATED_TOP_K = 20
+
+
+class TopK:
+    """
+    Top-k song_id berdasarkan jumlah putar (min-heap berukuran k).
+    Jumlah putar hanya bertambah, jadi lagu di luar heap cukup dibandingkan
+    dengan elemen terkecil.
+    """
+
+    def __init__(self, k=STATS_TOP_K):
+        self.k = k
+        self.heap = []  # (count, song_id)
+        self.members = set()
+
+    def update(self, song_id, count):
+        if song_id in self.members:
+            for i, (_, s_id) in enumerate(self.heap):
+                if s_id == song_id:
+                    self.heap[i] = (count, song_id)
+                    break
+            heapq.heapify(self.heap)
+        elif len(self.heap) < self.k:
+            heapq.heappush(self.heap, (count, song_id))
+            self.members.add(song_id)
+        elif count > self.heap[0][0]:
+            _, dropped = heapq.heapreplace(self.heap, (count, song_id))
+            self.members.discard(dropped)
+            self.members.add(song_id)
+
+    def rebuild(self, counts):
+        self.heap = heapq.nlargest(self.k, ((c, s_id) for s_id, c in counts.items()))
+        heapq.heapify(self.heap)
+        self.members = {s_id for _, s_id in self.heap}
+
+    def top(self, n):
+        return [s_id for _, s_id in sorted(self.heap, reverse=True)[:n]]
+
+
+class CoListening:
+    """
+    Matriks jarang song x song (dict per baris) berisi bobot pasangan lagu
+    yang diputar berurutan, dengan peluruhan waktu.
+
+    Peluruhan memakai 'forward decay': setiap tambahan diberi bobot
+    2^((ts - epoch) / half_life), sehingga entri lama tidak perlu diperbarui;
+    perbandingan di dalam satu baris tetap sama dengan bobot yang meluruh.
+    Bobot hanya bertambah, jadi top-k per baris cukup dijaga dengan TopK.
+    """
+
+    # Eksponen maksimum sebelum epoch digeser (semua bobot dibagi ulang)
+    MAX_EXPONENT = 60.0
+
+    def __init__(self, half_life=RELATED_HALF_LIFE_SECONDS, top_k=RELATED_TOP_K,
+                 session_gap=SESSION_GAP_SECONDS):
+        self.half_life = half_life
+        self.top_k = top_k
+        self.session_gap = session_gap
+        self.epoch = None
+        self.counts = {}  # song_id -> {song_id: bobot}
+        self.tops = {}  # song_id -> TopK baris itu
+        self.last_song = None
+        self.last_ts = None
+
+    def observe(self, song_id, ts):
+        """Mencatat satu mulai-putar; dipasangkan dengan lagu sebelumnya jika masih satu sesi."""
+        previous, previous_ts = self.last_song, self.last_ts
+        self.last_song, self.last_ts = song_id, ts
+        if previous is None or previous == song_id or ts - previous_ts > self.session_gap:
+            return
+        if self.epoch is None:
+            self.epoch = ts
+        exponent = (ts - self.epoch) / self.half_life
+        if exponent > self.MAX_EXPONENT:
+            self._rebase(ts)
+            exponent = 0.0
+        amount = 2.0 ** exponent
+        self._bump(previous, song_id, amount)
+        self._bump(song_id, previous, amount)
+
+    def _bump(self, a, b, amount):
+        row = self.counts.setdefault(a, {})
+        row[b] = row.get(b, 0.0) + amount
+        top = self.tops.get(a)
+        if top is None:
+            top = self.tops[a] = TopK(self.top_k)
+        top.update(b, row[b])
+
+    def _rebase(self, ts):
+        scale = 2.0 ** (-(ts - self.epoch) / self.half_life)
+        for row in self.counts.values():
+            for b in row:
+                row[b] *= scale
+        self.epoch = ts
+        self._rebuild_tops()
+
+    def _rebuild_tops(self):
+        self.tops = {}
+        for a, row in self.counts.items():
+            self.tops[a] = TopK(self.top_k)
+            self.tops[a].rebuild(row)
+
+    def top_related(self, song_id, k):
+        """Sampai k song_id yang paling sering diputar bersama song_id, terkuat lebih dulu."""
+        top = self.tops.get(song_id)
+        return top.top(k) if top is not None else []
+
+    def to_dict(self):
+        return {'epoch': self.epoch, 'counts': {a: dict(row) for a, row in self.counts.items()},
+                'last_song': self.last_song, 'last_ts': self.last_ts}
+
+    def load(self, data):
+        self.epoch = data.get('epoch')
+        self.counts = data.get('counts', {})
+        self.last_song = data.get('last_song')
+        self.last_ts = data.get('last_ts')
+        self._rebuild_tops()
+
+
+class ListeningStats:
+    """Agregat yang dibaca panel statistik dan rekomendasi tanpa membaca log."""
+
+    def __init__(self, top_k=STATS_TOP_K):
+        self.events = 0
+        self.song_plays = {}
+        self.song_skips = {}
+        self.song_completions = {}
+        self.song_seconds = {}
+        self.artist_plays = {}
+        self.artist_seconds = {}
+        self.genre_plays = {}
+        self.genre_seconds = {}
+        self.daily_seconds = {}  # 'YYYY-MM-DD' -> detik
+        self.total_seconds = 0.0
+        self.top = TopK(top_k)
+        self.related = CoListening()
+
+    @staticmethod
+    def _bump(table, key, amount=1):
+        if key is not None:
+            table[key] = table.get(key, 0) + amount
+
+    def apply(self, event):
+        self.events += 1
+        song_id = event['song_id']
+        kind = event['type']
+        if kind == 'start':
+            self._bump(self.song_plays, song_id)
+            self._bump(self.artist_plays, event.get('artist'))
+            self._bump(self.genre_plays, event.get('genre'))
+            self.top.update(song_id, self.song_plays[song_id])
+            self.related.observe(song_id, event['ts'])
+            return
+        listened = event.get('listened', 0.0)
+        self._bump(self.song_skips if kind == 'skip' else self.song_completions, song_id)
+        self._bump(self.song_seconds, song_id, listened)
+        self._bump(self.artist_seconds, event.get('artist'), listened)
+        self._bump(self.genre_seconds, event.get('genre'), listened)
+        self._bump(self.daily_seconds, time.strftime('%Y-%m-%d', time.localtime(event['ts'])), listened)
+        self.total_seconds += listened
+
+    def play_count(self, song_id):
+        return self.song_plays.get(song_id, 0)
+
+    def top_songs(self, n):
+        return self.top.top(n)
+
+    def to_dict(self):
+        return {
+            'events': self.events,
+            'song_plays': dict(self.song_plays),
+            'song_skips': dict(self.song_skips),
+            'song_completions': dict(self.song_completions),
+            'song_seconds': dict(self.song_seconds),
+            'artist_plays': dict(self.artist_plays),
+            'artist_seconds': dict(self.artist_seconds),
+            'genre_plays': dict(self.genre_plays),
+            'genre_seconds': dict(self.genre_seconds),
+            'daily_seconds': dict(self.daily_seconds),
+            'total_seconds': self.total_seconds,
+            'co_listening': self.related.to_dict(),
+        }
+
+    def load(self, data):
+        for key, value in data.items():
+            if key not in ('log_offset', 'co_listening') and hasattr(self, key):
+                setattr(self, key, value)
+        self.top.rebuild(self.song_plays)
+        self.related.load(data.get('co_listening', {}))
+
+
+class ListeningLog:
+    """
+    File log event untuk PersistenceWriter (append_many dipanggil dari thread writer).
+    Record {'op': 'stats', ...} tidak masuk log: isinya ditulis ke file stats
+    bersama offset byte log pada titik itu.
+    """
+
+    def __init__(self, log_file=LISTENING_LOG_FILE, stats_file=LISTENING_STATS_FILE):
+        self.log_file = log_file
+        self.stats_file = stats_file
+
+    def load(self):
+        """Mengembalikan (stats_dict, list_event) yang belum tercakup stats."""
+        stats = {}
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, 'r') as f:
+                    stats = json.load(f)
+            except ValueError:
+                print("Stats: file rusak, agregat dibangun ulang dari log.")
+        offset = stats.get('log_offset', 0)
+        log_size = os.path.getsize(self.log_file) if os.path.exists(self.log_file) else 0
+        if offset > log_size:
+            print("Stats: log lebih pendek dari offset, agregat dibangun ulang dari log.")
+            stats, offset = {}, 0
+        events = []
+        if log_size:
+            with open(self.log_file, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue  # Baris terakhir bisa terpotong
+        return stats, events
+
+    def append_many(self, records):
+        with open(self.log_file, 'ab') as f:
+            for record in records:
+                if record.get('op') == 'stats':
+                    f.flush()
+                    self._write_stats(record['stats'], f.tell())
+                    continue
+                f.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b"\n")
+
+    def _write_stats(self, stats, log_offset):
+        stats['log_offset'] = log_offset
+        tmp_path = self.stats_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, self.stats_file)
+
+    def needs_compaction(self, unwritten=0):
+        return False  # Log tidak pernah dipadatkan; agregat disimpan lewat record 'stats'
+
+    def compact(self, snapshot):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,103 @@
+"""
+Blue Mood - Memory Report
+Membandingkan pemakaian memori layout Song/Node lama (__dict__, list
+playlist_nodes per lagu, string duplikat) dengan layout baru (__slots__,
+tabel simbol bersama, playlist_nodes lazy).
+
+Pemakaian:
+    python memory_report.py                # 10k, 100k, 1M lagu
+    python memory_report.py 10000 50000    # ukuran sendiri
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import backend
+from backend import Song, Node
+
+GENRES = ["Pop", "R&B", "Rock", "K-Pop", "Jazz", "Blues", "Ambient", "Indie", "Hip-Hop", "EDM"]
+PLAYLIST_RATIO = 0.05  # Sebagian kecil lagu yang masuk playlist
+
+
+class LegacySong:
+    """Salinan layout Song sebelum memakai __slots__."""
+
+    def __init__(self, song_id, title, artist, album, genre, duration_seconds, file_path,
+                 image_path):
+        self.song_id = song_id
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.genre = genre
+        self.duration_seconds = duration_seconds
+        self.file_path = file_path
+        self.image_path = image_path
+        self.playlist_nodes = []
+
+
+class LegacyNode:
+    def __init__(self, song_object):
+        self.song = song_object
+        self.next = None
+        self.prev = None
+
+
+def _song_fields(i, n):
+    # Setiap string dibuat baru, seperti hasil json.load untuk setiap entri
+    artist_no = i % max(1, n // 20)
+    album_no = i % max(1, n // 10)
+    return dict(
+        song_id=f"S{i:07d}",
+        title=f"Track {i}",
+        artist="".join(["Artist ", str(artist_no)]),
+        album="".join(["Album ", str(album_no)]),
+        genre="".join([GENRES[i % len(GENRES)]]),
+        duration_seconds=180 + i % 120,
+        file_path=f"music/{i}.mp3",
+        image_path="".join(["art/", str(album_no), ".png"]),
+    )
+
+
+def _build(n, song_cls, node_cls, legacy):
+    library = {}
+    nodes = []
+    step = int(1 / PLAYLIST_RATIO)
+    for i in range(n):
+        song = song_cls(**_song_fields(i, n))
+        library[song.song_id] = song
+        if i % step == 0:
+            node = node_cls(song)
+            if legacy:
+                song.playlist_nodes.append(node)
+            else:
+                song.add_playlist_node(node)
+            nodes.append(node)
+    return library, nodes
+
+
+def measure(n, song_cls, node_cls, legacy):
+    backend._symbol_table.clear()  # Tabel simbol ikut dihitung sebagai biaya layout baru
+    gc.collect()
+    tracemalloc.start()
+    data = _build(n, song_cls, node_cls, legacy)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    gc.collect()
+    return current
+
+
+def main(sizes):
+    print(f"{'Lagu':>10} | {'Layout lama':>12} | {'Layout baru':>12} | {'Hemat':>6}")
+    print("-" * 50)
+    for n in sizes:
+        old = measure(n, LegacySong, LegacyNode, legacy=True)
+        new = measure(n, Song, Node, legacy=False)
+        saving = 100.0 * (old - new) / old if old else 0.0
+        print(f"{n:>10,} | {old / 2 ** 20:>9.1f} MB | {new / 2 ** 20:>9.1f} MB | {saving:>5.1f}%")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    main(sizes)
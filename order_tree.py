@@ -0,0 +1,195 @@
+"""
+Blue Mood - Order Statistic Tree (Implicit Treap)
+Index posisi untuk playlist DoublyLinkedList.
+
+Setiap Node playlist juga menjadi simpul treap (left, right, parent,
+priority, size). Urutan in-order treap = urutan playlist, dan 'size'
+(jumlah simpul di subtree) membuat akses berdasarkan posisi, sisip di
+tengah, hapus dan pindah berjalan dalam O(log n).
+Pointer next/prev milik Node tetap dipakai untuk play_next/play_prev.
+
+Treap yang sama juga dipakai sebagai pohon terurut berdasarkan key
+(SortedViews di indexes.py): posisi sisip dicari dengan count_less lalu
+split/merge seperti biasa.
+"""
+
+import random
+
+
+def _size(t):
+    return t.size if t is not None else 0
+
+
+def _pull(t):
+    t.size = 1 + _size(t.left) + _size(t.right)
+    if t.left is not None:
+        t.left.parent = t
+    if t.right is not None:
+        t.right.parent = t
+
+
+def init_tree_node(node):
+    node.left = None
+    node.right = None
+    node.parent = None
+    node.priority = random.random()
+    node.size = 1
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        _pull(a)
+        return a
+    b.left = _merge(a, b.left)
+    _pull(b)
+    return b
+
+
+def _split(t, k):
+    """Memisahkan k simpul pertama (kiri) dari sisanya (kanan)."""
+    if t is None:
+        return None, None
+    if _size(t.left) >= k:
+        left, right = _split(t.left, k)
+        t.left = right
+        _pull(t)
+        return left, t
+    left, right = _split(t.right, k - _size(t.left) - 1)
+    t.right = left
+    _pull(t)
+    return t, right
+
+
+def _as_root(t):
+    if t is not None:
+        t.parent = None
+    return t
+
+
+def merge(a, b):
+    return _as_root(_merge(a, b))
+
+
+def split(t, k):
+    left, right = _split(t, k)
+    return _as_root(left), _as_root(right)
+
+
+def node_at(root, index):
+    """Simpul ke-index (0-based), turun berdasarkan ukuran subtree."""
+    t = root
+    while t is not None:
+        left_size = _size(t.left)
+        if index < left_size:
+            t = t.left
+        elif index == left_size:
+            return t
+        else:
+            index -= left_size + 1
+            t = t.right
+    raise IndexError("Posisi di luar jangkauan playlist.")
+
+
+def rank(node):
+    """Posisi (0-based) simpul di dalam playlist, naik lewat pointer parent."""
+    r = _size(node.left)
+    while node.parent is not None:
+        if node is node.parent.right:
+            r += _size(node.parent.left) + 1
+        node = node.parent
+    return r
+
+
+def remove(root, node):
+    """Melepas satu simpul dari treap. Mengembalikan root baru."""
+    replacement = _merge(node.left, node.right)
+    parent = node.parent
+    if replacement is not None:
+        replacement.parent = parent
+    if parent is None:
+        root = replacement
+    elif parent.left is node:
+        parent.left = replacement
+    else:
+        parent.right = replacement
+    while parent is not None:
+        parent.size -= 1
+        parent = parent.parent
+    init_tree_node(node)
+    return root
+
+
+def build(nodes):
+    """Membangun treap dari list simpul terurut dalam O(k) (Cartesian tree dengan stack)."""
+    stack = []
+    for node in nodes:
+        last = None
+        while stack and stack[-1].priority < node.priority:
+            last = stack.pop()
+        node.left = last
+        if last is not None:
+            last.parent = node
+        if stack:
+            stack[-1].right = node
+            node.parent = stack[-1]
+        stack.append(node)
+    if not stack:
+        return None
+    root = stack[0]
+    root.parent = None
+
+    # Hitung ukuran subtree secara post-order (iteratif)
+    order = []
+    todo = [root]
+    while todo:
+        t = todo.pop()
+        order.append(t)
+        if t.left is not None:
+            todo.append(t.left)
+        if t.right is not None:
+            todo.append(t.right)
+    for t in reversed(order):
+        t.size = 1 + _size(t.left) + _size(t.right)
+    return root
+
+
+def count_less(root, key):
+    """Jumlah simpul dengan node.key < key (untuk treap yang diurutkan berdasarkan key)."""
+    r = 0
+    t = root
+    while t is not None:
+        if t.key < key:
+            r += _size(t.left) + 1
+            t = t.right
+        else:
+            t = t.left
+    return r
+
+
+def successor(node):
+    """Simpul berikutnya dalam urutan in-order (None jika node yang terakhir)."""
+    if node.right is not None:
+        node = node.right
+        while node.left is not None:
+            node = node.left
+        return node
+    while node.parent is not None and node is node.parent.right:
+        node = node.parent
+    return node.parent
+
+
+def predecessor(node):
+    """Simpul sebelumnya dalam urutan in-order (None jika node yang pertama)."""
+    if node.left is not None:
+        node = node.left
+        while node.right is not None:
+            node = node.right
+        return node
+    while node.parent is not None and node is node.parent.left:
+        node = node.parent
+    return node.parent
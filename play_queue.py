@@ -0,0 +1,98 @@
+"""
+Blue Mood - Play Queue ("Up Next")
+Antrean lagu eksplisit yang diputar sebelum lagu dari konteks (playlist/library).
+
+Setiap entri punya handle integer yang stabil (juga setelah restart), sehingga
+GUI bisa menghapus satu entri tertentu walaupun lagu yang sama diantrekan
+lebih dari sekali. Antrean disimpan sebagai deque handle; entri yang dihapus
+hanya dilepas dari dict (tombstone) lalu dilewati saat pop/peek.
+"""
+
+from collections import deque
+
+
+class PlayQueue:
+    def __init__(self):
+        self.handles = deque()  # Urutan putar (bisa berisi handle yang sudah dihapus)
+        self.entries = {}  # handle -> song_id (hanya entri yang masih hidup)
+        self.next_handle = 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _new_handle(self, handle):
+        if handle is None:
+            handle = self.next_handle
+        self.next_handle = max(self.next_handle, handle + 1)
+        return handle
+
+    def enqueue(self, song_id, handle=None):
+        """Menambahkan lagu di akhir antrean (O(1)). Mengembalikan handle entri."""
+        handle = self._new_handle(handle)
+        self.handles.append(handle)
+        self.entries[handle] = song_id
+        return handle
+
+    def enqueue_next(self, song_id, handle=None):
+        """Menyisipkan lagu di depan antrean: diputar setelah lagu saat ini (O(1))."""
+        handle = self._new_handle(handle)
+        self.handles.appendleft(handle)
+        self.entries[handle] = song_id
+        return handle
+
+    def remove(self, handle):
+        """Menghapus satu entri berdasarkan handle (O(1))."""
+        if self.entries.pop(handle, None) is None:
+            return False
+        if len(self.handles) > 2 * len(self.entries) + 32:
+            self._compact()
+        return True
+
+    def remove_song(self, song_id):
+        """Menghapus semua entri untuk lagu ini (dipakai saat lagu dihapus dari library)."""
+        handles = [h for h, s_id in self.entries.items() if s_id == song_id]
+        for handle in handles:
+            self.remove(handle)
+        return handles
+
+    def _skip_dead(self):
+        while self.handles and self.handles[0] not in self.entries:
+            self.handles.popleft()
+
+    def pop(self):
+        """(handle, song_id) berikutnya dan mengeluarkannya dari antrean, atau None jika kosong."""
+        self._skip_dead()
+        if not self.handles:
+            return None
+        handle = self.handles.popleft()
+        return handle, self.entries.pop(handle)
+
+    def peek(self, n):
+        """Hingga n entri berikutnya sebagai list (handle, song_id), tanpa mengubah antrean."""
+        self._skip_dead()
+        result = []
+        for handle in self.handles:
+            if len(result) >= n:
+                break
+            song_id = self.entries.get(handle)
+            if song_id is not None:
+                result.append((handle, song_id))
+        return result
+
+    def clear(self):
+        self.handles.clear()
+        self.entries.clear()
+
+    def _compact(self):
+        self.handles = deque(h for h in self.handles if h in self.entries)
+
+    # --- PERSISTENSI ---
+    def to_dict(self):
+        return {'next_handle': self.next_handle,
+                'items': [[h, self.entries[h]] for h in self.handles if h in self.entries]}
+
+    def load(self, data):
+        self.clear()
+        for handle, song_id in data.get('items', []):
+            self.enqueue(song_id, handle=handle)
+        self.next_handle = max(self.next_handle, data.get('next_handle', 1))
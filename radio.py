@@ -0,0 +1,147 @@
+"""
+Blue Mood - Radio
+"Radio dari lagu ini": antrean lagu berikutnya yang disiapkan lebih dulu.
+
+Thread latar mengisi antrean sampai RADIO_LOOKAHEAD lagu setiap kali isinya
+turun di bawah RADIO_REFILL_AT, sehingga Next/Skip cukup mengambil lagu
+terdepan. Setiap lagu dipilih dari kandidat yang mirip dengan lagu seed dan
+lagu terakhir di antrean, dengan penalti untuk artis yang baru saja muncul
+dan tanpa lagu yang ada di jendela anti-ulang.
+"""
+
+import random
+import threading
+from collections import deque
+
+RADIO_LOOKAHEAD = 20
+RADIO_REFILL_AT = 5
+# Lagu yang sudah diputar/diantrekan tidak muncul lagi dalam jendela ini
+RADIO_NO_REPEAT = 100
+# Artis yang muncul di RADIO_ARTIST_WINDOW lagu terakhir diberi penalti skor
+RADIO_ARTIST_WINDOW = 4
+RADIO_ARTIST_PENALTY = 0.2
+# Lagu berikutnya diundi dari sejumlah kandidat terbaik ini (bobot = skor)
+RADIO_PICK_FROM = 8
+# Bobot kemiripan terhadap lagu seed dibanding lagu terakhir di antrean
+RADIO_SEED_WEIGHT = 0.5
+
+
+class RadioStation:
+    def __init__(self, seed_id, candidates_fn, artist_fn, exists_fn, seed=None):
+        self.seed_id = seed_id
+        self.candidates_fn = candidates_fn  # song_id -> {song_id: skor kemiripan}
+        self.artist_fn = artist_fn  # song_id -> kunci artis (untuk keragaman)
+        self.exists_fn = exists_fn  # song_id -> masih ada di library?
+        self.rng = random.Random(seed)
+        self.upcoming = deque()
+        self.played = [seed_id]  # Riwayat stasiun (untuk Prev)
+        self._recent = deque([seed_id])
+        self._recent_set = {seed_id}
+        self._artists = deque([artist_fn(seed_id)], maxlen=RADIO_ARTIST_WINDOW)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._wakeup.set()
+
+    def next(self):
+        """Lagu berikutnya (O(1) jika antrean sudah terisi), atau None jika tidak ada kandidat."""
+        with self._lock:
+            while self.upcoming and not self.exists_fn(self.upcoming[0]):
+                self.upcoming.popleft()  # Dihapus dari library setelah diantrekan
+            song_id = self.upcoming.popleft() if self.upcoming else None
+        if song_id is None:
+            # Antrean kosong (thread belum sempat mengisi): pilih langsung
+            song_id = self._generate_one()
+        with self._lock:
+            if song_id is not None:
+                if self.upcoming and self.upcoming[0] == song_id:
+                    self.upcoming.popleft()  # Ikut terisi oleh thread latar
+                self.played.append(song_id)
+            refill = len(self.upcoming) < RADIO_REFILL_AT
+        if refill:
+            self._wakeup.set()
+        return song_id
+
+    def prev(self):
+        """Lagu stasiun sebelumnya; lagu saat ini dikembalikan ke depan antrean."""
+        with self._lock:
+            if len(self.played) < 2:
+                return None
+            self.upcoming.appendleft(self.played.pop())
+            return self.played[-1]
+
+    def peek(self, n):
+        with self._lock:
+            return list(self.upcoming)[:n]
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            while not self._stopping:
+                with self._lock:
+                    full = len(self.upcoming) >= RADIO_LOOKAHEAD
+                if full:
+                    break
+                try:
+                    song_id = self._generate_one(append=True)
+                except Exception as e:
+                    # Thread tetap hidup; pengisian dicoba lagi saat Next berikutnya
+                    print(f"Radio: gagal menyiapkan lagu berikutnya: {e}")
+                    break
+                if song_id is None:
+                    break
+            if self._stopping:
+                return
+
+    # --- GENERATOR ---
+    def _remember(self, song_id):
+        self._recent.append(song_id)
+        self._recent_set.add(song_id)
+        if len(self._recent) > RADIO_NO_REPEAT:
+            self._recent_set.discard(self._recent.popleft())
+        self._artists.append(self.artist_fn(song_id))
+
+    def _generate_one(self, append=False):
+        """
+        Memilih satu lagu setelah lagu terakhir di antrean. Kandidat dihitung di luar
+        lock (bisa memakan beberapa milidetik); pemilihan diulang jika antrean
+        berubah sementara itu.
+        """
+        while True:
+            with self._lock:
+                anchor = self.upcoming[-1] if self.upcoming else self.played[-1]
+            scores = dict(self.candidates_fn(anchor))
+            if anchor != self.seed_id:
+                for song_id, score in self.candidates_fn(self.seed_id).items():
+                    scores[song_id] = scores.get(song_id, 0.0) + RADIO_SEED_WEIGHT * score
+            with self._lock:
+                if anchor != (self.upcoming[-1] if self.upcoming else self.played[-1]):
+                    continue
+                song_id = self._pick(scores)
+                if song_id is not None:
+                    self._remember(song_id)
+                    if append:
+                        self.upcoming.append(song_id)
+                return song_id
+
+    def _pick(self, scores):
+        recent_artists = set(self._artists)
+        ranked = []
+        for song_id, score in scores.items():
+            if song_id in self._recent_set or not self.exists_fn(song_id):
+                continue
+            if self.artist_fn(song_id) in recent_artists:
+                score *= RADIO_ARTIST_PENALTY
+            ranked.append((max(score, 1e-9), song_id))
+        if not ranked:
+            return None
+        ranked.sort(reverse=True)
+        ranked = ranked[:RADIO_PICK_FROM]
+        return self.rng.choices([s_id for _, s_id in ranked], weights=[score for score, _ in ranked])[0]
@@ -0,0 +1,134 @@
+"""
+Blue Mood - Search Worker, Ranking & Query Language
+Menjalankan query pencarian di thread terpisah agar GUI tetap responsif,
+memotong hasil berperingkat menjadi halaman top-k, dan mem-parse query
+terstruktur (genre:rock artist:"x" dur:<240 fav:yes).
+
+Hanya permintaan terbaru yang dijalankan: permintaan yang belum sempat
+diproses akan digantikan (dibatalkan) oleh ketikan berikutnya. Setiap hasil
+membawa nomor generasi, sehingga GUI bisa membuang hasil yang sudah basi.
+"""
+
+import heapq
+import queue
+import shlex
+import threading
+
+
+class SearchWorker:
+    def __init__(self, search_fn):
+        self.search_fn = search_fn  # (query, limit) -> list song_id
+        self.results = queue.Queue()  # (generation, query, list song_id), dibaca thread GUI
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, generation, query, limit):
+        """Menjadwalkan query; permintaan lama yang belum berjalan dibatalkan."""
+        with self._lock:
+            self._pending = (generation, query, limit)
+        self._wakeup.set()
+
+    def cancel(self):
+        with self._lock:
+            self._pending = None
+
+    def stop(self):
+        self._stopping = True
+        self.cancel()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            with self._lock:
+                request = self._pending
+                self._pending = None
+            if request is None:
+                continue
+            generation, query, limit = request
+            try:
+                ids = self.search_fn(query, limit)
+            except Exception as e:
+                print(f"Error pencarian: {e}")
+                ids = []
+            self.results.put((generation, query, ids))
+
+
+def top_k_page(scores, order, limit, cursor=None):
+    """
+    Satu halaman hasil berperingkat dengan heapq (tanpa mengurutkan semua kandidat).
+    scores: {song_id: skor}, order: {song_id: urutan library} sebagai pemecah seri.
+    cursor: kunci item terakhir halaman sebelumnya (None = halaman pertama).
+    Mengembalikan (list song_id, cursor berikutnya atau None jika sudah habis).
+    """
+    keys = ((-score, order.get(song_id, 0), song_id) for song_id, score in scores.items())
+    if cursor is not None:
+        cursor = tuple(cursor)
+        keys = (key for key in keys if key > cursor)
+    page = heapq.nsmallest(limit + 1, keys)
+    next_cursor = page[limit - 1] if len(page) > limit else None
+    return [key[2] for key in page[:limit]], next_cursor
+
+
+# ==============================================================================
+# BAHASA QUERY: genre:rock artist:"the beatles" dur:<240 fav:yes
+# ==============================================================================
+QUERY_FIELDS = ('genre', 'artist', 'album', 'dur', 'fav')
+
+
+def _parse_duration(value):
+    """'<240', '<=240', '>180', '>=180', '180-240' atau '200' -> (low, high) dalam detik."""
+    try:
+        if value.startswith('<='):
+            return None, int(value[2:])
+        if value.startswith('<'):
+            return None, int(value[1:]) - 1
+        if value.startswith('>='):
+            return int(value[2:]), None
+        if value.startswith('>'):
+            return int(value[1:]) + 1, None
+        if '-' in value:
+            low, high = value.split('-', 1)
+            return int(low), int(high)
+        return int(value), int(value)
+    except ValueError:
+        raise ValueError(f"Durasi tidak valid: '{value}'")
+
+
+def parse_query(text):
+    """
+    Mengubah teks query menjadi list term (negasi, field, nilai).
+    field None = kata bebas (dicari sebagai substring). Awalan '-' menegasikan term.
+    Field yang tidak dikenal diperlakukan sebagai kata bebas; nilai dur/fav yang
+    tidak valid melempar ValueError.
+    """
+    try:
+        parts = shlex.split(text)
+    except ValueError:
+        parts = text.split()  # Tanda kutip tidak seimbang
+    terms = []
+    for part in parts:
+        negate = part.startswith('-') and len(part) > 1
+        if negate:
+            part = part[1:]
+        field, sep, value = part.partition(':')
+        field = field.lower()
+        if not sep or field not in QUERY_FIELDS:
+            terms.append((negate, None, part))
+            continue
+        if field == 'dur':
+            value = _parse_duration(value)
+        elif field == 'fav':
+            if value.lower() not in ('yes', 'no', 'ya', 'tidak'):
+                raise ValueError(f"Nilai fav harus yes/no, bukan '{value}'")
+            negate = negate != (value.lower() in ('no', 'tidak'))
+            value = True
+        terms.append((negate, field, value))
+    return terms
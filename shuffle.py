@@ -0,0 +1,284 @@
+"""
+Blue Mood - Shuffle Engine
+Urutan acak tanpa pengulangan untuk mode Shuffle.
+
+Permutasi Fisher-Yates dibuat sekali per konteks (playlist atau library),
+lalu next/prev hanya menggeser kursor di atas permutasi itu (O(1)).
+Lagu yang ditambah atau dihapus ditambal langsung ke permutasi tanpa
+mengacak ulang semuanya.
+"""
+
+import random
+
+
+class ShuffleOrder:
+    """
+    Permutasi song_id + kursor.
+    order[:cursor+1] adalah riwayat (yang sudah diputar), sisanya antrean acak.
+    Lagu yang dihapus dari riwayat ditandai None (tombstone) agar urutan
+    riwayat untuk prev tidak berubah.
+    """
+
+    def __init__(self, song_ids, seed=None, first_id=None):
+        self.rng = random.Random(seed)
+        self.order = []
+        self.position = {}  # song_id -> indeks di order
+        self.cursor = -1
+        self.tombstones = 0
+        self._fill(song_ids, first_id)
+
+    def _fill(self, song_ids, first_id=None):
+        order = list(dict.fromkeys(song_ids))
+        # Fisher-Yates
+        for i in range(len(order) - 1, 0, -1):
+            j = self.rng.randint(0, i)
+            order[i], order[j] = order[j], order[i]
+        self.order = order
+        self.position = {song_id: i for i, song_id in enumerate(order)}
+        self.cursor = -1
+        self.tombstones = 0
+        if first_id is not None and first_id in self.position:
+            # Lagu yang sedang diputar menjadi awal riwayat
+            self._swap(0, self.position[first_id])
+            self.cursor = 0
+
+    def __len__(self):
+        return len(self.position)
+
+    def __contains__(self, song_id):
+        return song_id in self.position
+
+    def _swap(self, i, j):
+        a, b = self.order[i], self.order[j]
+        self.order[i], self.order[j] = b, a
+        if a is not None:
+            self.position[a] = j
+        if b is not None:
+            self.position[b] = i
+
+    def current(self):
+        if 0 <= self.cursor < len(self.order):
+            return self.order[self.cursor]
+        return None
+
+    def next(self):
+        """song_id berikutnya, atau None jika permutasi sudah habis."""
+        i = self.cursor + 1
+        while i < len(self.order) and self.order[i] is None:
+            i += 1
+        if i >= len(self.order):
+            return None
+        self.cursor = i
+        return self.order[i]
+
+    def peek_next(self):
+        """song_id yang akan dikembalikan next(), tanpa memajukan kursor."""
+        i = self.cursor + 1
+        while i < len(self.order) and self.order[i] is None:
+            i += 1
+        return self.order[i] if i < len(self.order) else None
+
+    def prev(self):
+        """song_id sebelumnya di riwayat, atau None jika sudah di awal."""
+        i = self.cursor - 1
+        while i >= 0 and self.order[i] is None:
+            i -= 1
+        if i < 0:
+            return None
+        self.cursor = i
+        return self.order[i]
+
+    def seek(self, song_id):
+        """Menjadikan song_id lagu saat ini (dipakai saat user memilih lagu sendiri)."""
+        pos = self.position.get(song_id)
+        if pos is None or pos == self.cursor:
+            return
+        if pos > self.cursor:
+            # Lagu yang belum diputar ditukar ke slot berikutnya; sisa antrean tetap acak
+            self._swap(self.cursor + 1, pos)
+            self.cursor += 1
+        else:
+            # Lagu dari riwayat: mulai putaran baru dari lagu ini
+            self.reshuffle(first_id=song_id)
+
+    def reshuffle(self, first_id=None, avoid_id=None):
+        """Permutasi baru (mis. saat repeat 'all' berputar). avoid_id tidak dipilih sebagai lagu pertama."""
+        self._fill([s for s in self.order if s is not None], first_id)
+        if first_id is None and avoid_id is not None and len(self.order) > 1 and self.order[0] == avoid_id:
+            self._swap(0, self.rng.randint(1, len(self.order) - 1))
+
+    def add(self, song_id):
+        """Menyisipkan lagu baru di posisi acak pada antrean yang belum diputar (O(1))."""
+        if song_id in self.position:
+            return
+        self.order.append(song_id)
+        last = len(self.order) - 1
+        self.position[song_id] = last
+        self._swap(last, self.rng.randint(self.cursor + 1, last))
+
+    def remove(self, song_id):
+        """Mengeluarkan lagu dari permutasi (O(1) amortized)."""
+        pos = self.position.pop(song_id, None)
+        if pos is None:
+            return
+        if pos > self.cursor:
+            # Antrean: tukar dengan elemen terakhir lalu buang ekor
+            last = len(self.order) - 1
+            self._swap(pos, last)
+            self.position.pop(song_id, None)
+            self.order.pop()
+            return
+        self.order[pos] = None
+        self.tombstones += 1
+        if self.tombstones > len(self.order) // 2:
+            self._compact()
+
+    def _compact(self):
+        cursor_id = self.current()
+        shift = sum(1 for s in self.order[:self.cursor + 1] if s is None)
+        self.order = [s for s in self.order if s is not None]
+        self.position = {song_id: i for i, song_id in enumerate(self.order)}
+        self.cursor = self.position[cursor_id] if cursor_id is not None else self.cursor - shift
+        self.tombstones = 0
+
+
+# ==============================================================================
+# WEIGHTED SHUFFLE (Alias Table, metode Vose)
+# ==============================================================================
+class WeightedShuffle:
+    """
+    Sampling lagu berbobot dalam O(1) per pilihan.
+
+    Tabel alias dibangun dari bobot dasar setiap lagu (favorit, jumlah putar).
+    Bobot di tabel diperlakukan sebagai batas atas: lagu terpilih diterima
+    dengan peluang bobot_sekarang / batas_atas (rejection sampling), sehingga
+    bobot yang turun (lagu baru diputar, dihapus, batal favorit) tidak perlu
+    membangun ulang tabel. Bobot yang naik ditampung di kolam 'overflow'
+    kecil; tabel baru dibangun ulang jika kolam itu penuh atau peluang
+    penerimaan turun di bawah separuh.
+
+    Mengikuti protokol index library (song_added, song_updated, song_removed).
+    """
+
+    OVERFLOW_LIMIT = 64
+    MAX_TRIES = 64
+
+    def __init__(self, ids_fn, base_weight_fn, recency_fn, seed=None):
+        self.ids_fn = ids_fn  # Sumber song_id saat tabel dibangun
+        self.base_weight_fn = base_weight_fn  # song_id -> bobot dasar (tanpa faktor waktu)
+        self.recency_fn = recency_fn  # (song_id, now) -> faktor 0..1 berdasarkan waktu terakhir diputar
+        self.rng = random.Random(seed)
+        self.built = False
+        self.rebuilds = 0
+
+    def build(self):
+        self.base = {}  # song_id -> bobot dasar saat ini
+        self.cap = {}  # song_id -> batas atas (tabel + overflow)
+        for song_id in self.ids_fn():
+            weight = self.base_weight_fn(song_id)
+            if weight > 0:
+                self.base[song_id] = weight
+        self._build_table()
+        self.built = True
+
+    def _build_table(self):
+        ids = list(self.base)
+        weights = [self.base[song_id] for song_id in ids]
+        n = len(ids)
+        total = sum(weights)
+        self.ids = ids
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        self.cap = dict(self.base)
+        self.table_total = total
+        self.base_total = total
+        self.overflow = []  # list (song_id, kelebihan bobot)
+        self.overflow_total = 0.0
+        self.rebuilds += 1
+        if n == 0 or total <= 0:
+            return
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Sisa (karena pembulatan float) bernilai 1
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def release(self):
+        """Melepas tabel saat weighted shuffle tidak dipakai; pick() berikutnya membangun ulang."""
+        self.built = False
+        self.base = self.cap = None
+        self.ids = self.prob = self.alias = self.overflow = None
+
+    # --- PEMBARUAN BOBOT ---
+    def update(self, song_id):
+        """Menghitung ulang bobot dasar satu lagu setelah sinyalnya berubah."""
+        if not self.built:
+            return
+        weight = self.base_weight_fn(song_id)
+        self.base_total += weight - self.base.get(song_id, 0.0)
+        if weight > 0:
+            self.base[song_id] = weight
+        else:
+            self.base.pop(song_id, None)
+        cap = self.cap.get(song_id, 0.0)
+        if weight > cap:
+            self.overflow.append((song_id, weight - cap))
+            self.overflow_total += weight - cap
+            self.cap[song_id] = weight
+
+    def song_added(self, song):
+        self.update(song.song_id)
+
+    def song_updated(self, song):
+        pass  # Metadata tidak memengaruhi bobot
+
+    def song_removed(self, song):
+        if not self.built:
+            return
+        self.base_total -= self.base.pop(song.song_id, 0.0)
+
+    def _needs_rebuild(self):
+        capacity = self.table_total + self.overflow_total
+        return len(self.overflow) > self.OVERFLOW_LIMIT or self.base_total < capacity / 2
+
+    # --- SAMPLING ---
+    def _propose(self):
+        if self.overflow and self.rng.random() * (self.table_total + self.overflow_total) >= self.table_total:
+            target = self.rng.random() * self.overflow_total
+            for song_id, excess in self.overflow:
+                target -= excess
+                if target < 0:
+                    return song_id
+            return self.overflow[-1][0]
+        i = self.rng.randrange(len(self.ids))
+        return self.ids[i] if self.rng.random() < self.prob[i] else self.ids[self.alias[i]]
+
+    def pick(self, now, exclude=None):
+        """song_id terpilih sebanding dengan bobotnya, atau None jika library kosong."""
+        self.ensure_built()
+        if self._needs_rebuild():
+            self._build_table()
+        if not self.ids and not self.overflow:
+            return None
+        fallback = None
+        for _ in range(self.MAX_TRIES):
+            song_id = self._propose()
+            weight = self.base.get(song_id)
+            if weight is None or song_id == exclude:
+                continue
+            fallback = song_id
+            if self.rng.random() * self.cap[song_id] < weight * self.recency_fn(song_id, now):
+                return song_id
+        return fallback
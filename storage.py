@@ -0,0 +1,572 @@
+"""
+Blue Mood - Storage Layer
+Snapshot JSON (music_data.json) + Journal mutasi append-only, database
+SQLite (music_data.db), atau katalog biner mmap (music_data.cat) untuk
+library besar.
+
+Setiap perubahan kecil (favorit, playlist, CRUD admin) cukup ditulis sebagai
+satu baris record di file journal, sehingga biaya tulis tidak bergantung pada
+ukuran library. Secara berkala journal dipadatkan (compaction) menjadi
+snapshot baru. Penulisan ke disk dilakukan oleh thread writer terpisah yang
+menggabungkan (coalesce) banyak perubahan menjadi satu kali tulis.
+
+Kedua store memakai format record yang sama, sehingga MusicPlayer tidak perlu
+tahu backend mana yang sedang dipakai.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from binary_catalog import CATALOG_FILE, BinaryCatalog, snapshot_extra, write_catalog
+from history import HISTORY_DEPTH
+
+JOURNAL_FILE = "music_data.journal"
+DB_FILE = "music_data.db"
+
+# Kompres string pool katalog biner dengan zlib (file lebih kecil, startup sedikit lebih lambat)
+BINARY_CATALOG_ZLIB = False
+
+# Jumlah record journal sebelum dipadatkan menjadi snapshot baru
+COMPACT_EVERY = 500
+
+# Jendela penggabungan tulis (detik) untuk PersistenceWriter
+WRITE_COALESCE_SECONDS = 0.5
+# Tulis yang gagal dicoba ulang otomatis sebanyak ini, dengan jeda yang berlipat dua
+WRITE_RETRY_LIMIT = 5
+WRITE_RETRY_BACKOFF_SECONDS = 1.0
+WRITE_RETRY_MAX_BACKOFF_SECONDS = 30.0
+
+
+class JsonJournalStore:
+    """Snapshot JSON lengkap + journal record mutasi (satu JSON per baris)."""
+
+    def __init__(self, data_file, journal_file=JOURNAL_FILE, compact_every=COMPACT_EVERY):
+        self.data_file = data_file
+        self.journal_file = journal_file
+        self.compact_every = compact_every
+        self.seq = 0  # Nomor urut record terakhir yang ditulis
+        self.pending_records = 0  # Record di journal sejak snapshot terakhir
+
+    def has_data(self):
+        return os.path.exists(self.data_file) or os.path.exists(self.journal_file)
+
+    def load(self):
+        """Mengembalikan (snapshot_dict, list_record) yang belum masuk snapshot."""
+        snapshot = self._read_snapshot()
+        records = self._read_journal(snapshot.get('journal_seq', 0))
+        return snapshot, records
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.data_file):
+            return {}
+        with open(self.data_file, 'r') as f:
+            return json.load(f)
+
+    def _read_journal(self, snapshot_seq):
+        self.seq = snapshot_seq
+        records = []
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Baris terakhir bisa terpotong jika aplikasi mati saat menulis
+                        print("Journal: record rusak dilewati.")
+                        continue
+                    # Record yang sudah tercakup snapshot tidak diputar ulang
+                    if record.get('seq', 0) <= snapshot_seq:
+                        continue
+                    records.append(record)
+                    self.seq = max(self.seq, record.get('seq', 0))
+        self.pending_records = len(records)
+        return records
+
+    def append(self, record):
+        """Menambahkan satu record mutasi ke akhir journal (O(1))."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        if not records:
+            return
+        lines = []
+        for record in records:
+            self.seq += 1
+            record['seq'] = self.seq
+            lines.append(json.dumps(record, separators=(',', ':')))
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+        self.pending_records += len(records)
+
+    def needs_compaction(self, unwritten=0):
+        return self.pending_records + unwritten >= self.compact_every
+
+    def compact(self, snapshot):
+        """Menulis snapshot penuh secara atomik lalu mengosongkan journal."""
+        snapshot['journal_seq'] = self.seq
+        self._write_snapshot(snapshot)
+        # Jika langkah ini gagal, record lama tetap aman karena seq <= journal_seq
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self.pending_records = 0
+
+    def _write_snapshot(self, snapshot):
+        tmp_path = self.data_file + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=4)
+        os.replace(tmp_path, self.data_file)
+
+    def close(self):
+        pass  # Tidak ada handle file yang dibiarkan terbuka
+
+
+class BinaryCatalogStore(JsonJournalStore):
+    """
+    Snapshot dalam format katalog biner (music_data.cat) + journal JSON.
+    Katalog dibuka lewat mmap dan lagu dibuat lazy oleh LazySongLibrary.
+    """
+
+    def __init__(self, catalog_file=CATALOG_FILE, legacy_json=None, compress=BINARY_CATALOG_ZLIB):
+        super().__init__(catalog_file, journal_file=catalog_file + ".journal")
+        self.legacy_json = legacy_json
+        self.compress = compress
+        self.library = None  # LazySongLibrary yang membaca katalog ini (dipasang oleh MusicPlayer)
+
+    def has_data(self):
+        return super().has_data() or (self.legacy_json is not None and os.path.exists(self.legacy_json))
+
+    def load(self):
+        migrated_records = []
+        if not os.path.exists(self.data_file) and self.legacy_json and os.path.exists(self.legacy_json):
+            migrated_records = self.migrate_from_json(self.legacy_json)
+
+        snapshot = {}
+        if os.path.exists(self.data_file):
+            catalog = BinaryCatalog(self.data_file)
+            snapshot = dict(catalog.meta)
+            snapshot['catalog'] = catalog
+        records = self._read_journal(snapshot.get('journal_seq', 0))
+        return snapshot, records or migrated_records
+
+    def migrate_from_json(self, json_file):
+        """Konversi sekali jalan dari music_data.json (+ journal-nya) ke katalog biner."""
+        legacy = JsonJournalStore(json_file)
+        snapshot, records = legacy.load()
+        write_catalog(self.data_file, snapshot.get('username', 'Mokhammad Bahauddin'),
+                      snapshot.get('songs', {}).items(), snapshot.get('playlists', {}),
+                      compress=self.compress, extra=snapshot_extra(snapshot))
+        # Mutasi yang belum masuk snapshot lama dipindah ke journal katalog
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self.append_many(records)
+        print(f"Migrasi '{json_file}' ke '{self.data_file}' selesai: {len(snapshot.get('songs', {}))} lagu.")
+        return records
+
+    def _write_snapshot(self, snapshot):
+        extra = snapshot_extra(snapshot)
+        extra.pop('catalog_mark', None)
+        # Katalog baru ditulis selagi katalog lama masih di-mmap oleh library
+        new_path = self.data_file + ".new"
+        write_catalog(new_path, snapshot.get('username'), snapshot.get('songs', {}).items(),
+                      snapshot.get('playlists', {}), snapshot['journal_seq'], compress=self.compress,
+                      extra=extra)
+        library = self.library
+        if library is not None and os.name == 'nt':
+            # Windows tidak bisa menimpa file yang sedang di-mmap
+            library.catalog.detach()
+        os.replace(new_path, self.data_file)
+        if library is not None and 'catalog_mark' in snapshot:
+            library.adopt(BinaryCatalog(self.data_file), snapshot['catalog_mark'])
+
+
+
+class SqliteStore:
+    """
+    Store berbasis SQLite (modul standar sqlite3).
+    Setiap record mutasi menjadi satu perintah SQL kecil, dan filter genre
+    dijalankan sebagai query ber-index, bukan loop Python. Pencarian teks memakai
+    index di memori (PrefixTrie), jadi tabel songs hanya di-index menurut genre.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS songs (
+            song_id TEXT PRIMARY KEY,
+            title TEXT,
+            artist TEXT,
+            album TEXT,
+            genre TEXT,
+            duration_seconds INTEGER,
+            file_path TEXT,
+            image_path TEXT
+        );
+        CREATE TABLE IF NOT EXISTS playlists (
+            name TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS playlist_items (
+            playlist TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            song_id TEXT NOT NULL,
+            PRIMARY KEY (playlist, position)
+        );
+        CREATE TABLE IF NOT EXISTS favourites (
+            position INTEGER PRIMARY KEY,
+            song_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS queue_items (
+            handle INTEGER PRIMARY KEY,
+            position INTEGER NOT NULL,
+            song_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS history (
+            song_id TEXT PRIMARY KEY,
+            played_at REAL NOT NULL
+        );
+        DROP INDEX IF EXISTS idx_songs_artist;
+        DROP INDEX IF EXISTS idx_songs_album;
+        DROP INDEX IF EXISTS idx_songs_title_lower;
+        CREATE INDEX IF NOT EXISTS idx_songs_genre ON songs(genre COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_playlist_items_song ON playlist_items(song_id);
+        CREATE INDEX IF NOT EXISTS idx_favourites_song ON favourites(song_id);
+        CREATE INDEX IF NOT EXISTS idx_queue_position ON queue_items(position);
+    """
+
+    SONG_COLUMNS = ('song_id', 'title', 'artist', 'album', 'genre',
+                    'duration_seconds', 'file_path', 'image_path')
+
+    def __init__(self, db_file=DB_FILE, legacy_json=None):
+        self.db_file = db_file
+        self.legacy_json = legacy_json  # music_data.json lama untuk migrasi sekali jalan
+        self.pending_records = 0
+        self._lock = threading.Lock()
+        is_new = not os.path.exists(db_file)
+        # Koneksi dipakai bersama oleh thread GUI dan thread writer (dijaga _lock)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self._needs_migration = is_new and legacy_json is not None and os.path.exists(legacy_json)
+
+    def has_data(self):
+        with self._lock:
+            row = self.conn.execute("SELECT COUNT(*) FROM songs").fetchone()
+        return self._needs_migration or row[0] > 0
+
+    def load(self):
+        if self._needs_migration:
+            self.migrate_from_json(self.legacy_json)
+        with self._lock:
+            snapshot = {'songs': {}, 'playlists': {}}
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'username'").fetchone()
+            if row:
+                snapshot['username'] = row[0]
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'shuffle'").fetchone()
+            if row:
+                snapshot['shuffle'] = json.loads(row[0])
+            for row in self.conn.execute("SELECT * FROM songs ORDER BY rowid"):
+                details = dict(zip(self.SONG_COLUMNS, row))
+                snapshot['songs'][details.pop('song_id')] = details
+            snapshot['playlists']["My Favourites"] = [
+                r[0] for r in self.conn.execute("SELECT song_id FROM favourites ORDER BY position")]
+            for (name,) in self.conn.execute("SELECT name FROM playlists ORDER BY rowid").fetchall():
+                snapshot['playlists'][name] = [
+                    r[0] for r in self.conn.execute(
+                        "SELECT song_id FROM playlist_items WHERE playlist = ? ORDER BY position", (name,))]
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'queue_next_handle'").fetchone()
+            snapshot['queue'] = {
+                'next_handle': int(row[0]) if row else 1,
+                'items': [list(r) for r in self.conn.execute(
+                    "SELECT handle, song_id FROM queue_items ORDER BY position")]}
+            # INSERT OR REPLACE memberi rowid baru, jadi rowid mengikuti urutan putar
+            snapshot['history'] = [list(r) for r in self.conn.execute(
+                "SELECT song_id, played_at FROM history ORDER BY rowid")]
+        return snapshot, []
+
+    def migrate_from_json(self, json_file):
+        """Migrasi sekali jalan dari music_data.json (+ journal-nya) ke SQLite."""
+        legacy = JsonJournalStore(json_file)
+        snapshot, records = legacy.load()
+        self.compact(snapshot)
+        self.append_many(records)
+        self._needs_migration = False
+        print(f"Migrasi '{json_file}' ke '{self.db_file}' selesai: {len(snapshot.get('songs', {}))} lagu.")
+
+    def append(self, record):
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Menerapkan record mutasi sebagai penulisan satu baris dalam satu transaksi."""
+        with self._lock, self.conn:
+            for record in records:
+                self._apply(record)
+
+    def _apply(self, record):
+        op = record.get('op')
+        c = self.conn
+        if op == 'set_username':
+            c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('username', ?)", (record['name'],))
+        elif op == 'set_shuffle':
+            c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('shuffle', ?)",
+                      (json.dumps({'enabled': record['enabled'], 'mode': record['mode']}),))
+        elif op == 'add_song':
+            song = record['song']
+            c.execute("INSERT OR IGNORE INTO songs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      tuple(song.get(col) for col in self.SONG_COLUMNS))
+        elif op == 'update_song':
+            c.execute("UPDATE songs SET title = ?, artist = ?, album = ?, genre = ?, image_path = ? "
+                      "WHERE song_id = ?",
+                      (record['title'], record['artist'], record['album'], record['genre'],
+                       record['image_path'], record['song_id']))
+        elif op == 'delete_song':
+            c.execute("DELETE FROM songs WHERE song_id = ?", (record['song_id'],))
+            c.execute("DELETE FROM favourites WHERE song_id = ?", (record['song_id'],))
+            c.execute("DELETE FROM playlist_items WHERE song_id = ?", (record['song_id'],))
+            c.execute("DELETE FROM queue_items WHERE song_id = ?", (record['song_id'],))
+            c.execute("DELETE FROM history WHERE song_id = ?", (record['song_id'],))
+        elif op == 'delete_songs':
+            params = [(song_id,) for song_id in record['song_ids']]
+            c.executemany("DELETE FROM songs WHERE song_id = ?", params)
+            c.executemany("DELETE FROM favourites WHERE song_id = ?", params)
+            c.executemany("DELETE FROM playlist_items WHERE song_id = ?", params)
+            c.executemany("DELETE FROM queue_items WHERE song_id = ?", params)
+            c.executemany("DELETE FROM history WHERE song_id = ?", params)
+        elif op == 'fav_add':
+            c.execute("INSERT INTO favourites (position, song_id) "
+                      "SELECT COALESCE(MAX(position), 0) + 1, ? FROM favourites", (record['song_id'],))
+        elif op == 'fav_remove':
+            c.execute("DELETE FROM favourites WHERE position = "
+                      "(SELECT MIN(position) FROM favourites WHERE song_id = ?)", (record['song_id'],))
+        elif op == 'playlist_create':
+            c.execute("INSERT OR IGNORE INTO playlists (name) VALUES (?)", (record['name'],))
+        elif op == 'playlist_delete':
+            c.execute("DELETE FROM playlists WHERE name = ?", (record['name'],))
+            c.execute("DELETE FROM playlist_items WHERE playlist = ?", (record['name'],))
+        elif op == 'playlist_add':
+            c.execute("INSERT INTO playlist_items (playlist, position, song_id) "
+                      "SELECT ?, COALESCE(MAX(position), 0) + 1, ? FROM playlist_items WHERE playlist = ?",
+                      (record['name'], record['song_id'], record['name']))
+        elif op == 'playlist_move':
+            self._move_item(record['name'], record['from_index'], record['to_index'])
+        elif op == 'playlist_remove':
+            c.execute("DELETE FROM playlist_items WHERE playlist = ? AND position = "
+                      "(SELECT MIN(position) FROM playlist_items WHERE playlist = ? AND song_id = ?)",
+                      (record['name'], record['name'], record['song_id']))
+        elif op == 'queue_add':
+            # Depan antrean = posisi terkecil, belakang = posisi terbesar
+            edge = "COALESCE(MIN(position), 0) - 1" if record.get('front') else "COALESCE(MAX(position), 0) + 1"
+            c.execute(f"INSERT OR REPLACE INTO queue_items (handle, position, song_id) "
+                      f"SELECT ?, {edge}, ? FROM queue_items", (record['handle'], record['song_id']))
+            # Handle selalu naik, jadi handle terakhir + 1 adalah handle berikutnya
+            c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('queue_next_handle', ?)",
+                      (str(record['handle'] + 1),))
+        elif op == 'queue_remove':
+            c.execute("DELETE FROM queue_items WHERE handle = ?", (record['handle'],))
+        elif op == 'queue_clear':
+            c.execute("DELETE FROM queue_items")
+        elif op == 'history_touch':
+            c.execute("INSERT OR REPLACE INTO history (song_id, played_at) VALUES (?, ?)",
+                      (record['song_id'], record['played_at']))
+            # Sama seperti RecentlyPlayed: hanya HISTORY_DEPTH lagu terakhir (rowid = urutan putar)
+            c.execute("DELETE FROM history WHERE rowid <= "
+                      "(SELECT rowid FROM history ORDER BY rowid DESC LIMIT 1 OFFSET ?)", (HISTORY_DEPTH,))
+        else:
+            print(f"SQLite: operasi tidak dikenal '{op}' dilewati.")
+
+    def _move_item(self, name, from_index, to_index):
+        # Posisi adalah urutan (ordinal), jadi baris di antara kedua posisi ikut bergeser
+        c = self.conn
+        if name == "My Favourites":
+            rows = c.execute("SELECT song_id FROM favourites ORDER BY position").fetchall()
+        else:
+            rows = c.execute("SELECT song_id FROM playlist_items WHERE playlist = ? ORDER BY position",
+                             (name,)).fetchall()
+        song_ids = [r[0] for r in rows]
+        if not 0 <= from_index < len(song_ids):
+            return
+        song_ids.insert(to_index, song_ids.pop(from_index))
+        if name == "My Favourites":
+            c.execute("DELETE FROM favourites")
+            c.executemany("INSERT INTO favourites (position, song_id) VALUES (?, ?)",
+                          list(enumerate(song_ids, 1)))
+        else:
+            c.execute("DELETE FROM playlist_items WHERE playlist = ?", (name,))
+            c.executemany("INSERT INTO playlist_items (playlist, position, song_id) VALUES (?, ?, ?)",
+                          [(name, pos, song_id) for pos, song_id in enumerate(song_ids, 1)])
+
+    def needs_compaction(self, unwritten=0):
+        return False  # Setiap record sudah ditulis langsung ke tabel
+
+    def compact(self, snapshot):
+        """Menulis ulang seluruh isi database dari snapshot (dipakai untuk migrasi/save penuh)."""
+        with self._lock, self.conn:
+            c = self.conn
+            for table in ('songs', 'playlists', 'playlist_items', 'favourites', 'queue_items', 'history'):
+                c.execute(f"DELETE FROM {table}")
+            if 'username' in snapshot:
+                c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('username', ?)",
+                          (snapshot['username'],))
+            if 'shuffle' in snapshot:
+                c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('shuffle', ?)",
+                          (json.dumps(snapshot['shuffle']),))
+            c.executemany("INSERT INTO songs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          [(song_id,) + tuple(details.get(col) for col in self.SONG_COLUMNS[1:])
+                           for song_id, details in snapshot.get('songs', {}).items()])
+            for name, song_ids in snapshot.get('playlists', {}).items():
+                if name == "My Favourites":
+                    c.executemany("INSERT INTO favourites (position, song_id) VALUES (?, ?)",
+                                  list(enumerate(song_ids, 1)))
+                    continue
+                c.execute("INSERT INTO playlists (name) VALUES (?)", (name,))
+                c.executemany("INSERT INTO playlist_items (playlist, position, song_id) VALUES (?, ?, ?)",
+                              [(name, pos, song_id) for pos, song_id in enumerate(song_ids, 1)])
+            queue = snapshot.get('queue')
+            if queue:
+                c.executemany("INSERT INTO queue_items (handle, position, song_id) VALUES (?, ?, ?)",
+                              [(handle, pos, song_id) for pos, (handle, song_id) in enumerate(queue['items'], 1)])
+                c.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('queue_next_handle', ?)",
+                          (str(queue['next_handle']),))
+            c.executemany("INSERT INTO history (song_id, played_at) VALUES (?, ?)",
+                          [tuple(item) for item in snapshot.get('history', [])[-HISTORY_DEPTH:]])
+
+    # --- QUERY BER-INDEX ---
+    def ids_by_genre(self, genre):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT song_id FROM songs WHERE genre = ? COLLATE NOCASE ORDER BY rowid", (genre,)).fetchall()
+        return [r[0] for r in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def create_store(backend, data_file):
+    """Memilih backend penyimpanan: 'json' (default, library kecil), 'sqlite' atau 'binary'."""
+    if backend == "sqlite":
+        return SqliteStore(DB_FILE, legacy_json=data_file)
+    if backend == "binary":
+        return BinaryCatalogStore(CATALOG_FILE, legacy_json=data_file)
+    return JsonJournalStore(data_file)
+
+class PersistenceWriter:
+    """
+    Thread writer khusus untuk store.
+    GUI hanya menandai state 'dirty'; semua perubahan yang masuk dalam satu
+    jendela waktu ditulis sekaligus oleh thread ini.
+    """
+
+    def __init__(self, store, delay=WRITE_COALESCE_SECONDS):
+        self.store = store
+        self.delay = delay
+        self.coalesced_writes = 0  # Jumlah tulis disk yang berhasil dihemat
+        self.disk_writes = 0
+        self.last_error = None  # Exception tulis terakhir; None setelah tulis berhasil
+        self._failures = 0  # Tulis gagal berturut-turut
+
+        self._pending_records = []
+        self._pending_snapshot = None
+        self._pending_count = 0  # Jumlah permintaan tulis sejak flush terakhir
+        self._lock = threading.Lock()  # Melindungi antrean pending
+        self._io_lock = threading.Lock()  # Hanya satu penulis ke disk pada satu waktu
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Mengantrekan satu record journal dan menandai state dirty."""
+        with self._lock:
+            self._pending_records.append(record)
+            self._pending_count += 1
+        self._dirty.set()
+
+    def submit_snapshot(self, snapshot):
+        """Mengantrekan snapshot penuh. Record yang belum tertulis sudah tercakup di dalamnya."""
+        with self._lock:
+            self._pending_snapshot = snapshot
+            self._pending_records = []
+            self._pending_count += 1
+        self._dirty.set()
+
+    def needs_compaction(self):
+        if self._pending_snapshot is not None:
+            return False  # Compaction sudah dijadwalkan
+        return self.store.needs_compaction(len(self._pending_records))
+
+    def flush(self):
+        """
+        Menulis semua perubahan yang tertunda secara sinkron (dipakai saat keluar dan di test).
+        False jika masih ada perubahan yang gagal ditulis (lihat last_error).
+        """
+        self._write_pending()
+        return self.last_error is None
+
+    def close(self):
+        if self._closing.is_set():
+            return
+        self._closing.set()
+        self._dirty.set()
+        self._thread.join(timeout=5.0)
+        if not self.flush():
+            print(f"Peringatan: {self._pending_count} perubahan tidak tersimpan: {self.last_error}")
+
+    def _run(self):
+        while not self._closing.is_set():
+            self._dirty.wait()
+            # Tunggu sampai jendela coalescing habis (atau aplikasi ditutup)
+            self._closing.wait(self.delay)
+            self._dirty.clear()
+            self._write_pending()
+            if self._failures:
+                backoff = WRITE_RETRY_BACKOFF_SECONDS * 2 ** (self._failures - 1)
+                self._closing.wait(min(backoff, WRITE_RETRY_MAX_BACKOFF_SECONDS))
+
+    def _write_pending(self):
+        with self._io_lock:
+            with self._lock:
+                snapshot = self._pending_snapshot
+                records = self._pending_records
+                count = self._pending_count
+                self._pending_snapshot = None
+                self._pending_records = []
+                self._pending_count = 0
+            if count == 0:
+                return
+            writes = (snapshot is not None) + bool(records)
+            try:
+                if snapshot is not None:
+                    self.store.compact(snapshot)
+                    self.disk_writes += 1
+                    snapshot = None
+                if records:
+                    self.store.append_many(records)
+                    self.disk_writes += 1
+                self.coalesced_writes += count - writes
+                self.last_error = None
+                self._failures = 0
+            except Exception as e:
+                self.last_error = e
+                self._failures += 1
+                print(f"Error menyimpan data (percobaan {self._failures}): {e}")
+                # Setelah batas percobaan, data tetap disimpan di antrean dan baru dicoba
+                # lagi saat ada perubahan baru (atau flush/close), bukan berputar terus
+                self._requeue(snapshot, records, count, retry=self._failures <= WRITE_RETRY_LIMIT)
+
+    def _requeue(self, snapshot, records, count, retry=True):
+        """Mengembalikan batch yang gagal ditulis ke depan antrean pending agar dicoba lagi."""
+        with self._lock:
+            # Snapshot yang masuk sementara itu sudah mencakup batch ini
+            if self._pending_snapshot is None:
+                self._pending_snapshot = snapshot
+                self._pending_records = records + self._pending_records
+            self._pending_count += count
+        if retry:
+            self._dirty.set()